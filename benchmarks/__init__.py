@@ -0,0 +1,6 @@
+"""Performance benchmarks for the Spy Cat Agency API.
+
+Each scenario is a module that can be run with ``python -m benchmarks.<scenario>``.
+Scenarios run against a throwaway test database created from the configured
+``DATABASES``, so they never touch real data.
+"""
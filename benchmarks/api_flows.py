@@ -0,0 +1,91 @@
+"""Latency and queries per request of the main API flows, through the full Django stack.
+
+    python -m benchmarks.api_flows [--cats 500] [--missions 2000] [--repeat 50]
+
+Requests go through Django's test client, so the numbers include routing,
+validation and serialization but no network. Detail pages are measured both
+from the response cache (the same ID every time) and cold (a new ID every time).
+Use ``benchmarks.http_load`` for the same flows under concurrency.
+"""
+import argparse
+import json
+
+from .harness import measure, report, setup_django, throwaway_database
+from .services import WARMUP, fresh_cats, fresh_missions
+
+
+def request(client, method: str, path: str, body: dict | None = None):
+    data = json.dumps(body) if body is not None else None
+    response = getattr(client, method)(path, data=data, content_type='application/json')
+    assert response.status_code == 200, (path, response.status_code, response.content[:500])
+    return response
+
+
+def flows(client, calls: int) -> dict:
+    from cats.models import SpyCat
+    from missions.models import Mission
+
+    cat_ids = iter(SpyCat.objects.order_by('id').values_list('id', flat=True)[:calls + 1])
+    mission_ids = iter(Mission.objects.order_by('id').values_list('id', flat=True)[:calls + 1])
+    cached_cat, cached_mission = next(cat_ids), next(mission_ids)
+    handlers = iter(fresh_cats(calls))
+    open_targets = iter(
+        (mission_id, target_ids[0]) for mission_id, target_ids in fresh_missions(calls, fresh_cats(calls))
+    )
+
+    def create_mission():
+        request(client, 'post', '/api/missions/', {
+            'name': 'Benchmark mission',
+            'description': 'Benchmark',
+            'assigned_cat': next(handlers),
+            'targets': [{'name': f'Target {i}', 'country': 'Ukraine'} for i in range(3)],
+        })
+
+    def complete_target():
+        mission_id, target_id = next(open_targets)
+        request(client, 'patch', f'/api/missions/{mission_id}/target/{target_id}/complete/')
+
+    return {
+        'list cats (keyset)': lambda: request(client, 'get', '/api/spy_cats/?limit=20'),
+        'list cats (page)': lambda: request(client, 'get', '/api/spy_cats/?page=5&page_size=20'),
+        'list missions (keyset)': lambda: request(client, 'get', '/api/missions/?limit=20'),
+        'list missions (page)': lambda: request(client, 'get', '/api/missions/?page=5&page_size=20'),
+        'cat detail (cached)': lambda: request(client, 'get', f'/api/spy_cats/{cached_cat}/'),
+        'cat detail (cold)': lambda: request(client, 'get', f'/api/spy_cats/{next(cat_ids)}/'),
+        'mission detail (cached)': lambda: request(client, 'get', f'/api/missions/{cached_mission}/'),
+        'mission detail (cold)': lambda: request(client, 'get', f'/api/missions/{next(mission_ids)}/'),
+        'create mission': create_mission,
+        'complete target': complete_target,
+    }
+
+
+def run(repeat: int) -> dict[str, dict]:
+    from django.core.cache import cache
+    from django.test import Client
+
+    # Cold detail pages must not be served from an earlier run's entries.
+    cache.clear()
+    return {
+        name: measure(func, repeat=repeat, warmup=WARMUP)
+        for name, func in flows(Client(), repeat + WARMUP).items()
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cats', type=int, default=500)
+    parser.add_argument('--missions', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+
+    with throwaway_database():
+        call_command('seed_agency', cats=args.cats, missions=args.missions, verbosity=0)
+        report(f'api flows ({args.cats} cats, {args.missions} missions)', run(args.repeat), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Throughput of the bulk import endpoints, in rows per second.
+
+    python -m benchmarks.bulk_import [--rows 1000 10000] [--output results.json]
+
+Breeds are validated against the bundled fixture, so no network access is needed.
+"""
+import argparse
+import json
+import time
+
+from .harness import report, setup_django, throwaway_database
+
+FIXTURE_BREED_REGISTRY = {'SOURCE': 'cats.breeds.FixtureBreedSource', 'TTL': 3600}
+
+
+def import_rows(client, url: str, rows: list[dict], ndjson: bool) -> dict:
+    if ndjson:
+        body, content_type = '\n'.join(json.dumps(row) for row in rows), 'application/x-ndjson'
+    else:
+        body, content_type = json.dumps(rows), 'application/json'
+
+    start = time.perf_counter()
+    response = client.post(url, data=body, content_type=content_type)
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200 and response.json()['failed'] == 0, response.content[:500]
+    return {'rows': len(rows), 'seconds': elapsed, 'rows_per_second': len(rows) / elapsed}
+
+
+def run(sizes: list[int]) -> dict[str, dict]:
+    from django.test import Client, override_settings
+
+    from cats.models import SpyCat
+
+    client = Client()
+    results = {}
+    with override_settings(BREED_REGISTRY=FIXTURE_BREED_REGISTRY):
+        for size in sizes:
+            # Each imported mission is active, and a cat can only have one active mission.
+            handlers = SpyCat.objects.bulk_create(
+                SpyCat(name=f'Handler {i}', years_of_experience=1, breed='Siamese', salary=100) for i in range(size)
+            )
+            cats = [
+                {'name': f'Cat {i}', 'years_of_experience': i % 20, 'breed': 'Maine Coon', 'salary': 1000 + i}
+                for i in range(size)
+            ]
+            missions = [
+                {
+                    'name': f'Mission {i}',
+                    'description': 'Imported mission',
+                    'assigned_cat': handlers[i].id,
+                    'targets': [{'name': f'Target {i}.{j}', 'country': 'Ukraine'} for j in range(3)],
+                }
+                for i in range(size)
+            ]
+            results[f'cats json x{size}'] = import_rows(client, '/api/spy_cats/bulk', cats, ndjson=False)
+            results[f'cats ndjson x{size}'] = import_rows(client, '/api/spy_cats/bulk', cats, ndjson=True)
+            results[f'missions json x{size}'] = import_rows(client, '/api/missions/bulk', missions, ndjson=False)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    with throwaway_database():
+        report('bulk import', run(args.rows), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Compares a benchmark run with a baseline stored by an earlier ``--output``.
+
+    python -m benchmarks.compare baseline.json current.json [--threshold 10]
+
+Prints the change of every metric and exits with status 1 if any regressed:
+a latency or throughput more than ``--threshold`` percent worse, or any more
+queries or errors than the baseline. Cases missing from either run are listed
+but do not fail the comparison.
+"""
+import argparse
+import json
+import sys
+
+# Metrics where a larger value is better; the others are better smaller.
+HIGHER_IS_BETTER = {'req_per_s', 'rows_per_second'}
+# Metrics that must not grow at all, since they do not depend on timing noise.
+EXACT = {'queries', 'errors'}
+# Metrics that describe the run rather than measure it.
+IGNORED = {'runs', 'rows', 'items'}
+
+
+def regressed(metric: str, baseline: float, current: float, threshold: float) -> bool:
+    if metric in EXACT:
+        return current > baseline
+    if metric in HIGHER_IS_BETTER:
+        return current < baseline * (1 - threshold / 100)
+    return current > baseline * (1 + threshold / 100)
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """Prints a line per metric and returns the regressions as ``case: metric`` strings."""
+    regressions = []
+    for case in [*baseline, *(case for case in current if case not in baseline)]:
+        if case not in current or case not in baseline:
+            print(f"{case}: only in {'baseline' if case in baseline else 'current run'}")
+            continue
+        for metric, before in baseline[case].items():
+            after = current[case].get(metric)
+            if metric in IGNORED or after is None:
+                continue
+            change = (after - before) / before * 100 if before else 0.0
+            failed = regressed(metric, before, after, threshold)
+            if failed:
+                regressions.append(f'{case}: {metric}')
+            print(f"{case:<40}{metric:>12}{before:>14.2f}{after:>14.2f}{change:>+10.1f}%{'  REGRESSION' if failed else ''}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10, help="Tolerated slowdown, in percent.")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)['results']
+    with open(args.current) as f:
+        current = json.load(f)['results']
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s):\n  " + '\n  '.join(regressions))
+        sys.exit(1)
+    print("\nNo regressions.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Cost of creating a mission with 1, 10 and 100 targets.
+
+    python -m benchmarks.create_mission [--repeat N] [--output results.json]
+"""
+import argparse
+
+from .harness import measure, report, setup_django, throwaway_database
+
+TARGET_COUNTS = (1, 10, 100)
+
+
+def run(repeat: int) -> dict[str, dict]:
+    from cats.models import SpyCat
+    from missions.schemas import CreateMissionSchema
+    from missions.services import create_mission_with_targets
+
+    results = {}
+    for count in TARGET_COUNTS:
+        # A cat can only have one active mission, so every call gets its own cat.
+        cats = SpyCat.objects.bulk_create(
+            SpyCat(name=f'Benchmark {i}', years_of_experience=1, breed='Siamese', salary=100) for i in range(repeat + 2)
+        )
+        cat_ids = iter(cat.id for cat in cats)
+        payload = CreateMissionSchema(
+            name=f'Mission with {count} targets',
+            description='Benchmark',
+            targets=[{'name': f'Target {i}', 'country': 'Ukraine'} for i in range(count)],
+        )
+        results[f'{count} targets'] = measure(
+            lambda: create_mission_with_targets(payload.model_copy(update={'assigned_cat': next(cat_ids)})),
+            repeat=repeat,
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    with throwaway_database():
+        report('create_mission_with_targets', run(args.repeat), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""Requests per second of a list endpoint under each POSTGRES_POOL_MODE.
+
+    python -m benchmarks.db_pooling [--modes none persistent pool external] [--threads 8] [--requests 2000]
+
+Each mode runs in its own process, since the connection settings are read at
+startup. Requests go through Django's test client from several threads, so
+every request opens and releases its connection the way a server would.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from .harness import report, setup_django, summarize, throwaway_database
+
+MODES = ['none', 'persistent', 'pool', 'external']
+PATH = '/api/missions/?limit=20'
+
+
+def worker(threads: int, requests: int) -> dict:
+    """Runs inside the per-mode process and returns its measurements."""
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    # Allows the test client's host name.
+    setup_test_environment()
+    timings, errors = [], []
+    remaining = iter(range(requests))
+    lock = threading.Lock()
+
+    def run():
+        client = Client()
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            response = client.get(PATH)
+            elapsed = time.perf_counter() - start
+            with lock:
+                timings.append(elapsed)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+
+    start = time.perf_counter()
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {**summarize(timings), 'errors': len(errors), 'req_per_s': len(timings) / elapsed}
+
+
+def run_mode(mode: str, database: str, threads: int, requests: int) -> dict:
+    env = {**os.environ, 'POSTGRES_POOL_MODE': mode, 'POSTGRES_DB': database}
+    command = [
+        sys.executable, '-m', 'benchmarks.db_pooling', '--worker', '--threads', str(threads), '--requests', str(requests),
+    ]
+    output = subprocess.run(command, env=env, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    if args.worker:
+        print(json.dumps(worker(args.threads, args.requests)))
+        return
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    with throwaway_database():
+        call_command('seed_agency', cats=200, missions=1000, verbosity=0)
+        database = connection.settings_dict['NAME']
+        # The worker processes connect to the same database; ours must not hold it open.
+        connection.close()
+        results = {mode: run_mode(mode, database, args.threads, args.requests) for mode in args.modes}
+        report(f'{PATH} x{args.threads} threads', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import json
+import os
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable
+
+import django
+
+
+def setup_django() -> None:
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    django.setup()
+
+
+@contextmanager
+def throwaway_database(keepdb: bool = False):
+    """Creates the test database for the duration of the block."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, keepdb=keepdb)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+        teardown_test_environment()
+
+
+def measure(func: Callable[[], object], repeat: int = 20, warmup: int = 2) -> dict:
+    """Times ``func`` and counts the SQL queries of each call."""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for _ in range(warmup):
+        func()
+
+    timings, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        queries.append(len(captured))
+
+    return {**summarize(timings), 'queries': statistics.median(queries)}
+
+
+def summarize(timings: list[float]) -> dict:
+    """Latency percentiles in milliseconds."""
+    ordered = sorted(timings)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))] * 1000
+
+    return {
+        'runs': len(ordered),
+        'mean_ms': statistics.fmean(ordered) * 1000,
+        'p50_ms': percentile(50),
+        'p95_ms': percentile(95),
+        'p99_ms': percentile(99),
+    }
+
+
+def report(title: str, rows: dict[str, dict], output: str | None = None) -> None:
+    """Prints results as a table and optionally writes them to ``output`` as JSON."""
+    print(title)
+    columns = list(next(iter(rows.values())))
+    width = max(30, *(len(name) + 2 for name in rows))
+    print(f"{'case':<{width}}" + ''.join(f"{column:>16}" for column in columns))
+    for name, row in rows.items():
+        cells = (f"{value:>16.2f}" if isinstance(value, float) else f"{value!s:>16}" for value in row.values())
+        print(f"{name:<{width}}" + ''.join(cells))
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump({'benchmark': title, 'results': rows}, f, indent=2)
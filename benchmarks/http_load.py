@@ -0,0 +1,149 @@
+"""Throughput and latency of a running server under concurrent load.
+
+    python -m benchmarks.http_load --url http://localhost:8000 [--concurrency 50] [--requests 2000]
+    python -m benchmarks.http_load --flows list detail create_mission complete_target
+
+Unlike the other scenarios this one talks HTTP to a server that is already up,
+so the same run can be repeated against ``API_MODE=sync`` (``manage.py runserver``
+or a WSGI server) and ``API_MODE=async`` (``uvicorn core.asgi:application``) to
+compare them. The server's database must already contain some cats and missions,
+e.g. from ``manage.py seed_agency``.
+
+``--paths`` sends GET requests to the given paths. ``--flows`` runs the main
+flows instead: listing, detail pages of the listed cats and missions, creating
+missions, and completing the open targets of active missions. The write flows
+change the server's data.
+
+``--together`` runs the scenarios at the same time instead of one after the
+other, e.g. ``--flows list create_mission --together`` shows the read latency
+during a storm of writes. Requests turned away with a 429 or 503 by
+core.throttling are counted as ``rejected``.
+"""
+import argparse
+import asyncio
+import itertools
+import secrets
+import time
+from typing import Awaitable, Callable
+
+import httpx
+
+from .harness import report, summarize
+
+DEFAULT_PATHS = ['/api/spy_cats/?limit=20', '/api/missions/?limit=20']
+FLOWS = ['list', 'detail', 'create_mission', 'complete_target']
+
+Send = Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+
+
+async def load(client: httpx.AsyncClient, send: Send, concurrency: int, requests: int) -> dict:
+    timings, errors, rejected = [], 0, 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors, rejected
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                status = (await send(client)).status_code
+            except httpx.TransportError:
+                status = None
+            timings.append(time.perf_counter() - start)
+            if status in (429, 503):
+                rejected += 1
+            elif status != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {**summarize(timings), 'errors': errors, 'rejected': rejected, 'req_per_s': len(timings) / elapsed}
+
+
+async def open_targets(client: httpx.AsyncClient, count: int) -> list[tuple[int, int]]:
+    """Up to ``count`` (mission, target) pairs that can be completed, read through keyset pages."""
+    pairs, after = [], None
+    while len(pairs) < count:
+        params = {'is_completed': 'false', 'limit': 100, **({'after': after} if after is not None else {})}
+        page = (await client.get('/api/missions/', params=params)).json()
+        pairs.extend(
+            (mission['id'], target['id'])
+            for mission in page['items'] if mission['assigned_cat']
+            for target in mission['targets'] if not target['is_completed']
+        )
+        after = page['next']
+        if after is None:
+            break
+    return pairs[:count]
+
+
+async def flows(client: httpx.AsyncClient, names: list[str], requests: int) -> dict[str, Send]:
+    """Request makers of each flow; IDs are read from the server up front."""
+    missions = (await client.get('/api/missions/', params={'limit': 100})).json()['items']
+    cats = (await client.get('/api/spy_cats/', params={'limit': 100})).json()['items']
+    details = itertools.cycle(
+        [f"/api/missions/{mission['id']}/" for mission in missions] + [f"/api/spy_cats/{cat['id']}/" for cat in cats]
+    )
+    lists = itertools.cycle(DEFAULT_PATHS)
+    # Completing a target twice is a no-op, so the pairs are only reused once they run out.
+    targets = itertools.cycle(await open_targets(client, requests) or [(0, 0)])
+
+    mission = {
+        'name': 'Load test mission',
+        'description': 'Created by benchmarks.http_load',
+        'assigned_cat': None,
+        'targets': [{'name': f'Target {i}', 'country': 'Ukraine'} for i in range(3)],
+    }
+
+    def complete_target(client):
+        mission_id, target_id = next(targets)
+        return client.patch(f'/api/missions/{mission_id}/target/{target_id}/complete/')
+
+    makers = {
+        'list': lambda client: client.get(next(lists)),
+        'detail': lambda client: client.get(next(details)),
+        'create_mission': lambda client: client.post('/api/missions/', json=mission),
+        'complete_target': complete_target,
+    }
+    return {name: makers[name] for name in names}
+
+
+async def run(
+    url: str, paths: list[str], flow_names: list[str] | None, concurrency: int, requests: int, together: bool = False
+) -> dict:
+    # Idle connections are dropped before the server's keep-alive timeout (5 seconds
+    # in gunicorn.conf.py), so a request is never sent on a connection being closed.
+    scenario_count = len(flow_names or paths) if together else 1
+    limits = httpx.Limits(max_connections=concurrency * scenario_count, keepalive_expiry=2)
+    # The API checks CSRF tokens; Django accepts any token as long as cookie and header match.
+    token = secrets.token_hex(16)
+    async with httpx.AsyncClient(
+        base_url=url, limits=limits, timeout=30, cookies={'csrftoken': token}, headers={'X-CSRFToken': token}
+    ) as client:
+        if flow_names:
+            scenarios = await flows(client, flow_names, requests)
+        else:
+            scenarios = {path: (lambda client, path=path: client.get(path)) for path in paths}
+        if together:
+            results = await asyncio.gather(*(load(client, send, concurrency, requests) for send in scenarios.values()))
+            return dict(zip(scenarios, results))
+        return {name: await load(client, send, concurrency, requests) for name, send in scenarios.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://localhost:8000')
+    parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+    parser.add_argument('--flows', nargs='+', choices=FLOWS)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--together', action='store_true', help="Run the scenarios concurrently.")
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.url, args.paths, args.flows, args.concurrency, args.requests, args.together))
+    report(f'http load x{args.concurrency} against {args.url}', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
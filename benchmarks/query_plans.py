@@ -0,0 +1,79 @@
+"""Query plans and latency of the hot mission/target queries, with and without the mission indexes.
+
+    python -m benchmarks.query_plans [--missions 250000] [--targets-per-mission 4] [--output results.json]
+
+The defaults seed 1M targets. The queries are measured with the indexes of
+missions/0003 in place, then again after migrating back to missions/0002. Plans
+are printed with EXPLAIN ANALYZE on PostgreSQL.
+"""
+import argparse
+
+from .harness import measure, report, setup_django, throwaway_database
+
+INDEXED_MIGRATION = '0003_indexes_and_active_mission_constraint'
+UNINDEXED_MIGRATION = '0002_mission_remaining_targets'
+
+
+def hot_queries(mission_id: int, cat_id: int) -> dict:
+    from cats.schemas import SpyCatFilterSchema
+    from cats.services import list_spy_cats
+    from missions.models import Mission, Target
+    from missions.schemas import MissionFilterSchema
+    from missions.services import list_missions
+
+    return {
+        'cats by name prefix': list_spy_cats(SpyCatFilterSchema(name='agent 123'))[:20],
+        'missions by country': list_missions(MissionFilterSchema(country='Japan', is_completed=False))[:20],
+        'missions search': list_missions(MissionFilterSchema(search='casino safehouse'))[:20],
+        'open targets': Target.objects.filter(mission_id=mission_id, is_completed=False),
+        'cat active mission': Mission.objects.filter(assigned_cat_id=cat_id, is_completed=False),
+        'open page': Mission.objects.filter(is_completed=False).order_by('id')[:20],
+        'completed page': Mission.objects.filter(is_completed=True).order_by('id')[:20],
+    }
+
+
+def run(repeat: int, show_plans: bool) -> dict[str, dict]:
+    from django.db import connection
+
+    from missions.models import Mission
+
+    sample = Mission.objects.filter(is_completed=False).order_by('-id').values('id', 'assigned_cat_id').first()
+    results = {}
+    for name, queryset in hot_queries(sample['id'], sample['assigned_cat_id']).items():
+        if show_plans and connection.vendor == 'postgresql':
+            print(f'-- {name}\n{queryset.explain(analyze=True)}\n')
+        results[name] = measure(lambda: list(queryset.all()), repeat=repeat)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cats', type=int, default=50000)
+    parser.add_argument('--missions', type=int, default=250000)
+    parser.add_argument('--targets-per-mission', type=int, default=4)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--no-plans', action='store_true')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+    from django.db import connection
+
+    with throwaway_database():
+        call_command(
+            'seed_agency', cats=args.cats, missions=args.missions, targets_per_mission=args.targets_per_mission
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        results = {f'{name} (indexed)': row for name, row in run(args.repeat, not args.no_plans).items()}
+        call_command('migrate', 'missions', UNINDEXED_MIGRATION, verbosity=0)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        results.update({f'{name} (no index)': row for name, row in run(args.repeat, not args.no_plans).items()})
+        report('mission/target hot queries', results, args.output)
+
+
+if __name__ == '__main__':
+    main()
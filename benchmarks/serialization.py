@@ -0,0 +1,108 @@
+"""Cost per item of serializing spy cats and missions with 0, 10 and 100 targets.
+
+    python -m benchmarks.serialization [--items 100] [--repeat 20] [--output results.json]
+
+Each page is loaded once, then only its serialization is timed, three ways:
+
+- ``schema + json``: model instances through the response schema and ``json.dumps``, as before core.serialization;
+- ``schema + orjson``: the same through ``ORJSONRenderer``, as the detail endpoints do;
+- ``rows``: ``.values()`` rows through the precompiled ``TypeAdapter``, as the list endpoints do.
+"""
+import argparse
+import json
+
+from .harness import measure, report, setup_django, throwaway_database
+
+TARGET_COUNTS = (0, 10, 100)
+
+
+def per_item(timings: dict, items: int) -> dict:
+    return {
+        'items': items,
+        'mean_us': timings['mean_ms'] * 1000 / items,
+        'p50_us': timings['p50_ms'] * 1000 / items,
+        'p95_us': timings['p95_ms'] * 1000 / items,
+    }
+
+
+def compare_paths(label: str, schema, instances: list, serializer, rows: list, repeat: int) -> dict[str, dict]:
+    from ninja.responses import NinjaJSONEncoder
+
+    from core.serialization import dumps
+
+    page = {'items': rows, 'count': len(rows)}
+    paths = {
+        'schema + json': lambda: json.dumps(
+            {'items': [schema.from_orm(item).model_dump() for item in instances], 'count': len(instances)},
+            cls=NinjaJSONEncoder,
+        ),
+        'schema + orjson': lambda: dumps(
+            {'items': [schema.from_orm(item).model_dump() for item in instances], 'count': len(instances)}
+        ),
+        'rows': lambda: serializer.dump_page(page),
+    }
+    return {f'{label}: {path}': per_item(measure(func, repeat=repeat), len(rows)) for path, func in paths.items()}
+
+
+def run(items: int, repeat: int) -> dict[str, dict]:
+    from cats.models import SpyCat
+    from cats.schemas import SpyCatSchema
+    from cats.services import SPY_CAT_EXPORT_FIELDS, spy_cat_rows
+    from core.serialization import RowSerializer
+    from missions.models import Mission, Target
+    from missions.schemas import MissionRow, MissionSchema
+    from missions.services import MISSION_ROW_FIELDS, mission_rows, missions_for_serialization
+
+    cats = SpyCat.objects.bulk_create(
+        SpyCat(name=f'Agent {i}', years_of_experience=i % 20, breed='Siamese', salary=1000 + i) for i in range(items)
+    )
+    ids = [cat.id for cat in cats]
+    results = compare_paths(
+        'cat',
+        SpyCatSchema,
+        list(SpyCat.objects.filter(id__in=ids).order_by('id')),
+        spy_cat_rows,
+        list(SpyCat.objects.filter(id__in=ids).order_by('id').values(*SPY_CAT_EXPORT_FIELDS)),
+        repeat,
+    )
+
+    # The rows are completed once up front, so the targets query is not timed either.
+    nested_rows = RowSerializer(MissionRow)
+    for count in TARGET_COUNTS:
+        missions = Mission.objects.bulk_create(
+            Mission(name=f'Operation {i}', description='Benchmark', assigned_cat_id=ids[i], remaining_targets=count)
+            for i in range(items)
+        )
+        Target.objects.bulk_create(
+            Target(mission=mission, name=f'Target {j}', country='Ukraine', notes='Keep watch')
+            for mission in missions for j in range(count)
+        )
+        page = Mission.objects.filter(id__in=[mission.id for mission in missions]).order_by('id')
+        results.update(compare_paths(
+            f'mission, {count} targets',
+            MissionSchema,
+            list(missions_for_serialization().filter(id__in=page.values('id')).order_by('id')),
+            nested_rows,
+            mission_rows(list(page.values(*MISSION_ROW_FIELDS))),
+            repeat,
+        ))
+        # A cat can only have one active mission.
+        Mission.objects.filter(id__in=page.values('id')).update(is_completed=True)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--items', type=int, default=100, help="Items per page.")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    with throwaway_database():
+        results = run(args.items, args.repeat)
+    report("Serialization cost per item (microseconds)", results, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""Latency and query count of every function in cats.services and missions.services.
+
+    python -m benchmarks.services [--cats 500] [--missions 2000] [--repeat 20] [--only cats.get_spy_cat ...]
+
+The database is filled with ``seed_agency`` first. Calls that consume their
+input, such as deletes or completing a target, get a fresh row for every call.
+Breeds are validated against the bundled fixture, so no network access is needed.
+"""
+import argparse
+from typing import Callable
+
+from .harness import measure, report, setup_django, throwaway_database
+
+FIXTURE_BREED_REGISTRY = {'SOURCE': 'cats.breeds.FixtureBreedSource', 'TTL': 3600}
+WARMUP = 2
+BULK_ROWS = 100
+
+
+def fresh_cats(count: int) -> list[int]:
+    from cats.models import SpyCat
+
+    cats = SpyCat.objects.bulk_create(
+        SpyCat(name=f'Recruit {i}', years_of_experience=1, breed='Siamese', salary=100) for i in range(count)
+    )
+    return [cat.id for cat in cats]
+
+
+def fresh_missions(count: int, cat_ids: list[int] | None = None, targets: int = 3) -> list[tuple[int, list[int]]]:
+    """Open missions, assigned to ``cat_ids`` if given, with their target IDs."""
+    from missions.models import Mission, Target
+
+    missions = Mission.objects.bulk_create(
+        Mission(
+            name=f'Fresh operation {i}',
+            description='Benchmark',
+            assigned_cat_id=cat_ids[i] if cat_ids else None,
+            remaining_targets=targets,
+        )
+        for i in range(count)
+    )
+    created = Target.objects.bulk_create(
+        Target(mission=mission, name=f'Target {j}', country='Ukraine', notes='') for mission in missions for j in range(targets)
+    )
+    target_ids = [target.id for target in created]
+    return [(mission.id, target_ids[i * targets:(i + 1) * targets]) for i, mission in enumerate(missions)]
+
+
+def cases(calls: int) -> dict[str, Callable[[], object]]:
+    """One callable per service function; each may be called ``calls`` times."""
+    from cats import services as cats
+    from cats.schemas import CreateSpyCatSchema, PatchSpyCatSchema, SpyCatFieldsSchema, SpyCatFilterSchema
+    from missions import services as missions
+    from missions.models import Mission
+    from missions.schemas import CreateMissionSchema, MissionFilterSchema, PatchMissionSchema, PatchTargetSchema
+
+    cat_id = fresh_cats(1)[0]
+    (open_mission_id, open_target_ids), = fresh_missions(1, fresh_cats(1))
+    completed_mission_id = Mission.objects.filter(is_completed=True).values_list('id', flat=True).first()
+
+    deletable_cats = iter(fresh_cats(calls))
+    assignable_cats = iter(fresh_cats(calls))
+    unassigned_missions = iter(fresh_missions(calls))
+    deletable_missions = iter(fresh_missions(calls))
+    assigned_missions = iter(fresh_missions(calls, fresh_cats(calls)))
+    completable_targets = iter(target_ids[0] for _, target_ids in fresh_missions(calls, fresh_cats(calls)))
+
+    cat_fields = {'name': 'Benchmark', 'years_of_experience': 3, 'breed': 'Siamese', 'salary': 1000}
+    cat_rows = [{**cat_fields, 'name': f'Imported {i}'} for i in range(BULK_ROWS)]
+    mission_payload = {
+        'name': 'Benchmark mission',
+        'description': 'Benchmark',
+        'assigned_cat': None,
+        'targets': [{'name': f'Target {i}', 'country': 'Ukraine'} for i in range(3)],
+    }
+    mission_rows = [{**mission_payload, 'name': f'Imported {i}'} for i in range(BULK_ROWS)]
+
+    return {
+        'cats.create_spy_cat': lambda: cats.create_spy_cat(CreateSpyCatSchema(**cat_fields)),
+        'cats.bulk_create_spy_cats': lambda: cats.bulk_create_spy_cats(cat_rows),
+        'cats.list_spy_cats': lambda: list(cats.list_spy_cats()[:20]),
+        'cats.list_spy_cats (filtered)': lambda: list(
+            cats.list_spy_cats(SpyCatFilterSchema(breed='siamese', min_salary=1000), '-salary')[:20]
+        ),
+        'cats.export_spy_cats': lambda: sum(1 for _ in cats.export_spy_cats()),
+        'cats.get_spy_cat': lambda: cats.get_spy_cat(cat_id),
+        'cats.update_spy_cat': lambda: cats.update_spy_cat(cat_id, SpyCatFieldsSchema(**cat_fields)),
+        'cats.patch_spy_cat': lambda: cats.patch_spy_cat(cat_id, PatchSpyCatSchema(breed='Persian')),
+        'cats.update_spy_cat_salary': lambda: cats.update_spy_cat_salary(cat_id, 1500),
+        'cats.delete_spy_cat': lambda: cats.delete_spy_cat(next(deletable_cats)),
+        'missions.create_mission_with_targets': lambda: missions.create_mission_with_targets(
+            CreateMissionSchema(**mission_payload)
+        ),
+        'missions.bulk_create_missions': lambda: missions.bulk_create_missions(mission_rows),
+        'missions.list_missions': lambda: list(missions.list_missions()[:20]),
+        'missions.list_missions (search)': lambda: list(
+            missions.list_missions(MissionFilterSchema(country='Ukraine', search='embassy'))[:20]
+        ),
+        'missions.export_missions': lambda: sum(1 for _ in missions.export_missions(is_completed=False)),
+        'missions.get_mission': lambda: missions.get_mission(completed_mission_id),
+        'missions.patch_mission': lambda: missions.patch_mission(open_mission_id, PatchMissionSchema(name='Renamed')),
+        'missions.assign_cat_to_mission': lambda: missions.assign_cat_to_mission(
+            next(unassigned_missions)[0], next(assignable_cats)
+        ),
+        'missions.remove_cat_from_mission': lambda: missions.remove_cat_from_mission(next(assigned_missions)[0]),
+        'missions.delete_mission': lambda: missions.delete_mission(next(deletable_missions)[0]),
+        'missions.update_target_notes': lambda: missions.update_target_notes(open_target_ids[0], 'Seen at the harbor'),
+        'missions.patch_target': lambda: missions.patch_target(
+            open_mission_id, open_target_ids[1], PatchTargetSchema(country='Poland')
+        ),
+        'missions.mark_target_as_completed': lambda: missions.mark_target_as_completed(next(completable_targets)),
+    }
+
+
+def run(repeat: int, only: list[str] | None) -> dict[str, dict]:
+    from django.test import override_settings
+
+    results = {}
+    with override_settings(BREED_REGISTRY=FIXTURE_BREED_REGISTRY):
+        for name, func in cases(repeat + WARMUP).items():
+            if not only or name in only:
+                results[name] = measure(func, repeat=repeat, warmup=WARMUP)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cats', type=int, default=500)
+    parser.add_argument('--missions', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--only', nargs='+', help="Names of the cases to run, e.g. cats.get_spy_cat.")
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.management import call_command
+
+    with throwaway_database():
+        call_command('seed_agency', cats=args.cats, missions=args.missions, verbosity=0)
+        report(f'services ({args.cats} cats, {args.missions} missions)', run(args.repeat, args.only), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 from django.contrib import admin
 
-from cats.models import SpyCat
+from cats.models import Breed, SpyCat
 
 admin.site.register(SpyCat)
+admin.site.register(Breed)
@@ -1,13 +1,42 @@
-from ninja import Router
+from ninja import Query, Router
 from ninja.errors import HttpError
-from ninja.pagination import paginate, PageNumberPagination
+from ninja.pagination import paginate
 
-from .schemas import SpyCatSchema, CreateSpyCatSchema, UpdateSalarySchema
+from core.bulk import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, read_items
+from core.cache import cached_response
+from core.concurrency import PreconditionFailed, conditional_write
+from core.exports import ExportFormat, csv_response, ndjson_response
+from core.pagination import AgencyPagination
+from core.schemas import BulkImportResultSchema
+from core.serialization import serialize_rows
+from core.throttling import limit_concurrency
+from missions.schemas import SpyCatDossierSchema
+from missions.services import (
+    DEFAULT_PAST_MISSIONS,
+    MAX_PAST_MISSIONS,
+    get_cat_dossier,
+    list_cat_dossiers,
+)
+
+from .schemas import (
+    SpyCatSchema,
+    CreateSpyCatSchema,
+    PatchSpyCatSchema,
+    SpyCatFilterSchema,
+    SpyCatOrdering,
+    UpdateSalarySchema,
+)
 from .services import (
+    bulk_create_spy_cats,
+    export_spy_cats,
+    SPY_CAT_EXPORT_FIELDS,
     create_spy_cat,
-    list_spy_cats,
+    list_spy_cat_rows,
+    spy_cat_rows,
     get_spy_cat,
+    spy_cat_cache_tag,
     update_spy_cat,
+    patch_spy_cat,
     update_spy_cat_salary,
     delete_spy_cat,
 )
@@ -24,16 +53,59 @@ def create_spy_cat_view(request, payload: CreateSpyCatSchema):
         raise HttpError(400, f"Error: {str(e)}")
 
 
+@router.post("/bulk", response=BulkImportResultSchema)
+@limit_concurrency
+def bulk_create_spy_cats_view(request, chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE)):
+    """Imports spy cats from a JSON array or an NDJSON stream (`Content-Type: application/x-ndjson`)."""
+    try:
+        return bulk_create_spy_cats(read_items(request), chunk_size)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
 @router.get("/", response=list[SpyCatSchema])
-@paginate(PageNumberPagination, page_size=5)
-def list_spy_cats_view(request):
+@serialize_rows(spy_cat_rows)
+@paginate(AgencyPagination)
+def list_spy_cats_view(
+    request,
+    filters: SpyCatFilterSchema = Query(...),
+    ordering: SpyCatOrdering = Query('id', description="Applies to page numbers; keyset pages are ordered by ID."),
+):
+    try:
+        return list_spy_cat_rows(filters, ordering)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.get("/dossiers", response=list[SpyCatDossierSchema])
+@paginate(AgencyPagination)
+def list_dossiers_view(
+    request,
+    filters: SpyCatFilterSchema = Query(...),
+    ordering: SpyCatOrdering = Query('id', description="Applies to page numbers; keyset pages are ordered by ID."),
+    past_missions: int = Query(DEFAULT_PAST_MISSIONS, ge=0, le=MAX_PAST_MISSIONS),
+):
+    """Spy cats with their current mission and their `past_missions` most recent completed ones."""
+    try:
+        return list_cat_dossiers(filters, ordering, past_missions)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.get("/export")
+@limit_concurrency(pool='exports')
+def export_spy_cats_view(request, format: ExportFormat = 'ndjson'):
     try:
-        return list_spy_cats()
+        rows = export_spy_cats()
+        if format == 'csv':
+            return csv_response(rows, SPY_CAT_EXPORT_FIELDS, 'spy_cats')
+        return ndjson_response(rows, 'spy_cats')
     except Exception as e:
         raise HttpError(400, f"Error: {str(e)}")
 
 
 @router.get("/{cat_id}/", response=SpyCatSchema)
+@cached_response(SpyCatSchema, tags=lambda cat_id: [spy_cat_cache_tag(cat_id)])
 def get_spy_cat_view(request, cat_id: int):
     try:
         return get_spy_cat(cat_id)
@@ -41,10 +113,39 @@ def get_spy_cat_view(request, cat_id: int):
         raise HttpError(400, f"Error: {str(e)}")
 
 
+@router.get("/{cat_id}/dossier", response=SpyCatDossierSchema)
+def get_dossier_view(
+    request, cat_id: int, past_missions: int = Query(DEFAULT_PAST_MISSIONS, ge=0, le=MAX_PAST_MISSIONS)
+):
+    """The spy cat with its current mission and its `past_missions` most recent completed ones."""
+    try:
+        return get_cat_dossier(cat_id, past_missions)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
 @router.put("/{cat_id}/", response=SpyCatSchema)
 def update_spy_cat_view(request, cat_id: int, payload: CreateSpyCatSchema):
     try:
-        return update_spy_cat(cat_id, payload)
+        return conditional_write(
+            request, SpyCatSchema, lambda: get_spy_cat(cat_id),
+            lambda version: update_spy_cat(cat_id, payload, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{cat_id}/", response=SpyCatSchema)
+def patch_spy_cat_view(request, cat_id: int, payload: PatchSpyCatSchema):
+    try:
+        return conditional_write(
+            request, SpyCatSchema, lambda: get_spy_cat(cat_id),
+            lambda version: patch_spy_cat(cat_id, payload, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
     except Exception as e:
         raise HttpError(400, f"Error: {str(e)}")
 
@@ -52,7 +153,12 @@ def update_spy_cat_view(request, cat_id: int, payload: CreateSpyCatSchema):
 @router.patch("/{cat_id}/salary", response=SpyCatSchema)
 def update_salary_view(request, cat_id: int, data: UpdateSalarySchema):
     try:
-        return  update_spy_cat_salary(cat_id, data.salary)
+        return conditional_write(
+            request, SpyCatSchema, lambda: get_spy_cat(cat_id),
+            lambda version: update_spy_cat_salary(cat_id, data.salary, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
     except Exception as e:
         raise HttpError(400, f"Error: {str(e)}")
 
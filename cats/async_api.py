@@ -0,0 +1,188 @@
+"""Async variant of cats.api, served when API_MODE is "async"."""
+from ninja import Query
+from ninja.errors import HttpError, ValidationError
+from ninja.pagination import paginate
+
+from core.bulk import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, read_items
+from core.cache import cached_response
+from core.concurrency import PreconditionFailed, aconditional_write
+from core.exports import ExportFormat, csv_response, ndjson_response
+from core.pagination import AgencyPagination
+from core.routers import ReusableRouter
+from core.schemas import BulkImportResultSchema
+from core.serialization import serialize_rows
+from core.throttling import limit_concurrency
+from missions.schemas import SpyCatDossierSchema
+from missions.services import (
+    DEFAULT_PAST_MISSIONS,
+    MAX_PAST_MISSIONS,
+    aget_cat_dossier,
+    list_cat_dossiers,
+)
+
+from .breeds import BreedRegistryUnavailable
+from .schemas import (
+    SpyCatSchema,
+    SpyCatFieldsSchema,
+    PatchSpyCatSchema,
+    SpyCatFilterSchema,
+    SpyCatOrdering,
+    UpdateSalarySchema,
+    avalidate_breed,
+)
+from .services import (
+    SPY_CAT_EXPORT_FIELDS,
+    abulk_create_spy_cats,
+    acreate_spy_cat,
+    adelete_spy_cat,
+    aexport_spy_cats,
+    aget_spy_cat,
+    apatch_spy_cat,
+    aupdate_spy_cat,
+    aupdate_spy_cat_salary,
+    list_spy_cat_rows,
+    spy_cat_cache_tag,
+    spy_cat_rows,
+)
+
+# Reusable: core.urls and the tests of these views both mount it.
+router = ReusableRouter(tags=["Cats"])
+
+
+async def check_breed(breed: str) -> None:
+    """Reports an invalid breed the same way CreateSpyCatSchema does in the sync API."""
+    try:
+        valid = await avalidate_breed(breed)
+        message = f"{breed} is not a valid breed"
+    except BreedRegistryUnavailable as e:
+        valid, message = False, str(e)
+    if not valid:
+        raise ValidationError([
+            {'type': 'value_error', 'loc': ('body', 'payload', 'breed'), 'msg': f'Value error, {message}'}
+        ])
+
+
+@router.post("/", response=SpyCatSchema)
+async def create_spy_cat_view(request, payload: SpyCatFieldsSchema):
+    await check_breed(payload.breed)
+    try:
+        return await acreate_spy_cat(payload)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/bulk", response=BulkImportResultSchema)
+@limit_concurrency
+async def bulk_create_spy_cats_view(request, chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE)):
+    """Imports spy cats from a JSON array or an NDJSON stream (`Content-Type: application/x-ndjson`)."""
+    try:
+        return await abulk_create_spy_cats(read_items(request), chunk_size)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.get("/", response=list[SpyCatSchema])
+@serialize_rows(spy_cat_rows)
+@paginate(AgencyPagination)
+async def list_spy_cats_view(
+    request,
+    filters: SpyCatFilterSchema = Query(...),
+    ordering: SpyCatOrdering = Query('id', description="Applies to page numbers; keyset pages are ordered by ID."),
+):
+    try:
+        return list_spy_cat_rows(filters, ordering)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.get("/dossiers", response=list[SpyCatDossierSchema])
+@paginate(AgencyPagination)
+async def list_dossiers_view(
+    request,
+    filters: SpyCatFilterSchema = Query(...),
+    ordering: SpyCatOrdering = Query('id', description="Applies to page numbers; keyset pages are ordered by ID."),
+    past_missions: int = Query(DEFAULT_PAST_MISSIONS, ge=0, le=MAX_PAST_MISSIONS),
+):
+    """Spy cats with their current mission and their `past_missions` most recent completed ones."""
+    try:
+        return list_cat_dossiers(filters, ordering, past_missions)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.get("/export")
+@limit_concurrency(pool='exports')
+async def export_spy_cats_view(request, format: ExportFormat = 'ndjson'):
+    rows = aexport_spy_cats()
+    if format == 'csv':
+        return csv_response(rows, SPY_CAT_EXPORT_FIELDS, 'spy_cats')
+    return ndjson_response(rows, 'spy_cats')
+
+
+@router.get("/{cat_id}/", response=SpyCatSchema)
+@cached_response(SpyCatSchema, tags=lambda cat_id: [spy_cat_cache_tag(cat_id)])
+async def get_spy_cat_view(request, cat_id: int):
+    try:
+        return await aget_spy_cat(cat_id)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.get("/{cat_id}/dossier", response=SpyCatDossierSchema)
+async def get_dossier_view(
+    request, cat_id: int, past_missions: int = Query(DEFAULT_PAST_MISSIONS, ge=0, le=MAX_PAST_MISSIONS)
+):
+    """The spy cat with its current mission and its `past_missions` most recent completed ones."""
+    try:
+        return await aget_cat_dossier(cat_id, past_missions)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.put("/{cat_id}/", response=SpyCatSchema)
+async def update_spy_cat_view(request, cat_id: int, payload: SpyCatFieldsSchema):
+    await check_breed(payload.breed)
+    try:
+        return await aconditional_write(
+            request, SpyCatSchema, lambda: aget_spy_cat(cat_id),
+            lambda version: aupdate_spy_cat(cat_id, payload, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{cat_id}/", response=SpyCatSchema)
+async def patch_spy_cat_view(request, cat_id: int, payload: PatchSpyCatSchema):
+    try:
+        return await aconditional_write(
+            request, SpyCatSchema, lambda: aget_spy_cat(cat_id),
+            lambda version: apatch_spy_cat(cat_id, payload, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{cat_id}/salary", response=SpyCatSchema)
+async def update_salary_view(request, cat_id: int, data: UpdateSalarySchema):
+    try:
+        return await aconditional_write(
+            request, SpyCatSchema, lambda: aget_spy_cat(cat_id),
+            lambda version: aupdate_spy_cat_salary(cat_id, data.salary, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.delete("/{cat_id}/", response=dict)
+async def delete_spy_cat_view(request, cat_id: int):
+    try:
+        await adelete_spy_cat(cat_id)
+        return {"success": True}
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
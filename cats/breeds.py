@@ -0,0 +1,291 @@
+"""Breed registry used to validate spy cat breeds.
+
+Breeds are resolved through several tiers, cheapest first:
+
+1. an in-process set, refreshed every ``TTL`` seconds;
+2. the shared Django cache, so all workers reuse a single upstream fetch;
+3. the persisted ``Breed`` snapshot, used on cold start and while the source is down;
+4. the configured source (TheCatAPI by default).
+
+Only one worker refreshes from the source at a time; the others keep serving
+the previous snapshot until the new one is published. With
+``REFRESH_IN_BACKGROUND`` an expired snapshot is served while a background job
+refreshes it, so requests never wait on the source once a snapshot exists.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import weakref
+from datetime import timedelta
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from core.metrics import track_upstream
+from jobs.services import enqueue
+from .models import Breed
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY = "cats:breeds"
+LOCK_KEY = "cats:breeds:refresh-lock"
+
+
+class BreedRegistryUnavailable(ValueError):
+    """Raised when neither the source nor any snapshot can provide breeds."""
+
+
+def normalize_breed(breed: str) -> str:
+    return breed.strip().title()
+
+
+class TheCatAPISource:
+    """Fetches breed names from TheCatAPI."""
+
+    url = 'https://api.thecatapi.com/v1/breeds'
+
+    def __init__(self, timeout: float = 5.0):
+        self.timeout = timeout
+
+    def fetch(self) -> list[str]:
+        # The HTTP clients are imported on first use, they are among the slowest imports of a worker.
+        import requests
+
+        response = requests.get(self.url, timeout=self.timeout)
+        response.raise_for_status()
+        return [b['name'] for b in response.json()]
+
+    async def afetch(self) -> list[str]:
+        import httpx
+
+        async with httpx.AsyncClient(timeout=self.timeout) as client:
+            response = await client.get(self.url)
+        response.raise_for_status()
+        return [b['name'] for b in response.json()]
+
+
+class FixtureBreedSource:
+    """Reads breed names from a local JSON file in TheCatAPI format."""
+
+    default_path = Path(__file__).resolve().parent / 'data' / 'breeds.json'
+
+    def __init__(self, path: str | None = None):
+        self.path = Path(path) if path else self.default_path
+
+    def fetch(self) -> list[str]:
+        with open(self.path) as f:
+            return [b['name'] for b in json.load(f)]
+
+
+class BreedRegistry:
+    def __init__(
+        self,
+        source,
+        *,
+        ttl: int = 3600,
+        cache_alias: str = 'default',
+        lock_timeout: int = 30,
+        refresh_in_background: bool = False,
+    ):
+        self.source = source
+        self.ttl = ttl
+        self.cache = caches[cache_alias]
+        self.lock_timeout = lock_timeout
+        self.refresh_in_background = refresh_in_background
+        self._lock = threading.Lock()
+        self._async_locks = weakref.WeakKeyDictionary()
+        self._breeds: frozenset[str] | None = None
+        self._expires_at = 0.0
+
+    @classmethod
+    def from_settings(cls) -> "BreedRegistry":
+        config = settings.BREED_REGISTRY
+        source = import_string(config['SOURCE'])(**config.get('OPTIONS', {}))
+        return cls(
+            source,
+            ttl=config.get('TTL', 3600),
+            cache_alias=config.get('CACHE', 'default'),
+            lock_timeout=config.get('LOCK_TIMEOUT', 30),
+            refresh_in_background=config.get('REFRESH_IN_BACKGROUND', False),
+        )
+
+    def __contains__(self, breed: str) -> bool:
+        return normalize_breed(breed) in self.breeds()
+
+    def breeds(self) -> frozenset[str]:
+        """Returns the set of known breeds, refreshing it if it has expired."""
+        breeds = self._fresh()
+        if breeds is not None:
+            return breeds
+
+        with self._lock:
+            breeds = self._fresh() or self._load_stored()
+            if breeds is None:
+                breeds = (self.refresh_in_background and self._refresh_later()) or self.refresh()
+        return breeds
+
+    async def abreeds(self) -> frozenset[str]:
+        """Async variant of breeds(); the source is queried without blocking the event loop."""
+        breeds = self._fresh()
+        if breeds is not None:
+            return breeds
+
+        async with self._async_lock():
+            breeds = self._fresh() or await sync_to_async(self._load_stored)()
+            if breeds is None and self.refresh_in_background:
+                breeds = await sync_to_async(self._refresh_later)()
+            if not breeds:
+                breeds = await self.arefresh()
+        return breeds
+
+    async def acontains(self, breed: str) -> bool:
+        return normalize_breed(breed) in await self.abreeds()
+
+    def refresh(self, *, fall_back: bool = True) -> frozenset[str]:
+        """Fetches breeds from the source and publishes them to every tier.
+
+        If the source fails the snapshot is served instead, unless ``fall_back`` is False.
+        """
+        locked = self.cache.add(LOCK_KEY, True, self.lock_timeout)
+        if not locked:
+            # Another worker is already fetching; keep serving the snapshot meanwhile.
+            stale = self._serve_stale()
+            if stale:
+                return stale
+
+        try:
+            with track_upstream('breeds'):
+                names = self.source.fetch()
+        except Exception as e:
+            if not fall_back:
+                raise
+            return self._fetch_failed(e)
+        finally:
+            if locked:
+                self.cache.delete(LOCK_KEY)
+        return self._publish(names)
+
+    async def arefresh(self) -> frozenset[str]:
+        locked = await self.cache.aadd(LOCK_KEY, True, self.lock_timeout)
+        if not locked:
+            stale = await sync_to_async(self._serve_stale)()
+            if stale:
+                return stale
+
+        try:
+            with track_upstream('breeds'):
+                if hasattr(self.source, 'afetch'):
+                    names = await self.source.afetch()
+                else:
+                    names = await sync_to_async(self.source.fetch, thread_sensitive=False)()
+        except Exception as e:
+            return await sync_to_async(self._fetch_failed)(e)
+        finally:
+            if locked:
+                await self.cache.adelete(LOCK_KEY)
+        return await sync_to_async(self._publish)(names)
+
+    def clear(self) -> None:
+        """Drops the in-process and shared cache tiers, keeping the snapshot."""
+        self._breeds = None
+        self._expires_at = 0.0
+        self.cache.delete(CACHE_KEY)
+
+    def _fresh(self) -> frozenset[str] | None:
+        if self._breeds is not None and time.monotonic() < self._expires_at:
+            return self._breeds
+        return None
+
+    def _remember(self, breeds: frozenset[str], ttl: float) -> None:
+        self._breeds = breeds
+        self._expires_at = time.monotonic() + ttl
+
+    def _async_lock(self) -> asyncio.Lock:
+        # asyncio locks are bound to one event loop.
+        return self._async_locks.setdefault(asyncio.get_running_loop(), asyncio.Lock())
+
+    def _load_stored(self) -> frozenset[str] | None:
+        """Loads breeds from the shared cache or a fresh snapshot, without querying the source."""
+        cached = self.cache.get(CACHE_KEY)
+        if cached is not None:
+            breeds = frozenset(cached)
+            self._remember(breeds, self.ttl)
+            return breeds
+
+        snapshot = self._snapshot(max_age=self.ttl)
+        if snapshot:
+            self.cache.set(CACHE_KEY, sorted(snapshot), self.ttl)
+            self._remember(snapshot, self.ttl)
+            return snapshot
+        return None
+
+    def _serve_stale(self) -> frozenset[str]:
+        stale = self._snapshot()
+        if stale:
+            self._remember(stale, min(self.ttl, self.lock_timeout))
+        return stale
+
+    def _refresh_later(self) -> frozenset[str]:
+        """Serves the expired snapshot and enqueues a refresh; empty if there is no snapshot."""
+        stale = self._serve_stale()
+        if stale:
+            # Every process notices the expiry, but one refresh per TTL window is enough.
+            window = int(time.time() // max(self.ttl, 1))
+            enqueue('cats.refresh_breeds', idempotency_key=f"cats.refresh_breeds:{window}")
+        return stale
+
+    def _fetch_failed(self, error: Exception) -> frozenset[str]:
+        logger.warning("Failed to fetch breeds from %s: %s", type(self.source).__name__, error)
+        stale = self._serve_stale()
+        if not stale:
+            raise BreedRegistryUnavailable("Breed registry is unavailable") from error
+        return stale
+
+    def _publish(self, names: list[str]) -> frozenset[str]:
+        breeds = frozenset(normalize_breed(name) for name in names)
+        self._save_snapshot(breeds)
+        self.cache.set(CACHE_KEY, sorted(breeds), self.ttl)
+        self._remember(breeds, self.ttl)
+        return breeds
+
+    def _snapshot(self, max_age: int | None = None) -> frozenset[str]:
+        """Reads the persisted snapshot, ignoring it if older than ``max_age`` seconds."""
+        rows = list(Breed.objects.values_list('name', 'refreshed_at'))
+        if max_age is not None:
+            cutoff = timezone.now() - timedelta(seconds=max_age)
+            if any(refreshed_at < cutoff for _, refreshed_at in rows):
+                return frozenset()
+        return frozenset(name for name, _ in rows)
+
+    def _save_snapshot(self, breeds: frozenset[str]) -> None:
+        refreshed_at = timezone.now()
+        with transaction.atomic():
+            Breed.objects.all().delete()
+            Breed.objects.bulk_create(Breed(name=name, refreshed_at=refreshed_at) for name in breeds)
+
+
+_registry: BreedRegistry | None = None
+
+
+def get_breed_registry() -> BreedRegistry:
+    global _registry
+    if _registry is None:
+        _registry = BreedRegistry.from_settings()
+    return _registry
+
+
+@receiver(setting_changed)
+def reset_breed_registry(*, setting, **kwargs):
+    global _registry
+    if setting in ('BREED_REGISTRY', 'CACHES') and _registry is not None:
+        _registry.clear()
+        _registry = None
@@ -0,0 +1,8 @@
+from jobs.services import job
+from .breeds import get_breed_registry
+
+
+@job('cats.refresh_breeds')
+def refresh_breeds():
+    """Refreshes the breed registry, see BREED_REGISTRY['REFRESH_IN_BACKGROUND']; retried if the source fails."""
+    get_breed_registry().refresh(fall_back=False)
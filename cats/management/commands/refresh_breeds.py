@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from cats.breeds import get_breed_registry
+
+
+class Command(BaseCommand):
+    help = "Fetches breeds from the configured source and stores the snapshot used for validation."
+
+    def handle(self, *args, **options):
+        breeds = get_breed_registry().refresh()
+        self.stdout.write(self.style.SUCCESS(f"Breed registry holds {len(breeds)} breeds."))
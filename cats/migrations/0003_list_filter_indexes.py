@@ -0,0 +1,31 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:18
+
+import django.contrib.postgres.indexes
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0002_breed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='spycat',
+            index=models.Index(django.db.models.functions.text.Upper('breed'), name='spycat_breed_upper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='spycat',
+            index=models.Index(django.contrib.postgres.indexes.OpClass(django.db.models.functions.text.Upper('name'), name='text_pattern_ops'), name='spycat_name_prefix_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='spycat',
+            index=models.Index(fields=['years_of_experience'], name='spycat_experience_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='spycat',
+            index=models.Index(fields=['salary'], name='spycat_salary_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0003_list_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='spycat',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
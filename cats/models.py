@@ -1,10 +1,32 @@
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 class SpyCat(models.Model):
     name = models.CharField(max_length=100)
     years_of_experience = models.IntegerField()
     breed = models.CharField(max_length=100)
     salary = models.DecimalField(max_digits=10, decimal_places=2)
+    # Incremented by every write, see core.concurrency.
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Case-insensitive filters of the list endpoint: breed match and name prefix.
+            models.Index(Upper('breed'), name='spycat_breed_upper_idx'),
+            models.Index(OpClass(Upper('name'), name='text_pattern_ops'), name='spycat_name_prefix_idx'),
+            models.Index(fields=['years_of_experience'], name='spycat_experience_idx'),
+            models.Index(fields=['salary'], name='spycat_salary_idx'),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class Breed(models.Model):
+    """Persisted snapshot of the breed registry, used on cold start and offline."""
+    name = models.CharField(max_length=100, unique=True)
+    refreshed_at = models.DateTimeField()
 
     def __str__(self):
         return self.name
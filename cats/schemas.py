@@ -1,12 +1,18 @@
-import requests
-from ninja import Schema
+from typing import Literal
+
+from ninja import Field, FilterSchema, Schema
 from pydantic import field_validator
+from typing_extensions import TypedDict
+
+from .breeds import get_breed_registry
 
 
 def validate_breed(breed: str) -> bool:
-    response = requests.get('https://api.thecatapi.com/v1/breeds')
-    breeds = [b['name'].title() for b in response.json()]
-    return breed.title() in breeds
+    return breed in get_breed_registry()
+
+
+async def avalidate_breed(breed: str) -> bool:
+    return await get_breed_registry().acontains(breed)
 
 
 class SpyCatSchema(Schema):
@@ -17,6 +23,29 @@ class SpyCatSchema(Schema):
     salary: float
 
 
+class SpyCatRow(TypedDict):
+    """SpyCatSchema for ``.values()`` rows, see core.serialization."""
+    id: int
+    name: str
+    years_of_experience: int
+    breed: str
+    salary: float
+
+
+class SpyCatFilterSchema(FilterSchema):
+    breed: str | None = Field(None, q='breed__iexact')
+    name: str | None = Field(None, q='name__istartswith', description="Name prefix.")
+    min_experience: int | None = Field(None, q='years_of_experience__gte')
+    max_experience: int | None = Field(None, q='years_of_experience__lte')
+    min_salary: float | None = Field(None, q='salary__gte')
+    max_salary: float | None = Field(None, q='salary__lte')
+
+
+SpyCatOrdering = Literal[
+    'id', '-id', 'name', '-name', 'years_of_experience', '-years_of_experience', 'salary', '-salary',
+]
+
+
 class UpdateSalarySchema(Schema):
     salary: float
 
@@ -26,7 +55,8 @@ class UpdateSalarySchema(Schema):
             raise ValueError('Salary must be a positive number')
         return value
 
-class CreateSpyCatSchema(Schema):
+class SpyCatFieldsSchema(Schema):
+    """Spy cat payload without the breed check, for callers that validate breeds themselves."""
     name: str
     years_of_experience: int
     breed: str
@@ -44,12 +74,40 @@ class CreateSpyCatSchema(Schema):
             raise ValueError('Years of experience must be a positive number')
         return value
 
+    @field_validator('salary')
+    def salary_must_be_positive(cls, value):
+        if value < 0:
+            raise ValueError('Salary must be a positive number')
+        return value
+
+
+class CreateSpyCatSchema(SpyCatFieldsSchema):
     @field_validator('breed')
     def breed_must_be_valid(cls, value):
         if not validate_breed(value):
             raise ValueError(f"{value} is not a valid breed")
         return value
 
+
+class PatchSpyCatSchema(Schema):
+    """Partial update; the breed is validated by the service, and only when it changes."""
+    name: str = None
+    years_of_experience: int = None
+    breed: str = None
+    salary: float = None
+
+    @field_validator('name')
+    def name_must_not_be_empty(cls, value):
+        if not value.strip():
+            raise ValueError('Name must not be empty')
+        return value
+
+    @field_validator('years_of_experience')
+    def years_of_experience_must_be_positive(cls, value):
+        if value < 0:
+            raise ValueError('Years of experience must be a positive number')
+        return value
+
     @field_validator('salary')
     def salary_must_be_positive(cls, value):
         if value < 0:
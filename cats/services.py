@@ -1,22 +1,81 @@
-from django.shortcuts import get_object_or_404
+from typing import Any, AsyncIterator, Iterable, Iterator
 
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, get_object_or_404
+
+from core.bulk import DEFAULT_CHUNK_SIZE, import_in_chunks
+from core.cache import invalidate
+from core.concurrency import PreconditionFailed, at_version, check_version, next_version
+from core.db import update_returning
+from core.exports import EXPORT_CHUNK_SIZE
+from core.serialization import RowSerializer
+from stats.services import CAT_ROSTER_SECTIONS, CAT_SECTIONS, mark_stale
+from .breeds import get_breed_registry
 from .models import SpyCat
-from .schemas import CreateSpyCatSchema
+from .schemas import (
+    CreateSpyCatSchema,
+    PatchSpyCatSchema,
+    SpyCatFieldsSchema,
+    SpyCatFilterSchema,
+    SpyCatRow,
+    validate_breed,
+)
+
+
+def spy_cat_cache_tag(cat_id: int) -> str:
+    """Cache tag of responses that include the spy cat, see core.cache."""
+    return f"cat:{cat_id}"
 
 
 def create_spy_cat(payload: CreateSpyCatSchema) -> SpyCat:
     try:
         spy_cat = SpyCat.objects.create(**payload.dict())
+        mark_stale(*CAT_ROSTER_SECTIONS)
         return spy_cat
     except Exception as e:
         raise Exception(f"Failed to create spy cat: {str(e)}")
 
 
-def list_spy_cats() -> list:
+def bulk_create_spy_cats(items: Iterable[Any], chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
     try:
-        return list(SpyCat.objects.all())
+        # Load the breed list once; every item is then checked against it in memory.
+        get_breed_registry().breeds()
+
+        def insert_chunk(payloads: list[CreateSpyCatSchema]) -> list[int]:
+            spy_cats = SpyCat.objects.bulk_create(SpyCat(**payload.dict()) for payload in payloads)
+            return [spy_cat.id for spy_cat in spy_cats]
+
+        result = import_in_chunks(items, CreateSpyCatSchema.model_validate, insert_chunk, chunk_size)
+        mark_stale(*CAT_ROSTER_SECTIONS)
+        return result
     except Exception as e:
-        raise Exception(f"Failed to list spy cats: {str(e)}")
+        raise Exception(f"Failed to import spy cats: {str(e)}")
+
+
+def list_spy_cats(filters: SpyCatFilterSchema | None = None, ordering: str = 'id') -> QuerySet:
+    """Spy cats matching ``filters``, lazily: the paginator runs the queries, for the requested page only."""
+    spy_cats = filters.filter(SpyCat.objects.all()) if filters else SpyCat.objects.all()
+    # The ID breaks ties so that pages do not overlap.
+    return spy_cats.order_by(ordering, 'id') if ordering.lstrip('-') != 'id' else spy_cats.order_by(ordering)
+
+
+SPY_CAT_EXPORT_FIELDS = ['id', 'name', 'years_of_experience', 'breed', 'salary']
+spy_cat_rows = RowSerializer(SpyCatRow)
+
+
+def list_spy_cat_rows(filters: SpyCatFilterSchema | None = None, ordering: str = 'id') -> QuerySet:
+    """list_spy_cats() as ``.values()`` rows for spy_cat_rows."""
+    return list_spy_cats(filters, ordering).values(*SPY_CAT_EXPORT_FIELDS)
+
+
+def export_spy_cats() -> Iterator[dict]:
+    """Streams every spy cat through a server-side cursor."""
+    rows = SpyCat.objects.order_by('id').values(*SPY_CAT_EXPORT_FIELDS)
+    for row in rows.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row['salary'] = float(row['salary'])
+        yield row
 
 
 def get_spy_cat(cat_id: int) -> SpyCat:
@@ -24,23 +83,60 @@ def get_spy_cat(cat_id: int) -> SpyCat:
     return get_object_or_404(SpyCat, id=cat_id)
 
 
-def update_spy_cat(cat_id: int, payload: CreateSpyCatSchema) -> SpyCat:
+def update_spy_cat_fields(cat_id: int, expected_version: int | None = None, **changes) -> SpyCat:
+    """Writes only the given fields in one UPDATE and returns the fresh row.
+
+    With ``expected_version`` the row is only written at that version, see core.concurrency.
+    """
+    queryset = at_version(SpyCat.objects.filter(id=cat_id), expected_version)
+    spy_cats = update_returning(queryset, version=next_version(), **changes)
+    if not spy_cats:
+        check_version(get_spy_cat(cat_id), expected_version)
+        raise Http404("No SpyCat matches the given query.")
+    invalidate(spy_cat_cache_tag(cat_id))
+    mark_stale(*CAT_SECTIONS)
+    return spy_cats[0]
+
+
+def update_spy_cat(cat_id: int, payload: SpyCatFieldsSchema, expected_version: int | None = None) -> SpyCat:
     try:
-        spy_cat = get_spy_cat(cat_id)
-        for attr, value in payload.dict().items():
-            setattr(spy_cat, attr, value)
-        spy_cat.save()
-        return spy_cat
+        return update_spy_cat_fields(cat_id, expected_version, **payload.dict())
+    except PreconditionFailed:
+        raise
     except Exception as e:
         raise Exception(f"Failed to update spy cat: {str(e)}")
 
 
-def update_spy_cat_salary(cat_id: int, new_salary: float) -> SpyCat:
+def patch_spy_cat(cat_id: int, payload: PatchSpyCatSchema, expected_version: int | None = None) -> SpyCat:
     try:
-        spy_cat = get_spy_cat(cat_id)
-        spy_cat.salary = new_salary
-        spy_cat.save()
-        return spy_cat
+        changes = payload.dict(exclude_unset=True)
+        if not changes:
+            return get_spy_cat(cat_id)
+
+        queryset = at_version(SpyCat.objects.filter(id=cat_id), expected_version)
+        breed = changes.get('breed')
+        if breed is not None and not validate_breed(breed):
+            # A breed the registry does not know is still accepted if it is unchanged.
+            queryset = queryset.filter(breed=breed)
+
+        spy_cats = update_returning(queryset, version=next_version(), **changes)
+        if not spy_cats:
+            check_version(get_spy_cat(cat_id), expected_version)
+            raise ValueError(f"{breed} is not a valid breed")
+        invalidate(spy_cat_cache_tag(cat_id))
+        mark_stale(*CAT_SECTIONS)
+        return spy_cats[0]
+    except PreconditionFailed:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to update spy cat: {str(e)}")
+
+
+def update_spy_cat_salary(cat_id: int, new_salary: float, expected_version: int | None = None) -> SpyCat:
+    try:
+        return update_spy_cat_fields(cat_id, expected_version, salary=new_salary)
+    except PreconditionFailed:
+        raise
     except Exception as e:
         raise Exception(f"Failed to update salary for cat with ID {cat_id}: {str(e)}")
 
@@ -49,5 +145,61 @@ def delete_spy_cat(cat_id: int) -> None:
     try:
         spy_cat = get_spy_cat(cat_id)
         spy_cat.delete()
+        invalidate(spy_cat_cache_tag(cat_id))
+        mark_stale(*CAT_ROSTER_SECTIONS)
+    except Exception as e:
+        raise Exception(f"Failed to delete spy cat: {str(e)}")
+
+
+# Async variants, used by cats.async_api. Payloads are SpyCatFieldsSchema: the
+# views check breeds with the async registry before calling these.
+
+async def acreate_spy_cat(payload: SpyCatFieldsSchema) -> SpyCat:
+    try:
+        spy_cat = await SpyCat.objects.acreate(**payload.dict())
+        await sync_to_async(mark_stale)(*CAT_ROSTER_SECTIONS)
+        return spy_cat
+    except Exception as e:
+        raise Exception(f"Failed to create spy cat: {str(e)}")
+
+
+async def abulk_create_spy_cats(items: Iterable[Any], chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    await get_breed_registry().abreeds()
+    return await sync_to_async(bulk_create_spy_cats)(items, chunk_size)
+
+
+async def aexport_spy_cats() -> AsyncIterator[dict]:
+    rows = SpyCat.objects.order_by('id').values(*SPY_CAT_EXPORT_FIELDS)
+    async for row in rows.aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+        row['salary'] = float(row['salary'])
+        yield row
+
+
+async def aget_spy_cat(cat_id: int) -> SpyCat:
+    """Get spy cat by ID or raise 404."""
+    return await aget_object_or_404(SpyCat, id=cat_id)
+
+
+async def aupdate_spy_cat(cat_id: int, payload: SpyCatFieldsSchema, expected_version: int | None = None) -> SpyCat:
+    return await sync_to_async(update_spy_cat)(cat_id, payload, expected_version)
+
+
+async def apatch_spy_cat(cat_id: int, payload: PatchSpyCatSchema, expected_version: int | None = None) -> SpyCat:
+    if payload.breed is not None:
+        # Load breeds without blocking the event loop; the service then checks them in memory.
+        await get_breed_registry().abreeds()
+    return await sync_to_async(patch_spy_cat)(cat_id, payload, expected_version)
+
+
+async def aupdate_spy_cat_salary(cat_id: int, new_salary: float, expected_version: int | None = None) -> SpyCat:
+    return await sync_to_async(update_spy_cat_salary)(cat_id, new_salary, expected_version)
+
+
+async def adelete_spy_cat(cat_id: int) -> None:
+    try:
+        spy_cat = await aget_spy_cat(cat_id)
+        await spy_cat.adelete()
+        await sync_to_async(invalidate)(spy_cat_cache_tag(cat_id))
+        await sync_to_async(mark_stale)(*CAT_ROSTER_SECTIONS)
     except Exception as e:
-        raise Exception(f"Failed to delete spy cat: {str(e)}")
\ No newline at end of file
+        raise Exception(f"Failed to delete spy cat: {str(e)}")
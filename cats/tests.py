@@ -1,13 +1,45 @@
 import json
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+from django.urls import path
+from ninja import NinjaAPI
 
-from .models import SpyCat
+from core.concurrency import PreconditionFailed
+from core.metrics import registry
+from jobs.models import Job
+from missions.models import Mission, Target
+from missions.services import mark_target_as_completed
+from .async_api import router as async_router
+from .breeds import LOCK_KEY, BreedRegistry, BreedRegistryUnavailable, FixtureBreedSource
+from .jobs import refresh_breeds
+from .models import Breed, SpyCat
+from .schemas import SpyCatSchema
+from .services import update_spy_cat_salary
 
+FIXTURE_BREED_REGISTRY = {'SOURCE': 'cats.breeds.FixtureBreedSource', 'TTL': 60}
 
+# Serves cats.async_api whatever API_MODE is, for AsyncSpyCatAPITest, from a router of its own.
+async_api = NinjaAPI(urls_namespace='cats-async-test')
+async_api.add_router("/spy_cats/", async_router.build())
+urlpatterns = [path("api/", async_api.urls)]
 
 
+class CountingSource(FixtureBreedSource):
+    def __init__(self, fail=False):
+        super().__init__()
+        self.fail = fail
+        self.calls = 0
+
+    def fetch(self):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("upstream is down")
+        return super().fetch()
+
+
+@override_settings(BREED_REGISTRY=FIXTURE_BREED_REGISTRY)
 class SpyCatAPITest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -34,11 +66,153 @@ class SpyCatAPITest(TestCase):
         self.assertIn('Whiskers', [cat['name'] for cat in spy_cats])
         self.assertEqual(len(spy_cats), 2)
 
+    def test_list_spy_cats_match_spy_cat_schema(self):
+        response = self.client.get("/api/spy_cats/")
+        expected = [SpyCatSchema.from_orm(cat).model_dump() for cat in SpyCat.objects.order_by('id')]
+        self.assertEqual(response.json(), {'items': expected, 'count': 2, 'next': None})
+
+    def test_list_spy_cats_page_size(self):
+        response = self.client.get("/api/spy_cats/", {'page': 2, 'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([cat['name'] for cat in response.json()['items']], ['Felix'])
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_list_spy_cats_keyset(self):
+        response = self.client.get("/api/spy_cats/", {'limit': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([cat['name'] for cat in response.json()['items']], ['Whiskers'])
+        self.assertIsNone(response.json()['count'])
+        self.assertEqual(response.json()['next'], self.spy_cat1.id)
+
+        response = self.client.get("/api/spy_cats/", {'after': response.json()['next'], 'limit': 1})
+        self.assertEqual([cat['name'] for cat in response.json()['items']], ['Felix'])
+        self.assertIsNone(response.json()['next'])
+
+    def test_list_spy_cats_filters(self):
+        SpyCat.objects.create(name='Felicia', years_of_experience=9, breed='Siamese', salary=3000)
+        response = self.client.get("/api/spy_cats/", {'breed': 'siamese', 'min_experience': 4})
+        self.assertEqual([cat['name'] for cat in response.json()['items']], ['Whiskers', 'Felicia'])
+
+        response = self.client.get("/api/spy_cats/", {'name': 'fel', 'max_salary': 1000})
+        self.assertEqual([cat['name'] for cat in response.json()['items']], ['Felix'])
+        self.assertEqual(response.json()['count'], 1)
+
+    def test_list_spy_cats_ordering(self):
+        response = self.client.get("/api/spy_cats/", {'ordering': '-salary'})
+        self.assertEqual([cat['name'] for cat in response.json()['items']], ['Whiskers', 'Felix'])
+
+        response = self.client.get("/api/spy_cats/", {'ordering': 'password'})
+        self.assertEqual(response.status_code, 422)
+
+    def test_list_spy_cats_approximate_count(self):
+        response = self.client.get("/api/spy_cats/", {'limit': 5, 'count': 'approximate'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsInstance(response.json()['count'], int)
+
+    def test_bulk_create_spy_cats(self):
+        payload = [
+            {'name': 'Tom', 'years_of_experience': 3, 'breed': 'Persian', 'salary': 1200},
+            {'name': 'Jerry', 'years_of_experience': 1, 'breed': 'UnknownBreed', 'salary': 900},
+            {'name': 'Garfield', 'years_of_experience': 7, 'breed': 'exotic shorthair', 'salary': 2000},
+        ]
+        response = self.post_request("/api/spy_cats/bulk?chunk_size=1", payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(response.json()['failed'], 1)
+        results = response.json()['results']
+        self.assertEqual([result['index'] for result in results], [0, 1, 2])
+        self.assertEqual(results[1]['errors'], ['breed: Value error, UnknownBreed is not a valid breed'])
+        self.assertEqual(SpyCat.objects.get(id=results[2]['id']).name, 'Garfield')
+
+    def test_bulk_create_spy_cats_ndjson(self):
+        body = '\n'.join([
+            json.dumps({'name': 'Tom', 'years_of_experience': 3, 'breed': 'Persian', 'salary': 1200}),
+            '{not json',
+            json.dumps({'name': 'Jerry', 'years_of_experience': 1, 'breed': 'Siamese', 'salary': 900}),
+        ])
+        response = self.client.post("/api/spy_cats/bulk", data=body, content_type='application/x-ndjson')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertTrue(response.json()['results'][1]['errors'][0].startswith('Invalid JSON'))
+        self.assertEqual(SpyCat.objects.count(), 4)
+
+    def test_bulk_create_spy_cats_rejects_non_array(self):
+        response = self.post_request("/api/spy_cats/bulk", {'name': 'Tom'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_export_spy_cats_ndjson(self):
+        response = self.client.get("/api/spy_cats/export")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        rows = [json.loads(line) for line in b''.join(response).splitlines()]
+        self.assertEqual([row['name'] for row in rows], ['Whiskers', 'Felix'])
+        self.assertEqual(rows[0]['salary'], 1000)
+
+    def test_export_spy_cats_csv(self):
+        response = self.client.get("/api/spy_cats/export", {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response).decode().splitlines()
+        self.assertEqual(lines[0], 'id,name,years_of_experience,breed,salary')
+        self.assertEqual(lines[2], f'{self.spy_cat2.id},Felix,2,Maine Coon,800.0')
+
     def test_get_spy_cat(self):
         response = self.client.get(f"/api/spy_cats/{self.spy_cat1.id}/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['name'], 'Whiskers')
 
+    def test_get_spy_cat_is_cached(self):
+        cache.clear()
+        url = f"/api/spy_cats/{self.spy_cat1.id}/"
+        first = self.client.get(url)
+        with self.assertNumQueries(0):
+            second = self.client.get(url)
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second['ETag'], first['ETag'])
+
+        response = self.client.get(url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get("/api/cache/stats").json()['hits'], 2)
+
+    def test_update_spy_cat_salary_invalidates_cached_cat(self):
+        url = f"/api/spy_cats/{self.spy_cat1.id}/"
+        etag = self.client.get(url)['ETag']
+        self.patch_request(f"{url}salary", {'salary': 1500})
+        response = self.client.get(url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['salary'], 1500)
+
+    def test_write_with_current_etag(self):
+        url = f"/api/spy_cats/{self.spy_cat1.id}/"
+        etag = self.client.get(url)['ETag']
+        response = self.client.patch(
+            f"{url}salary", data=json.dumps({'salary': 1500}), content_type='application/json',
+            headers={'If-Match': etag},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['salary'], 1500)
+        # The new ETag is the one GET returns, so the next write can use it directly.
+        self.assertEqual(response['ETag'], self.client.get(url)['ETag'])
+        self.spy_cat1.refresh_from_db()
+        self.assertEqual(self.spy_cat1.version, 2)
+
+    def test_write_with_stale_etag_fails(self):
+        url = f"/api/spy_cats/{self.spy_cat1.id}/"
+        etag = self.client.get(url)['ETag']
+        self.patch_request(f"{url}salary", {'salary': 1500})
+        payload = {'name': 'Whiskers', 'years_of_experience': 6, 'breed': 'Siamese', 'salary': 1000}
+        response = self.client.put(
+            url, data=json.dumps(payload), content_type='application/json', headers={'If-Match': etag}
+        )
+        self.assertEqual(response.status_code, 412)
+        self.spy_cat1.refresh_from_db()
+        self.assertEqual((self.spy_cat1.salary, self.spy_cat1.years_of_experience), (1500, 5))
+
+    def test_version_changed_after_if_match_check_fails(self):
+        with self.assertRaises(PreconditionFailed):
+            update_spy_cat_salary(self.spy_cat1.id, 1500, expected_version=self.spy_cat1.version + 1)
+        self.spy_cat1.refresh_from_db()
+        self.assertEqual(self.spy_cat1.salary, 1000)
+
     def test_create_spy_cat(self):
         payload = {'name': 'Tom', 'years_of_experience': 3, 'breed': 'Persian', 'salary': 1200}
         response = self.post_request("/api/spy_cats/", payload)
@@ -89,9 +263,263 @@ class SpyCatAPITest(TestCase):
         self.assertEqual(response.status_code, 422)
         self.assertEqual(response.json()['detail'][0]['msg'], 'Value error, Salary must be a positive number')
 
+    def test_patch_spy_cat_writes_only_given_fields(self):
+        with self.assertNumQueries(1):
+            response = self.patch_request(f"/api/spy_cats/{self.spy_cat1.id}/", {'name': 'Agent Whiskers'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['name'], 'Agent Whiskers')
+        self.assertEqual(response.json()['salary'], 1000)
+
+    def test_patch_spy_cat_breed(self):
+        response = self.patch_request(f"/api/spy_cats/{self.spy_cat1.id}/", {'breed': 'Persian'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['breed'], 'Persian')
+
+        response = self.patch_request(f"/api/spy_cats/{self.spy_cat1.id}/", {'breed': 'UnknownBreed'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('UnknownBreed is not a valid breed', response.json()['detail'])
+
+    def test_patch_spy_cat_keeps_unchanged_legacy_breed(self):
+        legacy = SpyCat.objects.create(name='Old', years_of_experience=9, breed='Retired Breed', salary=10)
+        response = self.patch_request(f"/api/spy_cats/{legacy.id}/", {'breed': 'Retired Breed', 'salary': 20})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['salary'], 20)
+
+    def test_patch_spy_cat_not_found(self):
+        response = self.patch_request("/api/spy_cats/9999/", {'name': 'Ghost'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('No SpyCat matches the given query.', response.json()['detail'])
+
+    def test_update_spy_cat_salary_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.patch_request(f"/api/spy_cats/{self.spy_cat2.id}/salary", {'salary': 900})
+        self.assertEqual(response.json()['salary'], 900)
+        self.spy_cat2.refresh_from_db()
+        self.assertEqual(self.spy_cat2.salary, 900)
+
     def test_delete_spy_cat(self):
         response = self.delete_request(f"/api/spy_cats/{self.spy_cat1.id}/")
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['success'], True)
         self.assertFalse(SpyCat.objects.filter(id=self.spy_cat1.id).exists())
 
+
+@override_settings(BREED_REGISTRY=FIXTURE_BREED_REGISTRY, ROOT_URLCONF=__name__)
+class AsyncSpyCatAPITest(TestCase):
+    def setUp(self):
+        self.spy_cat1 = SpyCat.objects.create(name='Whiskers', years_of_experience=5, breed='Siamese', salary=1000)
+
+    async def test_dossier(self):
+        await Mission.objects.acreate(name='Done', description='Done', assigned_cat=self.spy_cat1, is_completed=True)
+        response = await self.async_client.get(f"/api/spy_cats/{self.spy_cat1.id}/dossier", {'past_missions': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['past_missions'], [])
+        response = await self.async_client.get("/api/spy_cats/dossiers", {'limit': 10})
+        self.assertEqual(response.json()['items'][0]['past_missions'][0]['name'], 'Done')
+
+    async def test_list_spy_cats(self):
+        response = await self.async_client.get("/api/spy_cats/", {'page_size': 1})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([cat['name'] for cat in response.json()['items']], ['Whiskers'])
+        self.assertEqual(response.json()['count'], 1)
+
+    async def test_create_spy_cat(self):
+        payload = {'name': 'Tom', 'years_of_experience': 3, 'breed': 'persian', 'salary': 1200}
+        response = await self.async_client.post("/api/spy_cats/", payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(await SpyCat.objects.filter(breed='persian').acount(), 1)
+
+    async def test_create_spy_cat_invalid_breed(self):
+        payload = {'name': 'Tom', 'years_of_experience': 3, 'breed': 'InvalidBreed', 'salary': 1200}
+        response = await self.async_client.post("/api/spy_cats/", payload, content_type='application/json')
+        self.assertEqual(response.status_code, 422)
+        self.assertIn('InvalidBreed is not a valid breed', response.json()['detail'][0]['msg'])
+
+    async def test_patch_spy_cat(self):
+        response = await self.async_client.patch(
+            f"/api/spy_cats/{self.spy_cat1.id}/", {'salary': 1500}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['salary'], 1500)
+
+    async def test_export_spy_cats_ndjson(self):
+        response = await self.async_client.get("/api/spy_cats/export")
+        self.assertEqual(response.status_code, 200)
+        body = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertEqual([json.loads(line)['name'] for line in body.splitlines()], ['Whiskers'])
+
+    async def test_delete_spy_cat(self):
+        response = await self.async_client.delete(f"/api/spy_cats/{self.spy_cat1.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(await SpyCat.objects.filter(id=self.spy_cat1.id).aexists())
+
+
+class SpyCatDossierTest(TestCase):
+    def setUp(self):
+        self.cat = SpyCat.objects.create(name='Whiskers', years_of_experience=5, breed='Siamese', salary=1000)
+        self.other_cat = SpyCat.objects.create(name='Felix', years_of_experience=2, breed='Persian', salary=800)
+        self.current = Mission.objects.create(name='Current', description='Active', assigned_cat=self.cat)
+        Target.objects.create(mission=self.current, name='Target', country='Ukraine', notes='')
+        self.add_past_missions(self.cat, 3)
+
+    def add_past_missions(self, cat, count):
+        missions = Mission.objects.bulk_create(
+            Mission(name=f'Past {i}', description='Done', assigned_cat=cat, is_completed=True) for i in range(count)
+        )
+        Target.objects.bulk_create(
+            Target(mission=mission, name=f'Target {i}', country='Poland', notes='', is_completed=True)
+            for mission in missions for i in range(2)
+        )
+        return missions
+
+    def test_dossier(self):
+        response = self.client.get(f"/api/spy_cats/{self.cat.id}/dossier", {'past_missions': 2})
+        self.assertEqual(response.status_code, 200)
+        dossier = response.json()
+        self.assertEqual(dossier['name'], 'Whiskers')
+        self.assertEqual(dossier['current_mission']['name'], 'Current')
+        self.assertEqual(dossier['current_mission']['targets'][0]['name'], 'Target')
+        self.assertEqual([mission['name'] for mission in dossier['past_missions']], ['Past 2', 'Past 1'])
+        self.assertEqual(len(dossier['past_missions'][0]['targets']), 2)
+
+    def test_past_missions_in_completion_order(self):
+        old = Mission.objects.create(name='Old', description='Late', assigned_cat=self.other_cat, remaining_targets=1)
+        target = Target.objects.create(mission=old, name='Last', country='Spain', notes='')
+        self.add_past_missions(self.other_cat, 2)
+        mark_target_as_completed(target.id)
+
+        response = self.client.get(f"/api/spy_cats/{self.other_cat.id}/dossier")
+        self.assertEqual([mission['name'] for mission in response.json()['past_missions']], ['Old', 'Past 1', 'Past 0'])
+
+    def test_dossier_without_missions(self):
+        response = self.client.get(f"/api/spy_cats/{self.other_cat.id}/dossier")
+        self.assertEqual(response.json()['current_mission'], None)
+        self.assertEqual(response.json()['past_missions'], [])
+
+    def test_dossier_queries_do_not_grow_with_missions(self):
+        # The cat and its two kinds of missions, each with its targets.
+        with self.assertNumQueries(5):
+            self.client.get(f"/api/spy_cats/{self.cat.id}/dossier")
+        self.add_past_missions(self.cat, 20)
+        with self.assertNumQueries(5):
+            response = self.client.get(f"/api/spy_cats/{self.cat.id}/dossier", {'past_missions': 15})
+        self.assertEqual(len(response.json()['past_missions']), 15)
+
+    def test_list_dossiers(self):
+        self.add_past_missions(self.other_cat, 4)
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/spy_cats/dossiers", {'limit': 10, 'past_missions': 3})
+        dossiers = response.json()['items']
+        self.assertEqual([dossier['name'] for dossier in dossiers], ['Whiskers', 'Felix'])
+        self.assertEqual([len(dossier['past_missions']) for dossier in dossiers], [3, 3])
+        self.assertIsNone(dossiers[1]['current_mission'])
+
+
+class BreedRegistryTest(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_breeds_are_fetched_once_per_ttl(self):
+        source = CountingSource()
+        registry = BreedRegistry(source, ttl=60)
+        self.assertIn('persian', registry)
+        self.assertIn('Maine Coon', registry)
+        self.assertNotIn('UnknownBreed', registry)
+        self.assertEqual(source.calls, 1)
+
+    def test_workers_share_cached_breeds(self):
+        BreedRegistry(CountingSource(), ttl=60).breeds()
+        other_source = CountingSource()
+        self.assertIn('Siamese', BreedRegistry(other_source, ttl=60))
+        self.assertEqual(other_source.calls, 0)
+
+    def test_cold_start_uses_snapshot(self):
+        BreedRegistry(CountingSource(), ttl=60).breeds()
+        cache.clear()
+        source = CountingSource()
+        self.assertIn('Siamese', BreedRegistry(source, ttl=60))
+        self.assertEqual(source.calls, 0)
+        self.assertTrue(Breed.objects.filter(name='Siamese').exists())
+
+    def test_stale_snapshot_is_served_when_source_fails(self):
+        BreedRegistry(CountingSource(), ttl=60).breeds()
+        cache.clear()
+        source = CountingSource(fail=True)
+        with self.assertLogs('cats.breeds', 'WARNING'):
+            self.assertIn('Siamese', BreedRegistry(source, ttl=0))
+        self.assertEqual(source.calls, 1)
+
+    def test_refresh_in_progress_does_not_hit_source(self):
+        BreedRegistry(CountingSource(), ttl=60).breeds()
+        cache.clear()
+        cache.add(LOCK_KEY, True)
+        source = CountingSource()
+        self.assertIn('Siamese', BreedRegistry(source, ttl=0))
+        self.assertEqual(source.calls, 0)
+
+    def test_unavailable_without_snapshot(self):
+        registry = BreedRegistry(CountingSource(fail=True), ttl=60)
+        with self.assertRaises(BreedRegistryUnavailable), self.assertLogs('cats.breeds', 'WARNING'):
+            registry.breeds()
+
+    def test_expired_snapshot_is_refreshed_in_background(self):
+        BreedRegistry(CountingSource(), ttl=60).breeds()
+        cache.clear()
+        source = CountingSource()
+        self.assertIn('Siamese', BreedRegistry(source, ttl=0, refresh_in_background=True))
+        self.assertIn('Siamese', BreedRegistry(source, ttl=0, refresh_in_background=True))
+        self.assertEqual(source.calls, 0)
+        self.assertEqual(list(Job.objects.values_list('name', flat=True)), ['cats.refresh_breeds'])
+
+    def test_background_refresh_is_retried_when_source_fails(self):
+        BreedRegistry(CountingSource(), ttl=60).breeds()
+        with override_settings(BREED_REGISTRY={'SOURCE': 'cats.tests.CountingSource', 'OPTIONS': {'fail': True}}):
+            with self.assertRaises(ConnectionError):
+                refresh_breeds()
+
+
+@override_settings(BREED_REGISTRY=FIXTURE_BREED_REGISTRY)
+class RequestMetricsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        registry.reset()
+        self.spy_cat = SpyCat.objects.create(name='Whiskers', years_of_experience=5, breed='Siamese', salary=1000)
+
+    def test_server_timing_reports_queries(self):
+        response = self.client.get(f"/api/spy_cats/{self.spy_cat.id}/")
+        self.assertRegex(response['Server-Timing'], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="1 queries"$')
+
+    def test_metrics_are_labelled_by_route(self):
+        self.client.get(f"/api/spy_cats/{self.spy_cat.id}/")
+        self.client.get("/api/spy_cats/999999/")
+        metrics = self.client.get("/metrics").content.decode()
+        self.assertIn('http_requests_total{method="GET",route="api/spy_cats/<cat_id>/",status="200"} 1', metrics)
+        self.assertIn('http_requests_total{method="GET",route="api/spy_cats/<cat_id>/",status="400"} 1', metrics)
+        self.assertIn('http_request_db_queries_count{method="GET",route="api/spy_cats/<cat_id>/"} 2', metrics)
+
+    def test_breed_fetch_is_reported_as_upstream_time(self):
+        payload = {'name': 'Tom', 'years_of_experience': 1, 'breed': 'Persian', 'salary': 500}
+        response = self.client.post("/api/spy_cats/", data=json.dumps(payload), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('breeds;dur=', response['Server-Timing'])
+        self.assertIn(
+            'http_request_upstream_seconds_total{method="POST",route="api/spy_cats/",upstream="breeds"}',
+            registry.render(),
+        )
+
+    @override_settings(REQUEST_METRICS={'SERVER_TIMING': False, 'QUERY_BUDGET': 0, 'LATENCY_BUDGET_MS': 60000})
+    def test_requests_over_budget_are_logged(self):
+        with self.assertLogs('core.metrics', 'WARNING') as logs:
+            response = self.client.get(f"/api/spy_cats/{self.spy_cat.id}/")
+        self.assertNotIn('Server-Timing', response)
+        self.assertIn('1 queries', logs.output[0])
+        self.assertIn(
+            'http_requests_over_budget_total{method="GET",route="api/spy_cats/<cat_id>/",budget="queries"} 1',
+            registry.render(),
+        )
+
+    @override_settings(ROOT_URLCONF=__name__)
+    async def test_async_view_queries_are_counted(self):
+        response = await self.async_client.get(f"/api/spy_cats/{self.spy_cat.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('desc="1 queries"', response['Server-Timing'])
@@ -0,0 +1,11 @@
+from ninja import Router
+
+from .cache import stats
+
+router = Router(tags=["Cache"])
+
+
+@router.get("/stats", response=dict)
+def cache_stats_view(request):
+    """Hit and miss counters of the response cache."""
+    return stats()
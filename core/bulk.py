@@ -0,0 +1,96 @@
+"""Helpers shared by the bulk import and batch endpoints."""
+import json
+from typing import Any, Callable, Iterable, Iterator
+
+from django.db import DatabaseError, transaction
+from pydantic import ValidationError
+
+NDJSON_CONTENT_TYPES = ('application/x-ndjson', 'application/jsonl')
+DEFAULT_CHUNK_SIZE = 500
+MAX_CHUNK_SIZE = 5000
+# Most IDs a batch endpoint accepts; a batch is applied in a single transaction.
+MAX_BATCH_SIZE = 1000
+
+
+def read_items(request) -> Iterable[Any]:
+    """Reads a JSON array, or streams an NDJSON body one line at a time."""
+    if request.content_type in NDJSON_CONTENT_TYPES:
+        return _read_ndjson(request)
+
+    items = json.loads(request.body)
+    if not isinstance(items, list):
+        raise ValueError("Expected a JSON array or an NDJSON stream.")
+    return items
+
+
+def _read_ndjson(request) -> Iterator[Any]:
+    for line in request:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            # Reported against this item instead of failing the whole import.
+            yield ValueError(f"Invalid JSON: {e}")
+
+
+def error_messages(error: Exception) -> list[str]:
+    if isinstance(error, ValidationError):
+        return [f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}" for e in error.errors()]
+    return [str(error)]
+
+
+def import_in_chunks(
+    items: Iterable[Any],
+    validate: Callable[[Any], Any],
+    insert_chunk: Callable[[list], list[int | str]],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict:
+    """Validates items one by one and inserts the valid ones in chunks.
+
+    ``insert_chunk`` receives validated items and returns, for each of them, the
+    new row ID or an error message. Each chunk is inserted in its own transaction,
+    so a database error only fails the items of that chunk.
+    """
+    results, chunk = [], []
+
+    def flush():
+        try:
+            with transaction.atomic():
+                outcomes = insert_chunk([value for _, value in chunk])
+        except DatabaseError as e:
+            outcomes = [str(e)] * len(chunk)
+        for (index, _), outcome in zip(chunk, outcomes):
+            if isinstance(outcome, str):
+                results.append({'index': index, 'errors': [outcome]})
+            else:
+                results.append({'index': index, 'id': outcome})
+        chunk.clear()
+
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, Exception):
+                raise item
+            chunk.append((index, validate(item)))
+        except (ValidationError, ValueError) as e:
+            results.append({'index': index, 'errors': error_messages(e)})
+            continue
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+
+    results.sort(key=lambda result: result['index'])
+    created = sum(1 for result in results if result.get('id') is not None)
+    return {'created': created, 'failed': len(results) - created, 'results': results}
+
+
+def unique_ids(ids: Iterable[int]) -> list[int]:
+    """``ids`` without repetitions, in their original order."""
+    return list(dict.fromkeys(ids))
+
+
+def batch_results(ids: list[int], errors: dict[int, str]) -> dict:
+    """Outcome of a batch operation on ``ids``, given the error of each ID that failed."""
+    results = [{'id': id, 'errors': [errors[id]]} if id in errors else {'id': id} for id in ids]
+    return {'succeeded': len(ids) - len(errors), 'failed': len(errors), 'results': results}
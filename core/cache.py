@@ -0,0 +1,159 @@
+"""Read-through cache for the detail endpoints of the cat and mission routers.
+
+Cached responses are tagged (``cat:1``, ``mission:7``) and each tag has a
+version token in the cache. An entry records the versions it was built from
+and is discarded once any of them changed, so a write only has to call
+``invalidate()`` with the tags it touched instead of finding every affected key.
+
+Every response carries an ``ETag``; a matching ``If-None-Match`` gets a 304.
+"""
+import functools
+import hashlib
+import inspect
+import uuid
+from typing import Any, Callable, Iterable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from ninja import Schema
+
+from .replicas import use_primary
+from .serialization import dumps
+
+KEY_PREFIX = "response-cache"
+STATS = ('hits', 'misses')
+
+
+def _cache():
+    return caches[settings.RESPONSE_CACHE.get('ALIAS', 'default')]
+
+
+def _tag_key(tag: str) -> str:
+    return f"{KEY_PREFIX}:tag:{tag}"
+
+
+def tag_versions(tags: Iterable[str]) -> dict[str, str]:
+    """Current version of each tag; tags without one (new or evicted) get a fresh version."""
+    cache = _cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    for key, tag in keys.items():
+        if tag not in versions:
+            cache.add(key, uuid.uuid4().hex, None)
+            versions[tag] = cache.get(key)
+    return versions
+
+
+def _bump(tags: Iterable[str]) -> None:
+    _cache().set_many({_tag_key(tag): uuid.uuid4().hex for tag in tags}, None)
+
+
+def invalidate(*tags: str) -> None:
+    """Discards every cached response built from any of ``tags``.
+
+    Inside a transaction the tags are bumped again on commit, so a response
+    cached from the old rows in the meantime does not outlive the commit.
+    """
+    _bump(tags)
+    if connection.in_atomic_block:
+        transaction.on_commit(lambda: _bump(tags))
+
+
+def _record(stat: str) -> None:
+    cache, key = _cache(), f"{KEY_PREFIX}:stats:{stat}"
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Evicted between add() and incr(); losing one count is fine.
+        pass
+
+
+def stats() -> dict:
+    counts = _cache().get_many([f"{KEY_PREFIX}:stats:{stat}" for stat in STATS])
+    hits, misses = (counts.get(f"{KEY_PREFIX}:stats:{stat}", 0) for stat in STATS)
+    return {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses) if hits + misses else None}
+
+
+def _response(request, body: bytes, etag: str) -> HttpResponse:
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match and (etag in parse_etags(if_none_match) or if_none_match.strip() == '*'):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json; charset=utf-8')
+    response['ETag'] = etag
+    return response
+
+
+def _is_current(entry: dict) -> bool:
+    versions = entry['versions']
+    current = _cache().get_many([_tag_key(tag) for tag in versions])
+    return all(current.get(_tag_key(tag)) == version for tag, version in versions.items())
+
+
+def _lookup(request, tags: list[str]) -> tuple[str, HttpResponse | None, dict[str, str]]:
+    key = f"{KEY_PREFIX}:{hashlib.md5(request.get_full_path().encode()).hexdigest()}"
+    entry = _cache().get(key)
+    if entry and _is_current(entry):
+        _record('hits')
+        return key, _response(request, entry['body'], entry['etag']), {}
+    _record('misses')
+    # Versions are read before the view runs: a write that lands while it builds
+    # the response bumps them, so the entry stored afterwards is already outdated.
+    return key, None, tag_versions(tags)
+
+
+def render(schema: type[Schema], result: Any) -> tuple[bytes, str]:
+    """Serializes ``result`` with ``schema``; returns the JSON body and its ETag."""
+    body = dumps(schema.from_orm(result).model_dump())
+    return body, f'"{hashlib.md5(body).hexdigest()}"'
+
+
+def _store(request, key: str, versions: dict[str, str], schema: type[Schema], result: Any, depends_on) -> HttpResponse:
+    body, etag = render(schema, result)
+    if depends_on:
+        versions = {**tag_versions(depends_on(result)), **versions}
+    entry = {'body': body, 'etag': etag, 'versions': versions}
+    _cache().set(key, entry, settings.RESPONSE_CACHE.get('TIMEOUT', 300))
+    return _response(request, body, etag)
+
+
+def cached_response(
+    schema: type[Schema],
+    tags: Callable[..., list[str]],
+    depends_on: Callable[[Any], list[str]] | None = None,
+):
+    """Caches a view's response, serialized with ``schema``.
+
+    ``tags`` receives the view's keyword arguments; ``depends_on`` receives the
+    object the view returned, for tags that are only known after loading it.
+    Only successful responses are cached; exceptions pass through. The view reads
+    from the primary, as a lagging replica would cache rows a write has replaced.
+    """
+    def decorator(view):
+        if inspect.iscoroutinefunction(view):
+            @functools.wraps(view)
+            async def async_wrapper(request, **kwargs):
+                key, response, versions = await sync_to_async(_lookup)(request, tags(**kwargs))
+                if response is not None:
+                    return response
+                with use_primary():
+                    result = await view(request, **kwargs)
+                return await sync_to_async(_store)(request, key, versions, schema, result, depends_on)
+            return async_wrapper
+
+        @functools.wraps(view)
+        def wrapper(request, **kwargs):
+            key, response, versions = _lookup(request, tags(**kwargs))
+            if response is not None:
+                return response
+            with use_primary():
+                result = view(request, **kwargs)
+            return _store(request, key, versions, schema, result, depends_on)
+        return wrapper
+
+    return decorator
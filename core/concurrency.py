@@ -0,0 +1,90 @@
+"""Optimistic concurrency control for the PUT and PATCH endpoints.
+
+Cats, missions and targets carry a ``version`` column that every write
+increments. A request with ``If-Match`` is compared with the ETag of the current
+representation, the one GET returns, and then written with
+``UPDATE ... WHERE version = <version that was compared>``. A write landing in
+between changes the version, so the request fails with 412 instead of silently
+overwriting it, and no row is ever locked.
+
+Requests without ``If-Match`` are written unconditionally, as before. Every
+response carries the ETag of the written representation, so a client can chain
+conditional writes without reading the resource again.
+"""
+from typing import Any, Awaitable, Callable
+
+from asgiref.sync import sync_to_async
+from django.db.models import F, QuerySet
+from django.http import HttpResponse
+from django.utils.http import parse_etags
+from ninja import Schema
+
+from .cache import render
+
+
+class PreconditionFailed(Exception):
+    """The resource changed since the client read it."""
+
+
+def next_version() -> F:
+    """Value to write to ``version`` along with any other change."""
+    return F('version') + 1
+
+
+def at_version(queryset: QuerySet, expected_version: int | None) -> QuerySet:
+    """Restricts a write to the version the client saw, if any."""
+    return queryset if expected_version is None else queryset.filter(version=expected_version)
+
+
+def check_version(instance, expected_version: int | None) -> None:
+    """Raises PreconditionFailed if ``instance`` is no longer at ``expected_version``."""
+    if expected_version is not None and instance.version != expected_version:
+        raise PreconditionFailed(f"{type(instance).__name__} was modified by another request.")
+
+
+def expected_version(request, schema: type[Schema], current: Any) -> int | None:
+    """Checks ``If-Match`` against ``current`` and returns the version a write must find.
+
+    Returns None when the request has no ``If-Match``; ``*`` only requires the resource to exist.
+    """
+    header = request.headers.get('If-Match')
+    if header is None:
+        return None
+    if header.strip() != '*' and render(schema, current)[1] not in parse_etags(header):
+        raise PreconditionFailed("If-Match does not match the current version of the resource.")
+    return current.version
+
+
+def _response(schema: type[Schema], result: Any) -> HttpResponse:
+    body, etag = render(schema, result)
+    response = HttpResponse(body, content_type='application/json; charset=utf-8')
+    response['ETag'] = etag
+    return response
+
+
+def conditional_write(
+    request,
+    schema: type[Schema],
+    load: Callable[[], Any],
+    write: Callable[[int | None], Any],
+) -> HttpResponse:
+    """Runs ``write(expected_version)`` and responds with the result serialized by ``schema``.
+
+    ``load`` returns the current resource; it is only called for requests with ``If-Match``.
+    """
+    version = expected_version(request, schema, load()) if 'If-Match' in request.headers else None
+    return _response(schema, write(version))
+
+
+async def aconditional_write(
+    request,
+    schema: type[Schema],
+    load: Callable[[], Awaitable[Any]],
+    write: Callable[[int | None], Awaitable[Any]],
+) -> HttpResponse:
+    """Async variant of conditional_write; the result is serialized in a worker thread."""
+    version = None
+    if 'If-Match' in request.headers:
+        current = await load()
+        version = await sync_to_async(expected_version)(request, schema, current)
+    return await sync_to_async(_response)(schema, await write(version))
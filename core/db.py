@@ -0,0 +1,37 @@
+"""Database helpers shared by the services."""
+from django.db import connections, router, transaction
+from django.db.models import QuerySet
+from django.db.models.sql import UpdateQuery
+
+def supports_update_returning(connection) -> bool:
+    """Whether UPDATE statements on ``connection`` accept a RETURNING clause."""
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        # The clause arrived in SQLite 3.35.
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def update_returning(queryset: QuerySet, **changes) -> list:
+    """Applies ``changes`` to the rows of ``queryset`` and returns the updated instances.
+
+    Only the given columns are written. Where the database supports it this is a
+    single ``UPDATE ... RETURNING``; elsewhere the rows are selected again after
+    the ``UPDATE``. ``changes`` accepts the same values as ``QuerySet.update()``.
+    """
+    model = queryset.model
+    db = queryset._db or router.db_for_write(model)
+    connection = connections[db]
+
+    if not supports_update_returning(connection):
+        pks = list(queryset.using(db).values_list('pk', flat=True))
+        model._default_manager.using(db).filter(pk__in=pks).update(**changes)
+        return list(model._default_manager.using(db).filter(pk__in=pks))
+
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(changes)
+    sql, params = query.get_compiler(db).as_sql()
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in model._meta.concrete_fields)
+    with transaction.mark_for_rollback_on_error(using=db):
+        return list(model._default_manager.db_manager(db).raw(f'{sql} RETURNING {columns}', params))
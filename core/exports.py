@@ -0,0 +1,81 @@
+"""Streaming export responses shared by the cat and mission routers."""
+import csv
+from itertools import chain
+from typing import AsyncIterable, AsyncIterator, Callable, Iterable, Iterator, Literal
+
+from django.http import StreamingHttpResponse
+
+from .serialization import dumps
+
+ExportFormat = Literal['ndjson', 'csv']
+Rows = Iterable[dict] | AsyncIterable[dict]
+
+# Rows fetched per round trip from the server-side cursor.
+EXPORT_CHUNK_SIZE = 2000
+# Lines are sent in blocks of about this many characters instead of one write per row.
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+class _Echo:
+    """File-like object whose write() hands the formatted line back to csv.writer's caller."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _blocks(lines: Iterable[str]) -> Iterator[str]:
+    block, size = [], 0
+    for line in lines:
+        block.append(line)
+        size += len(line)
+        if size >= STREAM_BLOCK_SIZE:
+            yield ''.join(block)
+            block, size = [], 0
+    if block:
+        yield ''.join(block)
+
+
+async def _ablocks(lines: AsyncIterable[str]) -> AsyncIterator[str]:
+    block, size = [], 0
+    async for line in lines:
+        block.append(line)
+        size += len(line)
+        if size >= STREAM_BLOCK_SIZE:
+            yield ''.join(block)
+            block, size = [], 0
+    if block:
+        yield ''.join(block)
+
+
+def _stream(rows: Rows, render: Callable[[dict], list[str]], header: str = '') -> Iterator[str] | AsyncIterator[str]:
+    """Renders rows to lines grouped in blocks; async rows give an async stream for ASGI."""
+    if isinstance(rows, AsyncIterable):
+        async def lines():
+            yield header
+            async for row in rows:
+                for line in render(row):
+                    yield line
+        return _ablocks(lines())
+
+    return _blocks(chain([header], (line for row in rows for line in render(row))))
+
+
+def ndjson_response(rows: Rows, filename: str) -> StreamingHttpResponse:
+    render = lambda row: [dumps(row).decode() + '\n']
+    response = StreamingHttpResponse(_stream(rows, render), content_type='application/x-ndjson')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.ndjson"'
+    return response
+
+
+def csv_response(
+    rows: Rows,
+    fieldnames: list[str],
+    filename: str,
+    expand: Callable[[dict], list[dict]] | None = None,
+) -> StreamingHttpResponse:
+    """Streams rows as CSV; ``expand`` turns each row into several CSV rows."""
+    writer = csv.DictWriter(_Echo(), fieldnames=fieldnames)
+    render = lambda row: [writer.writerow(r) for r in (expand(row) if expand else [row])]
+    response = StreamingHttpResponse(_stream(rows, render, writer.writeheader()), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.csv"'
+    return response
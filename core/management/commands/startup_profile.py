@@ -0,0 +1,81 @@
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+IMPORT_APPLICATION = "from core.startup import load_application; load_application()"
+FIRST_RESPONSE = (
+    "import json, sys; from core.startup import first_response_profile; "
+    "print(json.dumps(first_response_profile(sys.argv[1], warm=sys.argv[2] == 'warm')))"
+)
+
+
+def parse_importtime(stderr: str) -> tuple[float, Counter]:
+    """Total milliseconds spent importing, and the milliseconds of each top-level package, from ``-X importtime``."""
+    packages = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        self_us, _, name = (field.strip() for field in line[len('import time:'):].split('|'))
+        if self_us.isdigit():
+            packages[name.split('.')[0]] += int(self_us) / 1000
+    return sum(packages.values()), packages
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts the application in fresh interpreters and reports its import time, with the slowest packages, "
+        "and its time to first response. Exits with an error when either is over STARTUP_BUDGET."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--path', default='/api/spy_cats/?limit=1', help="Path of the first request.")
+        parser.add_argument('--no-warm-up', action='store_true', help="Skip core.startup.warm_up() before it.")
+        parser.add_argument('--top', type=int, default=15, help="Packages listed by import time.")
+        parser.add_argument('--import-budget-ms', type=float, default=settings.STARTUP_BUDGET['IMPORT_MS'])
+        parser.add_argument(
+            '--first-response-budget-ms', type=float, default=settings.STARTUP_BUDGET['FIRST_RESPONSE_MS']
+        )
+
+    def run_python(self, *args: str) -> subprocess.CompletedProcess:
+        process = subprocess.run(
+            [sys.executable, *args], cwd=settings.BASE_DIR, env=os.environ.copy(), capture_output=True, text=True
+        )
+        if process.returncode:
+            raise CommandError(f"Failed to start the application:\n{process.stderr}")
+        return process
+
+    def handle(self, *args, **options):
+        import_ms, packages = parse_importtime(self.run_python('-X', 'importtime', '-c', IMPORT_APPLICATION).stderr)
+        self.stdout.write(f"Imports: {import_ms:.0f} ms (budget {options['import_budget_ms']:.0f} ms)")
+        for package, ms in packages.most_common(options['top']):
+            self.stdout.write(f"  {package:<40}{ms:>10.1f} ms")
+
+        start = time.perf_counter()
+        warm = 'cold' if options['no_warm_up'] else 'warm'
+        process = self.run_python('-c', FIRST_RESPONSE, options['path'], warm)
+        process_ms = (time.perf_counter() - start) * 1000
+        profile = json.loads(process.stdout.strip().splitlines()[-1])
+        self.stdout.write(
+            f"Time to first response: {profile['time_to_first_response_ms']:.0f} ms "
+            f"(budget {options['first_response_budget_ms']:.0f} ms, {warm} start, status {profile['status']})"
+        )
+        for phase in ('import_ms', 'warm_up_ms', 'first_response_ms', 'second_response_ms'):
+            self.stdout.write(f"  {phase:<40}{profile[phase]:>10.1f} ms")
+        self.stdout.write(f"  {'interpreter start to exit':<40}{process_ms:>10.1f} ms")
+
+        over = []
+        if import_ms > options['import_budget_ms']:
+            over.append(f"imports took {import_ms:.0f} ms")
+        if profile['time_to_first_response_ms'] > options['first_response_budget_ms']:
+            over.append(f"the first response took {profile['time_to_first_response_ms']:.0f} ms")
+        if profile['status'] >= 500:
+            over.append(f"the first response failed with status {profile['status']}")
+        if over:
+            raise CommandError(f"Startup check failed: {', '.join(over)}.")
+        self.stdout.write(self.style.SUCCESS("Startup is within budget."))
@@ -0,0 +1,238 @@
+"""Per-request instrumentation, exported in the Prometheus text format at ``/metrics``.
+
+``RequestMetricsMiddleware`` records for every route its latency, the number
+and duration of its SQL queries, the time spent waiting on upstream services
+and the response size. Requests also get a ``Server-Timing`` header, and a
+request that exceeds the query or latency budget of ``REQUEST_METRICS`` is
+logged.
+
+Queries are counted by an execute wrapper installed on every connection. The
+request being served is kept in a context variable, which ``sync_to_async``
+carries over to the thread running the ORM, so async views are counted too.
+Metrics are kept in process: with several workers each one reports its own.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class RequestMetrics:
+    """What a single request spent, filled in while it is served."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.upstream: dict[str, float] = {}
+
+
+_current: ContextVar[RequestMetrics | None] = ContextVar('request_metrics', default=None)
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.sql_seconds += time.perf_counter() - start
+
+
+def _install(connection) -> None:
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+@receiver(connection_created)
+def install_query_wrapper(sender, connection, **kwargs):
+    _install(connection)
+
+
+@contextmanager
+def track_upstream(name: str):
+    """Adds the time spent in the block to the current request's ``name`` upstream."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.upstream[name] = metrics.upstream.get(name, 0.0) + time.perf_counter() - start
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry:
+    """Counters and histograms keyed by label values, safe to update from several threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.requests: dict[tuple, int] = {}
+            self.durations: dict[tuple, Histogram] = {}
+            self.queries: dict[tuple, Histogram] = {}
+            self.sql_seconds: dict[tuple, float] = {}
+            self.upstream_seconds: dict[tuple, float] = {}
+            self.response_bytes: dict[tuple, int] = {}
+            self.over_budget: dict[tuple, int] = {}
+
+    def record(self, method: str, route: str, status: int, metrics: RequestMetrics, duration: float,
+               size: int | None, budgets: list[str]) -> None:
+        labels = (method, route)
+        with self._lock:
+            self.requests[(*labels, str(status))] = self.requests.get((*labels, str(status)), 0) + 1
+            self.durations.setdefault(labels, Histogram(DURATION_BUCKETS)).observe(duration)
+            self.queries.setdefault(labels, Histogram(QUERY_BUCKETS)).observe(metrics.queries)
+            self.sql_seconds[labels] = self.sql_seconds.get(labels, 0.0) + metrics.sql_seconds
+            for upstream, seconds in metrics.upstream.items():
+                key = (*labels, upstream)
+                self.upstream_seconds[key] = self.upstream_seconds.get(key, 0.0) + seconds
+            if size is not None:
+                self.response_bytes[labels] = self.response_bytes.get(labels, 0) + size
+            for budget in budgets:
+                self.over_budget[(*labels, budget)] = self.over_budget.get((*labels, budget), 0) + 1
+
+    def render(self) -> str:
+        """The metrics in the Prometheus text exposition format."""
+        route = ('method', 'route')
+        lines = []
+        with self._lock:
+            _counter(lines, 'http_requests_total', "Requests served.", (*route, 'status'), self.requests)
+            _histogram(lines, 'http_request_duration_seconds', "Time to build the response.", route, self.durations)
+            _histogram(lines, 'http_request_db_queries', "SQL queries per request.", route, self.queries)
+            _counter(lines, 'http_request_db_seconds_total', "Time spent in SQL queries.", route, self.sql_seconds)
+            _counter(
+                lines, 'http_request_upstream_seconds_total', "Time spent waiting on upstream services.",
+                (*route, 'upstream'), self.upstream_seconds,
+            )
+            _counter(lines, 'http_response_size_bytes_total', "Bytes of non-streaming response bodies.", route,
+                     self.response_bytes)
+            _counter(
+                lines, 'http_requests_over_budget_total', "Requests over the query or latency budget.",
+                (*route, 'budget'), self.over_budget,
+            )
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(names: tuple, values: tuple, **extra) -> str:
+    pairs = [*zip(names, values), *extra.items()]
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _counter(lines: list, name: str, help: str, label_names: tuple, values: dict) -> None:
+    lines += [f'# HELP {name} {help}', f'# TYPE {name} counter']
+    lines += [f'{name}{_labels(label_names, labels)} {value}' for labels, value in sorted(values.items())]
+
+
+def _histogram(lines: list, name: str, help: str, label_names: tuple, values: dict) -> None:
+    lines += [f'# HELP {name} {help}', f'# TYPE {name} histogram']
+    for labels, histogram in sorted(values.items()):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{_labels(label_names, labels, le=bound)} {count}')
+        lines.append(f'{name}_bucket{_labels(label_names, labels, le="+Inf")} {histogram.count}')
+        lines.append(f'{name}_sum{_labels(label_names, labels)} {histogram.sum}')
+        lines.append(f'{name}_count{_labels(label_names, labels)} {histogram.count}')
+
+
+registry = MetricsRegistry()
+
+
+def route_of(request) -> str:
+    """URL pattern the request was routed to, so that all IDs share one label."""
+    match = getattr(request, 'resolver_match', None)
+    return match.route if match is not None else 'unmatched'
+
+
+def server_timing(metrics: RequestMetrics, duration: float) -> str:
+    timings = [f'app;dur={duration * 1000:.1f}', f'db;dur={metrics.sql_seconds * 1000:.1f};desc="{metrics.queries} queries"']
+    timings += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in metrics.upstream.items()]
+    return ', '.join(timings)
+
+
+class RequestMetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        # Connections opened before this module was imported missed connection_created.
+        for connection in connections.all(initialized_only=True):
+            _install(connection)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics: RequestMetrics):
+        config = settings.REQUEST_METRICS
+        duration = time.perf_counter() - metrics.start
+        route = route_of(request)
+        size = None if response.streaming else len(response.content)
+
+        budgets = []
+        if metrics.queries > config['QUERY_BUDGET']:
+            budgets.append('queries')
+        if duration * 1000 > config['LATENCY_BUDGET_MS']:
+            budgets.append('latency')
+        if budgets:
+            logger.warning(
+                "%s %s (%s) over budget: %.1f ms, %d queries in %.1f ms, upstream %s",
+                request.method, request.path, route, duration * 1000, metrics.queries, metrics.sql_seconds * 1000,
+                {name: round(seconds * 1000, 1) for name, seconds in metrics.upstream.items()},
+            )
+
+        registry.record(request.method, route, response.status_code, metrics, duration, size, budgets)
+        if config['SERVER_TIMING']:
+            response['Server-Timing'] = server_timing(metrics, duration)
+        return response
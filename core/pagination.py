@@ -0,0 +1,101 @@
+"""Pagination shared by the cat and mission routers.
+
+Every paginated endpoint supports two modes:
+
+* page numbers (``?page=2&page_size=20``), the default;
+* keyset (``?after=<id>&limit=20``), which seeks past the last ID the client has
+  seen, so every page costs the same regardless of table size.
+"""
+from typing import Any, List, Literal
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import QuerySet
+from ninja import Field, Schema
+from ninja.conf import settings
+from ninja.pagination import AsyncPaginationBase
+
+CountMode = Literal['exact', 'approximate', 'none']
+
+
+def approximate_count(queryset: QuerySet) -> int:
+    """Counts rows from planner statistics when an unfiltered table is counted on PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [queryset.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # Tables that were never analyzed report -1.
+        if row and row[0] >= 0:
+            return row[0]
+    return queryset.count()
+
+
+class AgencyPagination(AsyncPaginationBase):
+    class Input(Schema):
+        page: int = Field(1, ge=1)
+        page_size: int | None = Field(None, ge=1, le=settings.PAGINATION_MAX_LIMIT)
+        after: int | None = Field(None, ge=0, description="Keyset mode: return items with an ID greater than this.")
+        limit: int | None = Field(None, ge=1, le=settings.PAGINATION_MAX_LIMIT, description="Keyset mode: page size.")
+        count: CountMode | None = Field(
+            None, description="How to count items; defaults to 'exact' for page numbers and 'none' for keyset mode."
+        )
+
+    class Output(Schema):
+        items: List[Any]
+        count: int | None
+        next: int | None = Field(None, description="Value of `after` for the next keyset page.")
+
+    def __init__(self, page_size: int = settings.PAGINATION_PER_PAGE, **kwargs: Any) -> None:
+        self.page_size = page_size
+        super().__init__(**kwargs)
+
+    def paginate_queryset(self, queryset: QuerySet, pagination: Input, **params: Any) -> Any:
+        page, size = self.slice_page(queryset, pagination)
+        return self.build_output(queryset, list(page), size, pagination)
+
+    async def apaginate_queryset(self, queryset: QuerySet, pagination: Input, **params: Any) -> Any:
+        page, size = self.slice_page(queryset, pagination)
+        items = [item async for item in page]
+        return await sync_to_async(self.build_output)(queryset, items, size, pagination)
+
+    def slice_page(self, queryset: QuerySet, pagination: Input) -> tuple[QuerySet, int]:
+        if is_keyset(pagination):
+            size = pagination.limit or self.page_size
+            page = queryset.order_by('pk')
+            if pagination.after is not None:
+                page = page.filter(pk__gt=pagination.after)
+            # One extra row tells whether another page follows.
+            return page[:size + 1], size
+
+        size = pagination.page_size or self.page_size
+        offset = (pagination.page - 1) * size
+        return queryset[offset:offset + size], size
+
+    def build_output(self, queryset: QuerySet, items: list, size: int, pagination: Input) -> dict:
+        if not is_keyset(pagination):
+            return {'items': items, 'count': self.count_items(queryset, pagination.count or 'exact')}
+        return {
+            'items': items[:size],
+            'count': self.count_items(queryset, pagination.count or 'none'),
+            'next': item_id(items[size - 1]) if len(items) > size else None,
+        }
+
+    def count_items(self, queryset: QuerySet, mode: CountMode) -> int | None:
+        if mode == 'none':
+            return None
+        if mode == 'approximate':
+            return approximate_count(queryset)
+        return self._items_count(queryset)
+
+
+def is_keyset(pagination: AgencyPagination.Input) -> bool:
+    return pagination.after is not None or pagination.limit is not None
+
+
+def item_id(item: Any) -> int:
+    """ID of a model instance or of a ``.values()`` row, see core.serialization."""
+    return item['id'] if isinstance(item, dict) else item.pk
@@ -0,0 +1,258 @@
+"""Read replicas: routing the reads of GET requests away from the primary.
+
+``ReplicaMiddleware`` lets the queries of ``GET``, ``HEAD`` and ``OPTIONS``
+requests read from a replica; everything else reads from the primary: write
+requests, transactions, background jobs and management commands. A request
+picks one healthy replica, round robin, and reads all its rows from it.
+
+A replica replays the primary's writes with some delay, so a client that has
+just written is pinned to the primary for ``STICKY_SECONDS``, long enough for
+the replicas to catch up, so that e.g. a cat it just assigned shows up in its
+next read. A successful write sets a cookie, and also records the pin in the
+shared cache under the client's address, for clients that do not keep cookies.
+
+Each process checks its replicas every ``HEALTH_CHECK_INTERVAL`` seconds. A
+replica that cannot be reached, or that lags the primary by more than
+``MAX_LAG_SECONDS``, is left out until a later check finds it healthy again;
+without a healthy replica, reads go to the primary.
+"""
+import itertools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.dispatch import receiver
+
+from .throttling import READ_METHODS, client_id
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "primary-pin"
+
+# Seconds since the last replayed transaction, or 0 when every WAL record received has been replayed
+# (an idle primary) and on a server that is not a replica.
+LAG_SQL = """
+    SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END
+"""
+
+
+class ReadRoute:
+    """The replica a request reads from, picked at its first query."""
+
+    def __init__(self):
+        self.alias: str | None = None
+
+
+_route: ContextVar[ReadRoute | None] = ContextVar('read_route', default=None)
+
+
+def replication_lag(alias: str) -> float:
+    """Seconds the replica ``alias`` lags behind the primary."""
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            if connection.vendor != 'postgresql':
+                cursor.execute('SELECT 1')
+                return 0.0
+            cursor.execute(LAG_SQL)
+            return float(cursor.fetchone()[0])
+    except DatabaseError:
+        # Reconnect at the next check.
+        connection.close()
+        raise
+
+
+class ReplicaHealth:
+    """Replicas of this process that answered the last check within the allowed lag."""
+
+    def __init__(self, aliases: list[str], interval: float, max_lag: float):
+        self.aliases = aliases
+        self.interval = interval
+        self.max_lag = max_lag
+        self._healthy: list[str] = []
+        self._checked_at = -math.inf
+        self._lock = threading.Lock()
+        self._turns = itertools.count()
+
+    def is_healthy(self, alias: str) -> bool:
+        try:
+            lag = replication_lag(alias)
+        except DatabaseError as e:
+            logger.warning("Replica %s is unreachable: %s", alias, e)
+            return False
+        if lag > self.max_lag:
+            logger.warning("Replica %s lags %.1f s behind the primary", alias, lag)
+            return False
+        return True
+
+    def healthy(self) -> list[str]:
+        # One thread checks while the others go on with the previous result; until
+        # the first check is done that is none, so reads go to the primary.
+        if time.monotonic() - self._checked_at >= self.interval and self._lock.acquire(blocking=False):
+            try:
+                self._healthy = [alias for alias in self.aliases if self.is_healthy(alias)]
+                self._checked_at = time.monotonic()
+            finally:
+                self._lock.release()
+        return self._healthy
+
+    def pick(self) -> str:
+        healthy = self.healthy()
+        if not healthy:
+            return DEFAULT_DB_ALIAS
+        return healthy[next(self._turns) % len(healthy)]
+
+
+_health = None
+
+
+def get_health() -> ReplicaHealth:
+    global _health
+    if _health is None:
+        config = settings.DATABASE_ROUTING
+        _health = ReplicaHealth(config['REPLICAS'], config['HEALTH_CHECK_INTERVAL'], config['MAX_LAG_SECONDS'])
+    return _health
+
+
+@receiver(setting_changed)
+def reset_replica_health(*, setting, **kwargs):
+    global _health
+    if setting == 'DATABASE_ROUTING':
+        _health = None
+
+
+@contextmanager
+def use_primary():
+    """Reads from the primary inside the block, e.g. before caching or storing what was read."""
+    token = _route.set(None)
+    try:
+        yield
+    finally:
+        _route.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        route = _route.get()
+        # Rows read inside a transaction may be written back in it.
+        if route is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if route.alias is None:
+            route.alias = get_health().pick()
+        return route.alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def _pins():
+    return caches[settings.DATABASE_ROUTING['PIN_CACHE']]
+
+
+def _pin_key(request) -> str:
+    return f"{KEY_PREFIX}:{client_id(request)}"
+
+
+def _has_pin_cookie(request) -> bool:
+    try:
+        return float(request.COOKIES.get(settings.DATABASE_ROUTING['STICKY_COOKIE'], 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _reads_replicas(request) -> bool:
+    return request.method in READ_METHODS and bool(settings.DATABASE_ROUTING['REPLICAS'])
+
+
+def _writes(request, response) -> bool:
+    return request.method not in READ_METHODS and response.status_code < 400 and settings.DATABASE_ROUTING['REPLICAS']
+
+
+def is_pinned(request) -> bool:
+    """Whether the client wrote recently enough that its reads must see the primary."""
+    return _has_pin_cookie(request) or bool(_pins().get(_pin_key(request)))
+
+
+async def ais_pinned(request) -> bool:
+    return _has_pin_cookie(request) or bool(await _pins().aget(_pin_key(request)))
+
+
+def route_of(request) -> ReadRoute | None:
+    """Where the request reads from: a replica route, or None for the primary."""
+    return ReadRoute() if _reads_replicas(request) and not is_pinned(request) else None
+
+
+async def aroute_of(request) -> ReadRoute | None:
+    return ReadRoute() if _reads_replicas(request) and not await ais_pinned(request) else None
+
+
+def _set_pin_cookie(response) -> None:
+    config = settings.DATABASE_ROUTING
+    response.set_cookie(
+        config['STICKY_COOKIE'],
+        str(time.time() + config['STICKY_SECONDS']),
+        max_age=math.ceil(config['STICKY_SECONDS']),
+        httponly=True,
+        samesite='Lax',
+    )
+
+
+def stick(request, response):
+    """Pins the client to the primary after a successful write."""
+    if _writes(request, response):
+        _set_pin_cookie(response)
+        _pins().set(_pin_key(request), True, math.ceil(settings.DATABASE_ROUTING['STICKY_SECONDS']))
+    return response
+
+
+async def astick(request, response):
+    if _writes(request, response):
+        _set_pin_cookie(response)
+        await _pins().aset(_pin_key(request), True, math.ceil(settings.DATABASE_ROUTING['STICKY_SECONDS']))
+    return response
+
+
+class ReplicaMiddleware:
+    """Lets read requests read from a replica. A streamed response reads from the primary once it is returned."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _route.set(route_of(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _route.reset(token)
+        return stick(request, response)
+
+    async def __acall__(self, request):
+        token = _route.set(await aroute_of(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _route.reset(token)
+        return await astick(request, response)
@@ -0,0 +1,26 @@
+"""Routers that can be mounted on more than one API.
+
+A django-ninja router can only be attached to one ``NinjaAPI``. The async
+routers are served by ``core.urls`` in async mode and by the tests of the async
+views in any mode, so they record their operations and ``build()`` a fresh
+router with the same operations for each API.
+"""
+from ninja import Router
+
+
+class ReusableRouter(Router):
+    def __init__(self, **options):
+        super().__init__(**options)
+        self._options = options
+        self._operations = []
+
+    def add_api_operation(self, path, methods, view_func, **options) -> None:
+        self._operations.append((path, methods, view_func, options))
+        super().add_api_operation(path, methods, view_func, **options)
+
+    def build(self) -> Router:
+        """A router, not attached to any API yet, with the operations added to this one."""
+        router = Router(**self._options)
+        for path, methods, view_func, options in self._operations:
+            router.add_api_operation(path, methods, view_func, **options)
+        return router
@@ -0,0 +1,26 @@
+from typing import List
+
+from ninja import Schema
+
+
+class BulkItemResultSchema(Schema):
+    index: int
+    id: int | None = None
+    errors: List[str] = []
+
+
+class BulkImportResultSchema(Schema):
+    created: int
+    failed: int
+    results: List[BulkItemResultSchema]
+
+
+class BatchItemResultSchema(Schema):
+    id: int
+    errors: List[str] = []
+
+
+class BatchResultSchema(Schema):
+    succeeded: int
+    failed: int
+    results: List[BatchItemResultSchema]
@@ -0,0 +1,79 @@
+"""JSON rendering for the API, and a fast path for pages and exports.
+
+Every response is rendered by ``ORJSONRenderer``. Large responses can also skip
+the usual route from model instances through the response schema: the fast path
+reads ``.values()`` rows and checks and serializes them with a pydantic
+``TypeAdapter`` over a ``TypedDict`` mirroring the schema. The adapter is built
+once and runs in pydantic-core, so no model or schema object is created per row.
+"""
+from functools import wraps
+from typing import Callable, Iterable
+
+import orjson
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.http import HttpResponse
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+from pydantic import TypeAdapter
+from typing_extensions import TypedDict
+
+_encoder = NinjaJSONEncoder()
+
+
+def dumps(data) -> bytes:
+    """Serializes ``data`` to JSON; types orjson does not know are encoded as by Django Ninja."""
+    return orjson.dumps(data, default=_encoder.default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = 'application/json'
+
+    def render(self, request, data, *, response_status: int) -> bytes:
+        return dumps(data)
+
+
+class RowSerializer:
+    """Serializes ``.values()`` rows shaped like ``row_type``, a TypedDict mirroring a response schema.
+
+    ``complete`` turns the rows of a page into ``row_type``, e.g. by attaching related rows;
+    it is called once per page, so it should query the database at most a fixed number of times.
+    """
+
+    def __init__(self, row_type: type, complete: Callable[[list[dict]], list[dict]] | None = None):
+        self.complete = complete
+        self._rows = TypeAdapter(list[row_type])
+        page_type = TypedDict(f'{row_type.__name__}Page', {'items': list[row_type], 'count': int | None, 'next': int | None})
+        self._page = TypeAdapter(page_type)
+
+    def rows(self, rows: Iterable[dict]) -> list[dict]:
+        """The rows converted to the JSON types of the schema, e.g. decimals to floats."""
+        rows = list(rows)
+        return self._rows.validate_python(self.complete(rows) if self.complete else rows)
+
+    def dump_page(self, page: dict) -> bytes:
+        """Serializes a page built by core.pagination.AgencyPagination."""
+        page = {'next': None, **page, 'items': self.rows(page['items'])}
+        return self._page.dump_json(self._page.validate_python(page))
+
+    def page_response(self, page: dict) -> HttpResponse:
+        return HttpResponse(self.dump_page(page), content_type='application/json; charset=utf-8')
+
+
+def serialize_rows(serializer: RowSerializer):
+    """Renders the page of a paginated view with ``serializer``, applied above ``@paginate``.
+
+    The view returns ``.values()`` rows instead of model instances. The page is
+    returned as a ready response, so Django Ninja does not validate it against the
+    declared response schema, which still documents it.
+    """
+    def decorator(func):
+        if iscoroutinefunction(func):
+            @wraps(func)
+            async def view(request, **kwargs):
+                return await sync_to_async(serializer.page_response)(await func(request, **kwargs))
+        else:
+            @wraps(func)
+            def view(request, **kwargs):
+                return serializer.page_response(func(request, **kwargs))
+        return view
+    return decorator
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -26,9 +27,9 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY")
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DEBUG', 'false').lower() == 'true'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
 
 
 # Application definition
@@ -40,13 +41,21 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'ninja',
+    'core',
     'cats',
     'missions',
+    'stats',
+    'jobs',
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.metrics.RequestMetricsMiddleware',
+    'core.throttling.RateLimitMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,6 +68,9 @@ NINJA_EXTRA = {
     'PAGINATION_CLASS': 'ninja_extra.pagination.PageNumberPaginationExtra'
 }
 
+NINJA_PAGINATION_PER_PAGE = int(os.getenv('API_PAGE_SIZE', 5))
+NINJA_PAGINATION_MAX_LIMIT = int(os.getenv('API_MAX_PAGE_SIZE', 100))
+
 ROOT_URLCONF = 'core.urls'
 
 TEMPLATES = [
@@ -79,6 +91,10 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# "sync" serves cats.api and missions.api; "async" serves their async variants,
+# which only pay off under an ASGI server (core.asgi).
+API_MODE = os.getenv('API_MODE', 'sync')
+
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -94,6 +110,63 @@ DATABASES = {
     }
 }
 
+# How connections are reused, see "Database Connections" in the README:
+# "none" opens one per request, "persistent" keeps one per worker thread, "pool" uses
+# psycopg's connection pool and "external" is for a transaction pooler such as PgBouncer.
+# Under ASGI the ORM runs on a pool of threads that each would keep a persistent
+# connection open, so the async API shares psycopg's pool instead.
+POSTGRES_POOL_MODE = os.getenv('POSTGRES_POOL_MODE', 'pool' if API_MODE == 'async' else 'persistent')
+POSTGRES_CONN_MAX_AGE = int(os.getenv('POSTGRES_CONN_MAX_AGE', 60))
+
+if POSTGRES_POOL_MODE in ('persistent', 'external'):
+    DATABASES['default']['CONN_MAX_AGE'] = POSTGRES_CONN_MAX_AGE
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    # A transaction pooler may hand each transaction a different server connection,
+    # so cursors cannot outlive a transaction.
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = POSTGRES_POOL_MODE == 'external'
+elif POSTGRES_POOL_MODE == 'pool':
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('POSTGRES_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.getenv('POSTGRES_POOL_MAX_SIZE', 10)),
+            'timeout': int(os.getenv('POSTGRES_POOL_TIMEOUT', 10)),
+        }
+    }
+elif POSTGRES_POOL_MODE != 'none':
+    raise ImproperlyConfigured(f"Unknown POSTGRES_POOL_MODE {POSTGRES_POOL_MODE!r}.")
+
+# Read replicas, see core.replicas
+# POSTGRES_REPLICAS lists the replica servers as host[:port], added as replica_1, replica_2, ... with the
+# database, credentials and connection settings of the primary. Tests read the replicas from the test database.
+# GET requests read from a healthy replica unless the client wrote in the last STICKY_SECONDS (tracked with the
+# STICKY_COOKIE, and by client address in the PIN_CACHE, which must be shared by the workers); keep MAX_LAG_SECONDS
+# below it. Replicas are checked every HEALTH_CHECK_INTERVAL seconds.
+
+for number, address in enumerate(filter(None, os.getenv('POSTGRES_REPLICAS', '').split(',')), 1):
+    host, _, port = address.strip().partition(':')
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        # A replica that is down must not hold up the health check.
+        'OPTIONS': {
+            **DATABASES['default'].get('OPTIONS', {}),
+            'connect_timeout': int(os.getenv('POSTGRES_REPLICA_CONNECT_TIMEOUT', 2)),
+        },
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.replicas.ReplicaRouter']
+
+DATABASE_ROUTING = {
+    'REPLICAS': [alias for alias in DATABASES if alias != 'default'],
+    'STICKY_SECONDS': float(os.getenv('REPLICA_STICKY_SECONDS', 5)),
+    'STICKY_COOKIE': 'primary_until',
+    'PIN_CACHE': 'default',
+    'HEALTH_CHECK_INTERVAL': float(os.getenv('REPLICA_HEALTH_CHECK_INTERVAL', 5)),
+    'MAX_LAG_SECONDS': float(os.getenv('REPLICA_MAX_LAG_SECONDS', 2)),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -130,8 +203,127 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.1/howto/static-files/
 
 STATIC_URL = 'static/'
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+
+# Static files are served by WhiteNoise, compressed and with far-future cache headers.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+
+# Cache
+# Local memory by default; with several workers point CACHE_BACKEND at a shared backend
+# (e.g. django.core.cache.backends.redis.RedisCache, which needs the redis package),
+# otherwise a write only invalidates the cached responses of its own worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Read-through cache of the cat and mission detail endpoints, see core.cache.
+RESPONSE_CACHE = {
+    'ALIAS': 'default',
+    'TIMEOUT': int(os.getenv('RESPONSE_CACHE_TIMEOUT', 60 * 5)),
+}
+
+
+# Admission control, see core.throttling
+# With RATE_LIMIT, every client gets a token bucket per route class (read or write) for the PATHS: up to BURST
+# requests at once, refilled at RATE per second. BACKEND keeps the buckets per worker process (LocalBuckets) or in
+# a shared cache (CacheBuckets, OPTIONS {'cache': alias}). Behind a proxy, CLIENT_IP_HEADER names the request
+# header with the client's address, e.g. HTTP_X_FORWARDED_FOR.
+# At most MAX_CONCURRENT requests of each pool, expensive writes or exports, run at once per worker process (0 for
+# no limit); the others wait up to QUEUE_TIMEOUT seconds for a slot and then get a 503 asking to retry after
+# RETRY_AFTER seconds. Exports hold their slot until their body is sent, hence a pool of their own.
+
+THROTTLING = {
+    'RATE_LIMIT': os.getenv('RATE_LIMIT_ENABLED', 'false').lower() == 'true',
+    'BACKEND': os.getenv('RATE_LIMIT_BACKEND', 'core.throttling.LocalBuckets'),
+    'OPTIONS': {},
+    'PATHS': ['/api/'],
+    'CLIENT_IP_HEADER': os.getenv('RATE_LIMIT_CLIENT_IP_HEADER') or None,
+    'RATES': {
+        'read': {
+            'RATE': float(os.getenv('RATE_LIMIT_READ_RATE', 50)),
+            'BURST': int(os.getenv('RATE_LIMIT_READ_BURST', 100)),
+        },
+        'write': {
+            'RATE': float(os.getenv('RATE_LIMIT_WRITE_RATE', 10)),
+            'BURST': int(os.getenv('RATE_LIMIT_WRITE_BURST', 20)),
+        },
+    },
+    'MAX_CONCURRENT': {
+        'expensive': int(os.getenv('EXPENSIVE_MAX_CONCURRENT', 2)),
+        'exports': int(os.getenv('EXPORTS_MAX_CONCURRENT', 2)),
+    },
+    'QUEUE_TIMEOUT': float(os.getenv('EXPENSIVE_QUEUE_TIMEOUT', 0.25)),
+    'RETRY_AFTER': 1,
+}
+
+
+# Request metrics
+# Latency, SQL queries and upstream time per route, exported at /metrics, see core.metrics.
+# Requests over QUERY_BUDGET queries or LATENCY_BUDGET_MS milliseconds are logged.
+
+REQUEST_METRICS = {
+    'SERVER_TIMING': os.getenv('SERVER_TIMING', 'true').lower() == 'true',
+    'QUERY_BUDGET': int(os.getenv('REQUEST_QUERY_BUDGET', 20)),
+    'LATENCY_BUDGET_MS': int(os.getenv('REQUEST_LATENCY_BUDGET_MS', 500)),
+}
+
+
+# Agency statistics
+# With STATS_SNAPSHOT the /api/stats/ sections are stored, and recomputed by a job STATS_REFRESH_DELAY seconds after
+# writes affect them; the writes of that interval share the job.
+
+STATS_SNAPSHOT = os.getenv('STATS_SNAPSHOT', 'true').lower() == 'true'
+STATS_REFRESH_DELAY = int(os.getenv('STATS_REFRESH_DELAY', 5))
+
+
+# Breed registry
+# Breeds are fetched from SOURCE and cached in process, in the shared cache and in the database.
+
+BREED_REGISTRY = {
+    'SOURCE': os.getenv('BREED_SOURCE', 'cats.breeds.TheCatAPISource'),
+    'OPTIONS': {},
+    'TTL': int(os.getenv('BREED_TTL', 60 * 60 * 24)),
+    # Serve the expired snapshot and refresh it in a background job instead of during the request.
+    'REFRESH_IN_BACKGROUND': os.getenv('BREED_REFRESH_IN_BACKGROUND', 'false').lower() == 'true',
+}
+
+
+# Background jobs
+# Slow side effects are queued in the database and run by ``manage.py run_workers``, see jobs.services.
+# Failed jobs are retried up to MAX_ATTEMPTS times, waiting BACKOFF_SECONDS, then twice as long each time,
+# up to MAX_BACKOFF_SECONDS. Jobs running for over STALE_TIMEOUT seconds are assumed lost and queued again.
+
+JOBS = {
+    'MAX_ATTEMPTS': int(os.getenv('JOBS_MAX_ATTEMPTS', 5)),
+    'BACKOFF_SECONDS': float(os.getenv('JOBS_BACKOFF_SECONDS', 10)),
+    'MAX_BACKOFF_SECONDS': float(os.getenv('JOBS_MAX_BACKOFF_SECONDS', 60 * 60)),
+    'STALE_TIMEOUT': int(os.getenv('JOBS_STALE_TIMEOUT', 60 * 10)),
+    'RETENTION_DAYS': int(os.getenv('JOBS_RETENTION_DAYS', 7)),
+}
+
+
+# Worker startup
+# ``manage.py startup_profile`` fails when importing the application, or serving its first request
+# from a fresh interpreter, takes longer than this.
+
+STARTUP_BUDGET = {
+    'IMPORT_MS': float(os.getenv('STARTUP_IMPORT_BUDGET_MS', 600)),
+    'FIRST_RESPONSE_MS': float(os.getenv('STARTUP_FIRST_RESPONSE_BUDGET_MS', 1500)),
+}
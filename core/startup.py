@@ -0,0 +1,183 @@
+"""Worker startup: loading the application before it is served, and measuring how long that takes.
+
+``preload()`` runs when ``core.wsgi`` or ``core.asgi`` is imported. It loads the
+URLconf, which imports both routers and builds their pydantic schemas, and does
+no I/O, so gunicorn can run it once in the master before forking
+(``preload_app``). ``warm_up()`` then runs in every worker before it accepts
+connections (gunicorn's ``post_worker_init``): it opens the database
+connection, or the pool under ``POSTGRES_POOL_MODE=pool``, and loads the breed
+snapshot, so that the first requests do not pay for either.
+
+This module only imports the standard library at import time, so that
+``first_response_profile()`` can time the imports of the application itself.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+from typing import Callable
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+_started = time.perf_counter()
+
+
+def preload() -> None:
+    """Imports everything a request needs; safe to run before forking."""
+    from django.urls import get_resolver
+
+    get_resolver().url_patterns
+
+
+def _connect_databases() -> None:
+    from django.db import connections
+
+    for connection in connections.all():
+        connection.ensure_connection()
+    # This thread does not serve requests; a closed connection goes back to the pool if there is one.
+    connections.close_all()
+
+
+def _load_breeds() -> None:
+    from cats.breeds import get_breed_registry
+
+    get_breed_registry().breeds()
+
+
+WARM_UP_STEPS: dict[str, Callable[[], None]] = {
+    'preload': preload,
+    'database': _connect_databases,
+    'breeds': _load_breeds,
+}
+
+
+def warm_up() -> dict[str, float]:
+    """Primes a worker before it takes traffic; returns the milliseconds of each step.
+
+    A step that fails is logged and skipped: a worker that cannot warm up still
+    serves requests, which retry whatever failed.
+    """
+    timings = {}
+    for name, step in WARM_UP_STEPS.items():
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Warm-up step %s failed", name)
+        timings[name] = (time.perf_counter() - start) * 1000
+    logger.info("Worker warmed up in %.0f ms: %s", sum(timings.values()), timings)
+    return timings
+
+
+def _target(path: str) -> tuple[str, str, str]:
+    """The path and query string of ``path``, and a host that ALLOWED_HOSTS accepts."""
+    from django.conf import settings
+
+    url = urlsplit(path)
+    hosts = [host for host in settings.ALLOWED_HOSTS if host not in ('', '*') and not host.startswith('.')]
+    return url.path, url.query, hosts[0] if hosts else 'localhost'
+
+
+def _wsgi_get(application, path: str) -> int:
+    from django.test.client import FakePayload
+
+    path, query, host = _target(path)
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SCRIPT_NAME': '',
+        'SERVER_NAME': host,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'REMOTE_ADDR': '127.0.0.1',
+        'wsgi.input': FakePayload(b''),
+        'wsgi.errors': sys.stderr,
+        'wsgi.url_scheme': 'http',
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+        'wsgi.version': (1, 0),
+    }
+    statuses = []
+    response = application(environ, lambda status, headers, exc_info=None: statuses.append(int(status.split()[0])))
+    b''.join(response)
+    response.close()
+    return statuses[0]
+
+
+def _asgi_get(application, path: str) -> int:
+    path, query, host = _target(path)
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query.encode(),
+        'root_path': '',
+        'headers': [(b'host', host.encode())],
+        'client': ('127.0.0.1', 0),
+        'server': (host, 80),
+    }
+    messages, requested = [], asyncio.Event()
+
+    async def receive():
+        if not requested.is_set():
+            requested.set()
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client never disconnects; Django stops listening once the response is sent.
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(application(scope, receive, send))
+    return next(message['status'] for message in messages if message['type'] == 'http.response.start')
+
+
+def load_application() -> tuple[Callable, Callable[[Callable, str], int]]:
+    """Imports the application gunicorn serves for ``API_MODE``; returns it and a function sending it a GET."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    from django.conf import settings
+
+    if settings.API_MODE == 'async':
+        from core.asgi import application
+        return application, _asgi_get
+    from core.wsgi import application
+    return application, _wsgi_get
+
+
+def first_response_profile(path: str, warm: bool = True) -> dict:
+    """Milliseconds from the import of this module to the first response to ``path``, by phase.
+
+    The application is the one gunicorn serves for ``API_MODE``, called in process
+    without a server. Used by ``manage.py startup_profile`` in a fresh interpreter.
+    """
+    phases, start = {}, _started
+
+    def phase(name: str) -> None:
+        nonlocal start
+        now = time.perf_counter()
+        phases[name] = (now - start) * 1000
+        start = now
+
+    application, get = load_application()
+    phase('import_ms')
+
+    if warm:
+        warm_up()
+    phase('warm_up_ms')
+
+    status = get(application, path)
+    phase('first_response_ms')
+    get(application, path)
+    phase('second_response_ms')
+
+    total = phases['import_ms'] + phases['warm_up_ms'] + phases['first_response_ms']
+    return {**phases, 'status': status, 'time_to_first_response_ms': total}
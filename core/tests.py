@@ -0,0 +1,264 @@
+import json
+import time
+from unittest import skipUnless
+from unittest.mock import Mock, patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.db import DatabaseError, close_old_connections, connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from cats.breeds import get_breed_registry
+from cats.models import SpyCat
+from .db import supports_update_returning
+from .management.commands.startup_profile import parse_importtime
+from .replicas import ReplicaMiddleware, reset_replica_health, use_primary
+from .startup import WARM_UP_STEPS, preload, warm_up
+from .throttling import gcra, get_slots, limit_concurrency, reset_throttling
+
+REPLICAS = settings.DATABASE_ROUTING['REPLICAS']
+TWO_REPLICAS = {
+    **settings.DATABASE_ROUTING,
+    'REPLICAS': ['replica_1', 'replica_2'],
+    'HEALTH_CHECK_INTERVAL': 0,
+    'MAX_LAG_SECONDS': 2,
+}
+
+RATE_LIMITED = {
+    **settings.THROTTLING,
+    'RATE_LIMIT': True,
+    'RATES': {'read': {'RATE': 1, 'BURST': 2}, 'write': {'RATE': 1, 'BURST': 1}},
+}
+
+
+# Warm-up closes the connection it opened, which a TestCase transaction would not survive.
+class UpdateReturningTest(SimpleTestCase):
+    def test_supports_update_returning(self):
+        self.assertTrue(supports_update_returning(Mock(vendor='postgresql')))
+        sqlite = Mock(vendor='sqlite')
+        sqlite.Database.sqlite_version_info = (3, 34, 1)
+        self.assertFalse(supports_update_returning(sqlite))
+        sqlite.Database.sqlite_version_info = (3, 35, 0)
+        self.assertTrue(supports_update_returning(sqlite))
+        # MariaDB returns columns from an INSERT, but not from an UPDATE.
+        self.assertFalse(supports_update_returning(Mock(vendor='mysql')))
+
+
+@override_settings(BREED_REGISTRY={'SOURCE': 'cats.breeds.FixtureBreedSource', 'TTL': 60})
+class WarmUpTest(TransactionTestCase):
+    # Warm-up connects to every database, replicas included.
+    databases = '__all__'
+
+    def test_warm_up_loads_the_breeds(self):
+        self.assertEqual(set(warm_up()), {'preload', 'database', 'breeds'})
+        with self.assertNumQueries(0):
+            self.assertIn('Siamese', get_breed_registry())
+
+    def test_failed_step_does_not_stop_warm_up(self):
+        steps = {'broken': lambda: 1 / 0, 'preload': preload}
+        with patch.dict(WARM_UP_STEPS, steps, clear=True), self.assertLogs('core.startup', 'ERROR'):
+            self.assertEqual(set(warm_up()), {'broken', 'preload'})
+
+
+class ImportTimeTest(SimpleTestCase):
+    def test_import_times_are_summed_by_package(self):
+        stderr = "\n".join([
+            "import time: self [us] | cumulative | imported package",
+            "import time:      1500 |       1500 |     django.utils",
+            "import time:      2500 |       4000 |   django",
+            "import time:      1000 |       1000 | requests",
+        ])
+        total, packages = parse_importtime(stderr)
+        self.assertEqual(total, 5.0)
+        self.assertEqual(packages, {'django': 4.0, 'requests': 1.0})
+
+
+class TokenBucketTest(SimpleTestCase):
+    def test_burst_then_rate(self):
+        arrival = None
+        for _ in range(3):
+            wait, arrival = gcra(arrival, 0, rate=2, burst=3)
+            self.assertEqual(wait, 0)
+        wait, arrival = gcra(arrival, 0, rate=2, burst=3)
+        self.assertEqual(wait, 0.5)
+        self.assertEqual(gcra(arrival, 0.5, rate=2, burst=3)[0], 0)
+
+
+@override_settings(THROTTLING=RATE_LIMITED)
+class RateLimitTest(TestCase):
+    def test_reads_over_the_burst_are_rejected(self):
+        for _ in range(2):
+            self.assertEqual(self.client.get("/api/spy_cats/").status_code, 200)
+        response = self.client.get("/api/spy_cats/")
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '1')
+
+        # Other clients, and writes, have buckets of their own.
+        self.assertEqual(self.client.get("/api/spy_cats/", REMOTE_ADDR='10.0.0.2').status_code, 200)
+        response = self.client.post("/api/missions/batch/delete", {'mission_ids': [1]}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_client_ip_header(self):
+        with self.settings(THROTTLING={**RATE_LIMITED, 'CLIENT_IP_HEADER': 'HTTP_X_FORWARDED_FOR'}):
+            for _ in range(2):
+                self.client.get("/api/spy_cats/", HTTP_X_FORWARDED_FOR='10.0.0.3, 10.0.0.1')
+            self.assertEqual(self.client.get("/api/spy_cats/", HTTP_X_FORWARDED_FOR='10.0.0.3').status_code, 429)
+            self.assertEqual(self.client.get("/api/spy_cats/", HTTP_X_FORWARDED_FOR='10.0.0.4').status_code, 200)
+
+    def test_cache_backend(self):
+        with self.settings(THROTTLING={**RATE_LIMITED, 'BACKEND': 'core.throttling.CacheBuckets'}):
+            statuses = [self.client.get("/api/missions/").status_code for _ in range(3)]
+        self.assertEqual(statuses, [200, 200, 429])
+
+
+@override_settings(THROTTLING={
+    **settings.THROTTLING, 'MAX_CONCURRENT': {'expensive': 1, 'exports': 1}, 'QUEUE_TIMEOUT': 0,
+})
+class ConcurrencyLimitTest(TestCase):
+    def setUp(self):
+        # Every test starts with free slots, whatever the responses of the previous one hold.
+        reset_throttling(setting='THROTTLING')
+
+    def delete_missions(self):
+        payload = json.dumps({'mission_ids': [1]})
+        return self.client.post("/api/missions/batch/delete", payload, content_type='application/json')
+
+    def test_expensive_requests_over_the_limit_are_rejected(self):
+        slots = get_slots()
+        slots.acquire()
+        response = self.delete_missions()
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '1')
+        # Reads do not take a slot.
+        self.assertEqual(self.client.get("/api/missions/").status_code, 200)
+
+        slots.release()
+        self.assertEqual(self.delete_missions().status_code, 200)
+
+    def test_exports_hold_their_own_slot_until_streamed(self):
+        response = self.client.get("/api/missions/export")
+        self.assertEqual(self.client.get("/api/spy_cats/export").status_code, 503)
+        # Writes have slots of their own.
+        self.assertEqual(self.delete_missions().status_code, 200)
+        # The test client closes the response once its content is read, as a server does once it is sent.
+        b''.join(response)
+        self.assertEqual(self.client.get("/api/spy_cats/export").status_code, 200)
+
+    def test_export_closed_unsent_gives_its_slot_back(self):
+        response = self.client.get("/api/missions/export")
+        # As the test client does, keep closing the response from closing the test's database connection.
+        request_finished.disconnect(close_old_connections)
+        try:
+            response.close()
+        finally:
+            request_finished.connect(close_old_connections)
+        self.assertEqual(self.client.get("/api/spy_cats/export").status_code, 200)
+
+    async def test_async_views_share_the_slots(self):
+        @limit_concurrency
+        async def view(request):
+            return 'done'
+
+        slots = get_slots()
+        slots.acquire()
+        self.assertEqual((await view(None)).status_code, 503)
+        slots.release()
+        self.assertEqual(await view(None), 'done')
+
+
+@override_settings(DATABASE_ROUTING=TWO_REPLICAS)
+@patch('core.replicas.replication_lag', return_value=0)
+class ReplicaRouterTest(SimpleTestCase):
+    def setUp(self):
+        # Every test starts without checked replicas, from the first one, and without pinned clients.
+        reset_replica_health(setting='DATABASE_ROUTING')
+        cache.clear()
+
+    def read(self, method='GET', cookies=None, read=lambda: router.db_for_read(SpyCat), address='127.0.0.1'):
+        """Serves a request whose view reports the database it reads from."""
+        request = RequestFactory().generic(method, '/api/spy_cats/', REMOTE_ADDR=address)
+        request.COOKIES.update(cookies or {})
+        return ReplicaMiddleware(lambda request: HttpResponse(read()))(request)
+
+    def test_reads_of_read_requests_go_to_the_replicas(self, lag):
+        self.assertEqual([self.read().content for _ in range(3)], [b'replica_1', b'replica_2', b'replica_1'])
+        # A request keeps the replica it picked.
+        three_reads = lambda: ' '.join(router.db_for_read(SpyCat) for _ in range(3))
+        self.assertEqual(self.read(read=three_reads).content, b'replica_2 replica_2 replica_2')
+        self.assertEqual(self.read(read=lambda: router.db_for_write(SpyCat)).content, b'default')
+        self.assertEqual(router.db_for_read(SpyCat), 'default')
+
+    def test_writes_pin_the_client_to_the_primary(self, lag):
+        response = self.read('POST')
+        self.assertEqual(response.content, b'default')
+        cookie = response.cookies['primary_until']
+        self.assertEqual(cookie['max-age'], 5)
+        other = '10.0.0.2'
+        self.assertEqual(self.read(cookies={'primary_until': cookie.value}, address=other).content, b'default')
+        self.assertEqual(self.read(cookies={'primary_until': str(time.time() - 1)}, address=other).content, b'replica_1')
+
+    def test_writes_pin_clients_without_cookies_by_address(self, lag):
+        self.assertEqual(self.read('POST').content, b'default')
+        self.assertEqual(self.read().content, b'default')
+        self.assertEqual(self.read(address='10.0.0.2').content, b'replica_1')
+
+        cache.clear()
+        self.assertEqual(self.read().content, b'replica_2')
+
+    def test_use_primary(self, lag):
+        def read():
+            with use_primary():
+                return router.db_for_read(SpyCat)
+        self.assertEqual(self.read(read=read).content, b'default')
+
+    def test_unhealthy_replicas_are_skipped(self, lag):
+        lag.side_effect = lambda alias: {'replica_1': 10, 'replica_2': 0}[alias]
+        with self.assertLogs('core.replicas', 'WARNING'):
+            self.assertEqual({self.read().content for _ in range(3)}, {b'replica_2'})
+
+        lag.side_effect = DatabaseError("connection refused")
+        with self.assertLogs('core.replicas', 'WARNING'):
+            self.assertEqual(self.read().content, b'default')
+
+
+# Replicas mirror the test database; their connections only see committed rows.
+@skipUnless(REPLICAS, "Set POSTGRES_REPLICAS to test reads from replicas.")
+@override_settings(
+    DATABASE_ROUTING={**settings.DATABASE_ROUTING, 'HEALTH_CHECK_INTERVAL': 0},
+    BREED_REGISTRY={'SOURCE': 'cats.breeds.FixtureBreedSource', 'TTL': 60},
+)
+class ReplicaRoutingTest(TransactionTestCase):
+    databases = '__all__'
+
+    def test_reads_your_writes(self):
+        with CaptureQueriesContext(connections[REPLICAS[0]]) as replica:
+            response = self.client.post(
+                "/api/spy_cats/",
+                {'name': 'Tom', 'years_of_experience': 3, 'breed': 'Siamese', 'salary': 1000},
+                content_type='application/json',
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.client.get("/api/spy_cats/").json()['count'], 1)
+        self.assertEqual(len(replica), 0)
+
+        # The pin is also kept by address, for clients that drop the cookie.
+        self.client.cookies.clear()
+        with CaptureQueriesContext(connections[REPLICAS[0]]) as replica:
+            self.assertEqual(self.client.get("/api/spy_cats/").json()['count'], 1)
+        self.assertEqual(len(replica), 0)
+
+        cache.clear()
+        with CaptureQueriesContext(connections[REPLICAS[0]]) as replica:
+            self.assertEqual(self.client.get("/api/spy_cats/").json()['count'], 1)
+        self.assertTrue(replica)
+
+    def test_transactions_read_from_the_primary(self):
+        request = RequestFactory().get('/api/spy_cats/')
+
+        def read():
+            with transaction.atomic():
+                return router.db_for_read(SpyCat)
+        self.assertEqual(ReplicaMiddleware(lambda request: HttpResponse(read()))(request).content, b'default')
@@ -0,0 +1,268 @@
+"""Admission control: per-client rate limits, and a concurrency cap on expensive endpoints.
+
+``RateLimitMiddleware`` gives every client a token bucket per route class,
+``read`` for GET, HEAD and OPTIONS and ``write`` for the rest. A client may send
+up to ``BURST`` requests at once, refilled at ``RATE`` per second; once its
+bucket is empty it gets a 429 with ``Retry-After`` before the request reaches a
+view or the database. Buckets are kept in process memory by ``LocalBuckets``, or
+in a Django cache shared by all workers by ``CacheBuckets``.
+
+``@limit_concurrency`` caps how many requests to expensive endpoints, such as
+creating a mission with its targets, bulk imports and batches, run at once in a
+worker process. A request that finds no free slot within ``QUEUE_TIMEOUT``
+seconds gets a 503 with ``Retry-After``. Reads never wait for a slot, so a storm
+of writes cannot take every thread and database connection. Exports hold their
+slot until the whole body is sent, so they take slots from a pool of their own
+(``@limit_concurrency(pool='exports')``) and slow downloads cannot block writes.
+"""
+import asyncio
+import math
+import threading
+import time
+from functools import partial, wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import JsonResponse
+from django.utils.module_loading import import_string
+
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+KEY_PREFIX = "throttle"
+
+
+def gcra(arrival: float | None, now: float, rate: float, burst: int) -> tuple[float, float]:
+    """Token bucket as the generic cell rate algorithm, which needs a single value per bucket.
+
+    ``arrival`` is the time at which the bucket will be full again. Returns the
+    seconds to wait before the request is allowed, 0 if it is allowed now, and the
+    new value of ``arrival``.
+    """
+    interval = 1 / rate
+    arrival = max(arrival or now, now)
+    wait = arrival - now - interval * (burst - 1)
+    if wait > 0:
+        return wait, arrival
+    return 0.0, arrival + interval
+
+
+class LocalBuckets:
+    """Buckets in process memory: exact, but every worker process counts on its own."""
+
+    max_keys = 100_000
+
+    def __init__(self):
+        self._arrivals: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """Takes a token; returns 0, or the seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._arrivals) >= self.max_keys:
+                # Full buckets hold no information.
+                self._arrivals = {bucket: arrival for bucket, arrival in self._arrivals.items() if arrival > now}
+            wait, self._arrivals[key] = gcra(self._arrivals.get(key), now, rate, burst)
+        return wait
+
+    async def atake(self, key: str, rate: float, burst: int) -> float:
+        return self.take(key, rate, burst)
+
+
+class CacheBuckets:
+    """Buckets in a Django cache shared by the workers.
+
+    A bucket is read and written back without a lock, so concurrent requests of
+    one client may get slightly more than its rate.
+    """
+
+    def __init__(self, cache: str = 'default'):
+        self.cache = caches[cache]
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.time()
+        wait, arrival = gcra(self.cache.get(key), now, rate, burst)
+        if not wait:
+            self.cache.set(key, arrival, timeout=math.ceil(arrival - now) + 1)
+        return wait
+
+    async def atake(self, key: str, rate: float, burst: int) -> float:
+        now = time.time()
+        wait, arrival = gcra(await self.cache.aget(key), now, rate, burst)
+        if not wait:
+            await self.cache.aset(key, arrival, timeout=math.ceil(arrival - now) + 1)
+        return wait
+
+
+_buckets = None
+_slots: dict[str, threading.BoundedSemaphore] = {}
+_slots_lock = threading.Lock()
+
+
+def get_buckets() -> LocalBuckets | CacheBuckets:
+    global _buckets
+    if _buckets is None:
+        config = settings.THROTTLING
+        _buckets = import_string(config['BACKEND'])(**config.get('OPTIONS', {}))
+    return _buckets
+
+
+def get_slots(pool: str = 'expensive') -> threading.BoundedSemaphore | None:
+    """Slots of the endpoints of ``pool`` in this process, None without a limit."""
+    size = settings.THROTTLING['MAX_CONCURRENT'][pool]
+    if pool not in _slots and size:
+        with _slots_lock:
+            if pool not in _slots:
+                _slots[pool] = threading.BoundedSemaphore(size)
+    return _slots.get(pool)
+
+
+@receiver(setting_changed)
+def reset_throttling(*, setting, **kwargs):
+    global _buckets, _slots
+    if setting in ('THROTTLING', 'CACHES'):
+        _buckets, _slots = None, {}
+
+
+def client_id(request) -> str:
+    """Address of the client; behind a proxy, from the header named by CLIENT_IP_HEADER."""
+    header = settings.THROTTLING['CLIENT_IP_HEADER']
+    if header and request.META.get(header):
+        return request.META[header].split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def bucket_of(request) -> tuple[str, float, int] | None:
+    """Key, rate and burst of the bucket the request takes a token from, None if it is not limited."""
+    config = settings.THROTTLING
+    if not config['RATE_LIMIT'] or not request.path.startswith(tuple(config['PATHS'])):
+        return None
+    route_class = 'read' if request.method in READ_METHODS else 'write'
+    limit = config['RATES'][route_class]
+    return f"{KEY_PREFIX}:{route_class}:{client_id(request)}", limit['RATE'], limit['BURST']
+
+
+def rejection(status: int, detail: str, retry_after: float) -> JsonResponse:
+    response = JsonResponse({'detail': detail}, status=status)
+    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def too_many_requests(wait: float) -> JsonResponse:
+    return rejection(429, "Too many requests, slow down.", wait)
+
+
+def service_unavailable() -> JsonResponse:
+    return rejection(503, "The server is busy, try again shortly.", settings.THROTTLING['RETRY_AFTER'])
+
+
+class RateLimitMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if bucket := bucket_of(request):
+            if wait := get_buckets().take(*bucket):
+                return too_many_requests(wait)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if bucket := bucket_of(request):
+            if wait := await get_buckets().atake(*bucket):
+                return too_many_requests(wait)
+        return await self.get_response(request)
+
+
+async def _aacquire(slots: threading.BoundedSemaphore, timeout: float) -> bool:
+    # Slots are shared with the threads running sync views, so they are polled instead of awaited.
+    deadline = time.monotonic() + timeout
+    while not slots.acquire(blocking=False):
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(0.005)
+    return True
+
+
+class _ReleasingContent:
+    """Streamed content that gives its slot back once sent, or once the response is closed before that."""
+
+    def __init__(self, content, slots: threading.BoundedSemaphore):
+        self.content = content
+        self._slots = slots
+
+    def close(self) -> None:
+        # Django closes content that has a close() method along with the response.
+        slots, self._slots = self._slots, None
+        if slots is not None:
+            slots.release()
+
+
+class _SyncReleasingContent(_ReleasingContent):
+    def __iter__(self):
+        try:
+            yield from self.content
+        finally:
+            self.close()
+
+
+class _AsyncReleasingContent(_ReleasingContent):
+    async def __aiter__(self):
+        try:
+            async for chunk in self.content:
+                yield chunk
+        finally:
+            self.close()
+
+
+def _release_after(result, slots: threading.BoundedSemaphore):
+    if getattr(result, 'streaming', False):
+        # A streamed export keeps working until its body is sent.
+        content = _AsyncReleasingContent if result.is_async else _SyncReleasingContent
+        result.streaming_content = content(result.streaming_content, slots)
+    else:
+        slots.release()
+    return result
+
+
+def limit_concurrency(func=None, *, pool: str = 'expensive'):
+    """Runs the view while fewer than MAX_CONCURRENT[pool] requests of its pool run in this process, or answers 503."""
+    if func is None:
+        return partial(limit_concurrency, pool=pool)
+    if iscoroutinefunction(func):
+        @wraps(func)
+        async def view(request, *args, **kwargs):
+            slots = get_slots(pool)
+            if slots is None:
+                return await func(request, *args, **kwargs)
+            if not await _aacquire(slots, settings.THROTTLING['QUEUE_TIMEOUT']):
+                return service_unavailable()
+            try:
+                result = await func(request, *args, **kwargs)
+            except BaseException:
+                slots.release()
+                raise
+            return _release_after(result, slots)
+    else:
+        @wraps(func)
+        def view(request, *args, **kwargs):
+            slots = get_slots(pool)
+            if slots is None:
+                return func(request, *args, **kwargs)
+            if not slots.acquire(timeout=settings.THROTTLING['QUEUE_TIMEOUT']):
+                return service_unavailable()
+            try:
+                result = func(request, *args, **kwargs)
+            except BaseException:
+                slots.release()
+                raise
+            return _release_after(result, slots)
+    return view
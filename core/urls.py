@@ -1,13 +1,22 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 from ninja import NinjaAPI
 
-api = NinjaAPI(csrf=True)
+from .serialization import ORJSONRenderer
+from .views import metrics_view
 
-api.add_router("/spy_cats/", "cats.api.router")
-api.add_router("/missions/", "missions.api.router")
+api = NinjaAPI(csrf=True, renderer=ORJSONRenderer())
+
+# API_MODE selects the sync routers (cats.api) or their async variants (cats.async_api).
+api_module = "async_api" if settings.API_MODE == "async" else "api"
+api.add_router("/spy_cats/", f"cats.{api_module}.router")
+api.add_router("/missions/", f"missions.{api_module}.router")
+api.add_router("/stats/", "stats.api.router")
+api.add_router("/cache/", "core.api.router")
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", api.urls),
+    path("metrics", metrics_view),
 ]
@@ -0,0 +1,8 @@
+from django.http import HttpResponse
+
+from .metrics import registry
+
+
+def metrics_view(request):
+    """Request metrics of this worker in the Prometheus text format."""
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
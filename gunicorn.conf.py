@@ -0,0 +1,56 @@
+"""Gunicorn settings of the production profile, used by the ``web`` service in docker-compose.yml.
+
+    gunicorn -c gunicorn.conf.py
+
+With ``API_MODE=async`` the ASGI application runs on uvicorn workers; otherwise
+the WSGI application runs on threaded workers. Every value can be overridden
+from the environment.
+"""
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+
+if os.getenv('API_MODE', 'sync') == 'async':
+    wsgi_app = 'core.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    # Each worker runs an event loop, one per CPU is enough.
+    workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+else:
+    wsgi_app = 'core.wsgi:application'
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Each worker process would keep its own local-memory cache, so a write would only invalidate the cached
+# responses and stats of its own worker, and the others would serve stale ones until they expire.
+LOCAL_MEMORY_CACHE = 'django.core.cache.backends.locmem.LocMemCache'
+if workers > 1 and os.getenv('CACHE_BACKEND', LOCAL_MEMORY_CACHE) == LOCAL_MEMORY_CACHE:
+    raise RuntimeError(
+        f"{workers} workers cannot share a local-memory cache: set CACHE_BACKEND and CACHE_LOCATION to a shared "
+        "cache, such as the redis service of docker-compose.yml, or WEB_CONCURRENCY=1."
+    )
+
+# Seconds an idle client connection is kept open, and how long a request may take.
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Recycle workers now and then so that slow leaks cannot build up.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+# Access logs are off unless GUNICORN_ACCESS_LOG names a file, or "-" for stdout.
+accesslog = os.getenv('GUNICORN_ACCESS_LOG')
+errorlog = '-'
+
+# The application is imported once in the master and the workers are forked from it, so a new or recycled
+# worker starts without importing it again; see core.startup. GUNICORN_PRELOAD=false imports it in every worker.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def post_worker_init(worker):
+    """Connects to the database and loads the breeds before the worker accepts connections."""
+    from core.startup import warm_up
+
+    warm_up()
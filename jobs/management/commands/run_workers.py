@@ -0,0 +1,47 @@
+import multiprocessing
+import signal
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from jobs.worker import Worker
+
+
+def serve(threads: int, poll_interval: float, once: bool) -> None:
+    worker = Worker(threads=threads, poll_interval=poll_interval)
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: worker.stop())
+    worker.run(once=once)
+
+
+class Command(BaseCommand):
+    help = "Runs background jobs until stopped with SIGTERM or Ctrl+C, finishing the jobs in progress first."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=1, help="Worker processes.")
+        parser.add_argument('--threads', type=int, default=4, help="Jobs run concurrently by each process.")
+        parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between polls when idle.")
+        parser.add_argument('--once', action='store_true', help="Exit once no job is due.")
+
+    def handle(self, *args, **options):
+        arguments = (options['threads'], options['poll_interval'], options['once'])
+        if options['processes'] == 1:
+            serve(*arguments)
+            return
+
+        # Forked processes must not share the parent's database connections.
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        processes = [context.Process(target=serve, args=arguments) for _ in range(options['processes'])]
+        for process in processes:
+            process.start()
+
+        def stop(*args):
+            for process in processes:
+                if process.is_alive():
+                    process.terminate()
+
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, stop)
+        for process in processes:
+            process.join()
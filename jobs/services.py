@@ -0,0 +1,137 @@
+"""Background jobs stored in Postgres and run by ``manage.py run_workers``.
+
+Slow side effects are enqueued by the services and run later by a worker, so
+the request that caused them returns immediately. Handlers are registered with
+``@job('name')`` in the ``jobs`` module of an app and called with the job's
+payload as keyword arguments.
+
+Workers claim due jobs with ``SELECT ... FOR UPDATE SKIP LOCKED``, so any number
+of them can share the table without running a job twice and without waiting on
+each other. A job enqueued inside a transaction only becomes visible once it
+commits, and is dropped with it on rollback. A failed job is retried with
+exponential backoff until it runs out of attempts. A job with an
+``idempotency_key`` is enqueued at most once per key, until it is purged.
+"""
+import logging
+import random
+import traceback
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.db import update_returning
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_handlers: dict[str, Callable] = {}
+
+
+def job(name: str) -> Callable:
+    """Registers the decorated function as the handler of the ``name`` jobs."""
+    def decorator(func: Callable) -> Callable:
+        _handlers[name] = func
+        return func
+    return decorator
+
+
+def enqueue(
+    name: str,
+    payload: dict | None = None,
+    *,
+    idempotency_key: str | None = None,
+    delay: float = 0,
+    max_attempts: int | None = None,
+) -> Job | None:
+    """Adds a job to the queue, due in ``delay`` seconds.
+
+    Returns None without adding anything if a job with ``idempotency_key`` already exists.
+    """
+    new_job = Job(
+        name=name,
+        payload=payload or {},
+        idempotency_key=idempotency_key,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOBS['MAX_ATTEMPTS'],
+    )
+    if idempotency_key is None:
+        new_job.save()
+        return new_job
+    try:
+        with transaction.atomic():
+            new_job.save()
+    except IntegrityError:
+        return None
+    return new_job
+
+
+def claim(worker: str, limit: int) -> list[Job]:
+    """Marks up to ``limit`` due jobs as running by ``worker`` and returns them, oldest first."""
+    due = (
+        Job.objects.select_for_update(skip_locked=True)
+        .filter(status=Job.QUEUED, run_at__lte=timezone.now())
+        .order_by('run_at')
+        .values('id')[:limit]
+    )
+    with transaction.atomic():
+        jobs = update_returning(
+            Job.objects.filter(id__in=due),
+            status=Job.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_at=timezone.now(),
+            locked_by=worker,
+        )
+    return sorted(jobs, key=lambda claimed: claimed.run_at)
+
+
+def backoff(attempts: int) -> float:
+    """Seconds to wait before retrying a job that failed ``attempts`` times, with jitter."""
+    config = settings.JOBS
+    delay = min(config['BACKOFF_SECONDS'] * 2 ** (attempts - 1), config['MAX_BACKOFF_SECONDS'])
+    return delay * random.uniform(0.5, 1)
+
+
+def run(claimed: Job) -> None:
+    """Runs a claimed job and records the outcome: done, retried later, or failed for good."""
+    handler = _handlers.get(claimed.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler is registered for job '{claimed.name}'.")
+        handler(**claimed.payload)
+    except Exception as e:
+        retry = handler is not None and claimed.attempts < claimed.max_attempts
+        logger.warning(
+            "Job %s (%s) failed on attempt %d of %d%s: %s", claimed.id, claimed.name, claimed.attempts,
+            claimed.max_attempts, ", retrying" if retry else "", e,
+        )
+        changes = {'last_error': traceback.format_exc(), 'locked_at': None, 'locked_by': ''}
+        if retry:
+            changes.update(status=Job.QUEUED, run_at=timezone.now() + timedelta(seconds=backoff(claimed.attempts)))
+        else:
+            changes.update(status=Job.FAILED, finished_at=timezone.now())
+    else:
+        changes = {'status': Job.SUCCEEDED, 'finished_at': timezone.now(), 'locked_at': None, 'locked_by': ''}
+
+    # Only the worker holding the job may record its outcome; a job requeued as stale belongs to another.
+    Job.objects.filter(id=claimed.id, status=Job.RUNNING, locked_by=claimed.locked_by).update(**changes)
+
+
+def requeue_stale(timeout: float | None = None) -> int:
+    """Queues again the jobs that have been running for over ``timeout`` seconds, e.g. after a worker died."""
+    timeout = settings.JOBS['STALE_TIMEOUT'] if timeout is None else timeout
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=timezone.now() - timedelta(seconds=timeout)
+    ).update(status=Job.QUEUED, run_at=timezone.now(), locked_at=None, locked_by='')
+
+
+def purge(days: float | None = None) -> int:
+    """Deletes jobs that finished over ``days`` days ago, which also frees their idempotency keys."""
+    days = settings.JOBS['RETENTION_DAYS'] if days is None else days
+    deleted, _ = Job.objects.filter(
+        status__in=[Job.SUCCEEDED, Job.FAILED], finished_at__lt=timezone.now() - timedelta(days=days)
+    ).delete()
+    return deleted
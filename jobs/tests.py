@@ -0,0 +1,115 @@
+import threading
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from .models import Job
+from .services import claim, enqueue, job, purge, requeue_stale, run
+
+calls = []
+
+
+@job('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@job('tests.fail')
+def fail():
+    raise RuntimeError("always fails")
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_delayed_jobs_are_not_claimed_early(self):
+        enqueue('tests.record', {'value': 1}, delay=60)
+        self.assertEqual(claim('test', 10), [])
+
+    def test_failed_job_is_retried_with_backoff(self):
+        enqueue('tests.fail', max_attempts=2)
+        with self.assertLogs('jobs.services', 'WARNING'):
+            run(claim('test', 1)[0])
+        failed = Job.objects.get()
+        self.assertEqual((failed.status, failed.attempts), (Job.QUEUED, 1))
+        self.assertGreater(failed.run_at, timezone.now())
+        self.assertIn('always fails', failed.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        with self.assertLogs('jobs.services', 'WARNING'):
+            run(claim('test', 1)[0])
+        failed.refresh_from_db()
+        self.assertEqual((failed.status, failed.attempts), (Job.FAILED, 2))
+
+    def test_unknown_job_fails_without_retrying(self):
+        enqueue('tests.unknown')
+        with self.assertLogs('jobs.services', 'WARNING'):
+            run(claim('test', 1)[0])
+        self.assertEqual(Job.objects.get().status, Job.FAILED)
+
+    def test_stale_jobs_are_requeued(self):
+        enqueue('tests.record', {'value': 1})
+        stale = claim('dead worker', 1)[0]
+        self.assertEqual(requeue_stale(timeout=60), 0)
+        Job.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(requeue_stale(timeout=60), 1)
+
+        run(claim('test', 1)[0])
+        # The worker that lost the job must not overwrite the outcome recorded by the new one.
+        run(stale)
+        self.assertEqual(calls, [1, 1])
+        self.assertEqual(Job.objects.get().attempts, 2)
+
+
+# Workers run jobs on their own threads and connections, which only see committed rows.
+class WorkerTest(TransactionTestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueued_jobs_run_with_their_payload(self):
+        enqueue('tests.record', {'value': 1})
+        enqueue('tests.record', {'value': 2})
+        call_command('run_workers', once=True, threads=2)
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(set(Job.objects.values_list('status', flat=True)), {Job.SUCCEEDED})
+
+    def test_idempotency_key_enqueues_once(self):
+        self.assertIsNotNone(enqueue('tests.record', {'value': 1}, idempotency_key='once'))
+        self.assertIsNone(enqueue('tests.record', {'value': 2}, idempotency_key='once'))
+        call_command('run_workers', once=True)
+        self.assertEqual(calls, [1])
+
+    def test_purge_frees_idempotency_keys(self):
+        enqueue('tests.record', {'value': 1}, idempotency_key='key')
+        call_command('run_workers', once=True)
+        Job.objects.update(finished_at=timezone.now() - timedelta(days=30))
+        self.assertEqual(purge(days=7), 1)
+        self.assertIsNotNone(enqueue('tests.record', {'value': 2}, idempotency_key='key'))
+
+    def test_each_job_is_claimed_once(self):
+        for value in range(20):
+            enqueue('tests.record', {'value': value})
+
+        barrier = threading.Barrier(4)
+        claimed = []
+
+        def worker(name):
+            try:
+                barrier.wait()
+                while jobs := claim(name, 3):
+                    claimed.extend(jobs)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker, args=(f'worker {i}',)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        claimed_ids = sorted(claimed_job.id for claimed_job in claimed)
+        self.assertEqual(claimed_ids, sorted(Job.objects.values_list('id', flat=True)))
@@ -0,0 +1,84 @@
+"""The loop that claims and runs jobs, used by ``manage.py run_workers``."""
+import logging
+import os
+import socket
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from django.conf import settings
+from django.db import close_old_connections, connections
+
+from . import services
+
+logger = logging.getLogger(__name__)
+
+
+class Worker:
+    """Runs jobs on ``threads`` threads, polling the queue every ``poll_interval`` seconds when idle."""
+
+    def __init__(self, threads: int = 4, poll_interval: float = 1.0, name: str | None = None):
+        self.threads = threads
+        self.poll_interval = poll_interval
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        """Stops claiming jobs; the ones already claimed are finished first."""
+        self._stopping.set()
+
+    def run(self, once: bool = False) -> None:
+        """Runs jobs until stopped, or with ``once`` until no job is due."""
+        logger.info("Worker %s started with %d threads", self.name, self.threads)
+        running: set[Future] = set()
+        next_maintenance = 0.0
+        with ThreadPoolExecutor(self.threads, thread_name_prefix='job') as pool:
+            while not self._stopping.is_set():
+                if time.monotonic() >= next_maintenance:
+                    self._maintain()
+                    next_maintenance = time.monotonic() + settings.JOBS['STALE_TIMEOUT'] / 2
+
+                running = {future for future in running if not future.done()}
+                free = self.threads - len(running)
+                claimed = services.claim(self.name, free) if free else []
+                running |= {pool.submit(self._run, job) for job in claimed}
+
+                if claimed:
+                    continue
+                if running and (once or not free):
+                    wait(running, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                elif once:
+                    break
+                else:
+                    self._stopping.wait(self.poll_interval)
+            wait(running)
+            self._close_connections(pool)
+        logger.info("Worker %s stopped", self.name)
+
+    def _run(self, job) -> None:
+        # Pool threads keep their connection between jobs, as request threads do between requests.
+        close_old_connections()
+        try:
+            services.run(job)
+        except Exception:
+            logger.exception("Worker %s could not record the outcome of job %s", self.name, job.id)
+        finally:
+            close_old_connections()
+
+    def _close_connections(self, pool: ThreadPoolExecutor) -> None:
+        # Each pool thread has its own connections; the barrier makes every thread take one task.
+        barrier = threading.Barrier(self.threads)
+
+        def close():
+            barrier.wait()
+            connections.close_all()
+
+        wait([pool.submit(close) for _ in range(self.threads)])
+
+    def _maintain(self) -> None:
+        try:
+            if requeued := services.requeue_stale():
+                logger.warning("Requeued %d stale jobs", requeued)
+            services.purge()
+        except Exception:
+            logger.exception("Worker %s failed to clean up the job queue", self.name)
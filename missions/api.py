@@ -1,17 +1,51 @@
-from ninja import Router
+from ninja import Query, Router
 from ninja.errors import HttpError
-from ninja.pagination import paginate, PageNumberPagination
-
-from .schemas import MissionSchema, CreateMissionSchema, TargetSchema
+from ninja.pagination import paginate
+
+from core.bulk import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, read_items
+from core.cache import cached_response
+from core.concurrency import PreconditionFailed, conditional_write
+from core.exports import ExportFormat, csv_response, ndjson_response
+from core.pagination import AgencyPagination
+from core.schemas import BatchResultSchema, BulkImportResultSchema
+from core.serialization import serialize_rows
+from core.throttling import limit_concurrency
+
+from .schemas import (
+    BatchAssignCatsSchema,
+    MissionIdsSchema,
+    MissionSchema,
+    CreateMissionSchema,
+    MissionFilterSchema,
+    MissionOrdering,
+    PatchMissionSchema,
+    PatchTargetSchema,
+    TargetIdsSchema,
+    TargetSchema,
+)
 from .services import (
+    bulk_create_missions,
+    export_missions,
+    mission_csv_rows,
+    MISSION_CSV_FIELDS,
     create_mission_with_targets,
-    list_missions,
+    list_mission_rows,
     get_mission,
+    get_target_or_404,
+    mission_cache_dependencies,
+    mission_cache_tag,
+    mission_row_serializer,
     assign_cat_to_mission,
+    assign_cats_to_missions,
     remove_cat_from_mission,
+    remove_cats_from_missions,
     delete_mission,
+    delete_missions,
     mark_target_as_completed,
+    complete_targets,
     update_target_notes,
+    patch_mission,
+    patch_target,
 
 )
 
@@ -19,6 +53,7 @@ router = Router(tags=["Missions"])
 
 
 @router.post("/", response=MissionSchema)
+@limit_concurrency
 def create_mission_view(request, payload: CreateMissionSchema):
     try:
         create_mission = create_mission_with_targets(payload)
@@ -27,16 +62,88 @@ def create_mission_view(request, payload: CreateMissionSchema):
         raise HttpError(400, f"Error: {str(e)}")
 
 
+@router.post("/bulk", response=BulkImportResultSchema)
+@limit_concurrency
+def bulk_create_missions_view(request, chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE)):
+    """Imports missions from a JSON array or an NDJSON stream (`Content-Type: application/x-ndjson`)."""
+    try:
+        return bulk_create_missions(read_items(request), chunk_size)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/batch/assign-cat", response=BatchResultSchema)
+@limit_concurrency
+def assign_cats_to_missions_view(request, payload: BatchAssignCatsSchema):
+    """Assigns a cat to each mission; the results report the outcome of every mission."""
+    try:
+        return assign_cats_to_missions((item.mission_id, item.cat_id) for item in payload.assignments)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/batch/remove-cat", response=BatchResultSchema)
+@limit_concurrency
+def remove_cats_from_missions_view(request, payload: MissionIdsSchema):
+    try:
+        return remove_cats_from_missions(payload.mission_ids)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/batch/complete-targets", response=BatchResultSchema)
+@limit_concurrency
+def complete_targets_view(request, payload: TargetIdsSchema):
+    try:
+        return complete_targets(payload.target_ids)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/batch/delete", response=BatchResultSchema)
+@limit_concurrency
+def delete_missions_view(request, payload: MissionIdsSchema):
+    try:
+        return delete_missions(payload.mission_ids)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
 @router.get("/", response=list[MissionSchema])
-@paginate(PageNumberPagination, page_size=5)
-def list_missions_view(request):
+@serialize_rows(mission_row_serializer)
+@paginate(AgencyPagination)
+def list_missions_view(
+    request,
+    filters: MissionFilterSchema = Query(...),
+    ordering: MissionOrdering = Query('id', description="Applies to page numbers; keyset pages are ordered by ID."),
+):
     try:
-        return list_missions()
+        return list_mission_rows(filters, ordering)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.get("/export")
+@limit_concurrency(pool='exports')
+def export_missions_view(
+    request,
+    format: ExportFormat = 'ndjson',
+    is_completed: bool | None = None,
+    assigned_cat: int | None = None,
+):
+    try:
+        missions = export_missions(is_completed=is_completed, assigned_cat=assigned_cat)
+        if format == 'csv':
+            return csv_response(missions, MISSION_CSV_FIELDS, 'missions', expand=mission_csv_rows)
+        return ndjson_response(missions, 'missions')
     except Exception as e:
         raise HttpError(400, f"Error: {str(e)}")
 
 
 @router.get("/{mission_id}/", response=MissionSchema)
+@cached_response(
+    MissionSchema, tags=lambda mission_id: [mission_cache_tag(mission_id)], depends_on=mission_cache_dependencies
+)
 def get_mission_view(request, mission_id: int):
     try:
         return get_mission(mission_id)
@@ -44,10 +151,28 @@ def get_mission_view(request, mission_id: int):
         raise HttpError(400, f"Error: {str(e)}")
 
 
+@router.patch("/{mission_id}/", response=MissionSchema)
+def patch_mission_view(request, mission_id: int, payload: PatchMissionSchema):
+    try:
+        return conditional_write(
+            request, MissionSchema, lambda: get_mission(mission_id),
+            lambda version: patch_mission(mission_id, payload, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
 @router.patch("/{mission_id}/assign-cat/{cat_id}/", response=MissionSchema)
 def assign_cat_to_mission_view(request, mission_id: int, cat_id: int):
     try:
-        return assign_cat_to_mission(mission_id, cat_id)
+        return conditional_write(
+            request, MissionSchema, lambda: get_mission(mission_id),
+            lambda version: assign_cat_to_mission(mission_id, cat_id, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
     except Exception as e:
         raise HttpError(400, f"Error: {str(e)}")
 
@@ -55,7 +180,25 @@ def assign_cat_to_mission_view(request, mission_id: int, cat_id: int):
 @router.patch("/{mission_id}/remove-cat/", response=MissionSchema)
 def remove_cat_from_mission_view(request, mission_id: int):
     try:
-        return remove_cat_from_mission(mission_id)
+        return conditional_write(
+            request, MissionSchema, lambda: get_mission(mission_id),
+            lambda version: remove_cat_from_mission(mission_id, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{mission_id}/target/{target_id}/", response=TargetSchema)
+def patch_target_view(request, mission_id: int, target_id: int, payload: PatchTargetSchema):
+    try:
+        return conditional_write(
+            request, TargetSchema, lambda: get_target_or_404(target_id),
+            lambda version: patch_target(mission_id, target_id, payload, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
     except Exception as e:
         raise HttpError(400, f"Error: {str(e)}")
 
@@ -63,7 +206,12 @@ def remove_cat_from_mission_view(request, mission_id: int):
 @router.patch("/{mission_id}/target/{target_id}/complete/", response=TargetSchema)
 def mark_target_as_completed_view(request, mission_id: int, target_id: int):
     try:
-        return mark_target_as_completed(target_id)
+        return conditional_write(
+            request, TargetSchema, lambda: get_target_or_404(target_id),
+            lambda version: mark_target_as_completed(target_id, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
     except Exception as e:
         raise HttpError(400, f"Error: {str(e)}")
 
@@ -71,7 +219,12 @@ def mark_target_as_completed_view(request, mission_id: int, target_id: int):
 @router.patch("/{mission_id}/target/{target_id}/notes/", response=TargetSchema)
 def update_target_notes_view(request, mission_id: int, target_id: int, new_notes: str):
     try:
-        return update_target_notes(target_id, new_notes)
+        return conditional_write(
+            request, TargetSchema, lambda: get_target_or_404(target_id),
+            lambda version: update_target_notes(target_id, new_notes, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
     except Exception as e:
         raise HttpError(400, f"Error: {str(e)}")
 
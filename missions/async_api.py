@@ -0,0 +1,236 @@
+"""Async variant of missions.api, served when API_MODE is "async"."""
+from ninja import Query
+from ninja.errors import HttpError
+from ninja.pagination import paginate
+
+from core.bulk import DEFAULT_CHUNK_SIZE, MAX_CHUNK_SIZE, read_items
+from core.cache import cached_response
+from core.concurrency import PreconditionFailed, aconditional_write
+from core.exports import ExportFormat, csv_response, ndjson_response
+from core.pagination import AgencyPagination
+from core.routers import ReusableRouter
+from core.schemas import BatchResultSchema, BulkImportResultSchema
+from core.serialization import serialize_rows
+from core.throttling import limit_concurrency
+
+from .schemas import (
+    BatchAssignCatsSchema,
+    MissionIdsSchema,
+    MissionSchema,
+    CreateMissionSchema,
+    MissionFilterSchema,
+    MissionOrdering,
+    PatchMissionSchema,
+    PatchTargetSchema,
+    TargetIdsSchema,
+    TargetSchema,
+)
+from .services import (
+    MISSION_CSV_FIELDS,
+    aassign_cat_to_mission,
+    aassign_cats_to_missions,
+    abulk_create_missions,
+    acomplete_targets,
+    acreate_mission_with_targets,
+    adelete_mission,
+    adelete_missions,
+    aexport_missions,
+    aget_mission,
+    aget_target_or_404,
+    amark_target_as_completed,
+    apatch_mission,
+    apatch_target,
+    aremove_cat_from_mission,
+    aremove_cats_from_missions,
+    aupdate_target_notes,
+    list_mission_rows,
+    mission_cache_dependencies,
+    mission_cache_tag,
+    mission_csv_rows,
+    mission_row_serializer,
+)
+
+# Reusable: core.urls and the tests of these views both mount it.
+router = ReusableRouter(tags=["Missions"])
+
+
+@router.post("/", response=MissionSchema)
+@limit_concurrency
+async def create_mission_view(request, payload: CreateMissionSchema):
+    try:
+        return await acreate_mission_with_targets(payload)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/bulk", response=BulkImportResultSchema)
+@limit_concurrency
+async def bulk_create_missions_view(request, chunk_size: int = Query(DEFAULT_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE)):
+    """Imports missions from a JSON array or an NDJSON stream (`Content-Type: application/x-ndjson`)."""
+    try:
+        return await abulk_create_missions(read_items(request), chunk_size)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/batch/assign-cat", response=BatchResultSchema)
+@limit_concurrency
+async def assign_cats_to_missions_view(request, payload: BatchAssignCatsSchema):
+    """Assigns a cat to each mission; the results report the outcome of every mission."""
+    try:
+        return await aassign_cats_to_missions((item.mission_id, item.cat_id) for item in payload.assignments)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/batch/remove-cat", response=BatchResultSchema)
+@limit_concurrency
+async def remove_cats_from_missions_view(request, payload: MissionIdsSchema):
+    try:
+        return await aremove_cats_from_missions(payload.mission_ids)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/batch/complete-targets", response=BatchResultSchema)
+@limit_concurrency
+async def complete_targets_view(request, payload: TargetIdsSchema):
+    try:
+        return await acomplete_targets(payload.target_ids)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.post("/batch/delete", response=BatchResultSchema)
+@limit_concurrency
+async def delete_missions_view(request, payload: MissionIdsSchema):
+    try:
+        return await adelete_missions(payload.mission_ids)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.get("/", response=list[MissionSchema])
+@serialize_rows(mission_row_serializer)
+@paginate(AgencyPagination)
+async def list_missions_view(
+    request,
+    filters: MissionFilterSchema = Query(...),
+    ordering: MissionOrdering = Query('id', description="Applies to page numbers; keyset pages are ordered by ID."),
+):
+    try:
+        return list_mission_rows(filters, ordering)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.get("/export")
+@limit_concurrency(pool='exports')
+async def export_missions_view(
+    request,
+    format: ExportFormat = 'ndjson',
+    is_completed: bool | None = None,
+    assigned_cat: int | None = None,
+):
+    missions = aexport_missions(is_completed=is_completed, assigned_cat=assigned_cat)
+    if format == 'csv':
+        return csv_response(missions, MISSION_CSV_FIELDS, 'missions', expand=mission_csv_rows)
+    return ndjson_response(missions, 'missions')
+
+
+@router.get("/{mission_id}/", response=MissionSchema)
+@cached_response(
+    MissionSchema, tags=lambda mission_id: [mission_cache_tag(mission_id)], depends_on=mission_cache_dependencies
+)
+async def get_mission_view(request, mission_id: int):
+    try:
+        return await aget_mission(mission_id)
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{mission_id}/", response=MissionSchema)
+async def patch_mission_view(request, mission_id: int, payload: PatchMissionSchema):
+    try:
+        return await aconditional_write(
+            request, MissionSchema, lambda: aget_mission(mission_id),
+            lambda version: apatch_mission(mission_id, payload, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{mission_id}/assign-cat/{cat_id}/", response=MissionSchema)
+async def assign_cat_to_mission_view(request, mission_id: int, cat_id: int):
+    try:
+        return await aconditional_write(
+            request, MissionSchema, lambda: aget_mission(mission_id),
+            lambda version: aassign_cat_to_mission(mission_id, cat_id, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{mission_id}/remove-cat/", response=MissionSchema)
+async def remove_cat_from_mission_view(request, mission_id: int):
+    try:
+        return await aconditional_write(
+            request, MissionSchema, lambda: aget_mission(mission_id),
+            lambda version: aremove_cat_from_mission(mission_id, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{mission_id}/target/{target_id}/", response=TargetSchema)
+async def patch_target_view(request, mission_id: int, target_id: int, payload: PatchTargetSchema):
+    try:
+        return await aconditional_write(
+            request, TargetSchema, lambda: aget_target_or_404(target_id),
+            lambda version: apatch_target(mission_id, target_id, payload, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{mission_id}/target/{target_id}/complete/", response=TargetSchema)
+async def mark_target_as_completed_view(request, mission_id: int, target_id: int):
+    try:
+        return await aconditional_write(
+            request, TargetSchema, lambda: aget_target_or_404(target_id),
+            lambda version: amark_target_as_completed(target_id, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.patch("/{mission_id}/target/{target_id}/notes/", response=TargetSchema)
+async def update_target_notes_view(request, mission_id: int, target_id: int, new_notes: str):
+    try:
+        return await aconditional_write(
+            request, TargetSchema, lambda: aget_target_or_404(target_id),
+            lambda version: aupdate_target_notes(target_id, new_notes, version),
+        )
+    except PreconditionFailed as e:
+        raise HttpError(412, f"Error: {str(e)}")
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
+
+
+@router.delete("/{mission_id}/", response=dict)
+async def delete_mission_view(request, mission_id: int):
+    try:
+        await adelete_mission(mission_id)
+        return {"success": True}
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
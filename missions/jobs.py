@@ -0,0 +1,16 @@
+import logging
+
+from jobs.services import job
+from .models import Mission
+
+logger = logging.getLogger(__name__)
+
+
+@job('missions.notify_mission_completed')
+def notify_mission_completed(mission_id: int):
+    """Reports a completed mission, outside the request that completed it; enqueued by mark_target_as_completed."""
+    mission = Mission.objects.select_related('assigned_cat').filter(id=mission_id).first()
+    if mission is None:
+        return
+    cat = mission.assigned_cat.name if mission.assigned_cat else 'no cat'
+    logger.info("Mission '%s' (%s) was completed by %s", mission.name, mission.id, cat)
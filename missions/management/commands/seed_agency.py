@@ -0,0 +1,78 @@
+import random
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from cats.models import SpyCat
+from missions.models import Mission, Target
+
+BREEDS = ['Siamese', 'Maine Coon', 'Persian', 'Bengal', 'Sphynx', 'Ragdoll', 'Abyssinian', 'Birman']
+COUNTRIES = ['Ukraine', 'Poland', 'France', 'Spain', 'Italy', 'Germany', 'Japan', 'Brazil', 'Canada', 'Egypt']
+NOTE_WORDS = ['embassy', 'courier', 'safehouse', 'rooftop', 'harbor', 'casino', 'train', 'archive', 'border', 'market']
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills the database with generated spy cats, missions and targets. "
+        "Each cat gets at most one active mission; the other missions are completed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--cats', type=int, default=1000)
+        parser.add_argument('--missions', type=int, default=10000)
+        parser.add_argument('--targets-per-mission', type=int, default=4)
+        parser.add_argument('--batch-size', type=int, default=5000, help="Missions inserted per transaction.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, so runs are reproducible.")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        cat_count, mission_count = options['cats'], options['missions']
+        targets_per_mission, batch_size = options['targets_per_mission'], options['batch_size']
+
+        cat_ids = []
+        for start in range(0, cat_count, batch_size):
+            cats = SpyCat.objects.bulk_create(
+                SpyCat(
+                    name=f'Agent {i}',
+                    years_of_experience=rng.randint(0, 20),
+                    breed=rng.choice(BREEDS),
+                    salary=rng.randint(500, 5000),
+                )
+                for i in range(start, min(start + batch_size, cat_count))
+            )
+            cat_ids.extend(cat.id for cat in cats)
+
+        for start in range(0, mission_count, batch_size):
+            with transaction.atomic():
+                self.insert_missions(rng, range(start, min(start + batch_size, mission_count)), cat_ids, targets_per_mission)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {cat_count} cats, {mission_count} missions and {mission_count * targets_per_mission} targets."
+        ))
+
+    def insert_missions(self, rng, numbers, cat_ids, targets_per_mission):
+        missions, targets = [], []
+        for i in numbers:
+            # The first mission of each cat is active, later ones are completed.
+            active = i < len(cat_ids)
+            completed_targets = rng.randint(0, max(targets_per_mission - 1, 0)) if active else targets_per_mission
+            mission = Mission(
+                name=f'Operation {i}',
+                description=f'Operation {i} near the {rng.choice(NOTE_WORDS)} in {rng.choice(COUNTRIES)}',
+                assigned_cat_id=cat_ids[i % len(cat_ids)] if cat_ids else None,
+                is_completed=not active,
+                remaining_targets=targets_per_mission - completed_targets,
+            )
+            missions.append(mission)
+            targets.extend(
+                Target(
+                    mission=mission,
+                    name=f'Target {i}.{j}',
+                    country=rng.choice(COUNTRIES),
+                    notes=' '.join(rng.sample(NOTE_WORDS, 3)),
+                    is_completed=j < completed_targets,
+                )
+                for j in range(targets_per_mission)
+            )
+        Mission.objects.bulk_create(missions)
+        Target.objects.bulk_create(targets)
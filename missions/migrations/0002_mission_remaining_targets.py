@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:07
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_remaining_targets(apps, schema_editor):
+    Mission = apps.get_model('missions', 'Mission')
+    Target = apps.get_model('missions', 'Target')
+    remaining = (
+        Target.objects.filter(mission=OuterRef('pk'), is_completed=False)
+        .order_by()
+        .values('mission')
+        .annotate(count=Count('*'))
+        .values('count')
+    )
+    Mission.objects.update(remaining_targets=Coalesce(Subquery(remaining), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mission',
+            name='remaining_targets',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_remaining_targets, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0002_breed'),
+        ('missions', '0002_mission_remaining_targets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(fields=['is_completed', 'id'], name='mission_completed_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='target',
+            index=models.Index(condition=models.Q(('is_completed', False)), fields=['mission'], name='target_open_by_mission_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='mission',
+            constraint=models.UniqueConstraint(condition=models.Q(('assigned_cat__isnull', False), ('is_completed', False)), fields=('assigned_cat',), name='mission_one_active_per_cat', violation_error_message='Spy cat already has an active mission.'),
+        ),
+    ]
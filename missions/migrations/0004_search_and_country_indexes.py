@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:18
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cats', '0003_list_filter_indexes'),
+        ('missions', '0003_indexes_and_active_mission_constraint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mission',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('description', config='english'), name='mission_description_search_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='target',
+            index=models.Index(fields=['country', 'mission'], name='target_country_mission_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='target',
+            index=django.contrib.postgres.indexes.GinIndex(django.contrib.postgres.search.SearchVector('notes', config='english'), name='target_notes_search_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0004_search_and_country_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mission',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='target',
+            name='version',
+            field=models.PositiveIntegerField(default=1),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('missions', '0005_mission_target_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mission',
+            name='completed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
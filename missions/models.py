@@ -1,12 +1,43 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector
 from django.db import models
 from cats.models import SpyCat
 
+SEARCH_CONFIG = 'english'
+
+
+def search_vector(field: str) -> SearchVector:
+    """Full-text vector of ``field``; queries must use this exact expression to hit the GIN indexes."""
+    return SearchVector(field, config=SEARCH_CONFIG)
+
 
 class Mission(models.Model):
     name = models.CharField(max_length=255)
     description = models.TextField()
     assigned_cat = models.ForeignKey(SpyCat, related_name='missions', on_delete=models.SET_NULL, null=True, blank=True)
     is_completed = models.BooleanField(default=False)
+    # Set by missions.services when the last target is completed; null for missions completed before it was recorded.
+    completed_at = models.DateTimeField(null=True, blank=True)
+    # Number of incomplete targets, maintained by missions.services so completion rolls up in O(1).
+    remaining_targets = models.PositiveIntegerField(default=0)
+    # Incremented by every write, see core.concurrency.
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Listing and exporting by completion state, in ID order.
+            models.Index(fields=['is_completed', 'id'], name='mission_completed_id_idx'),
+            GinIndex(search_vector('description'), name='mission_description_search_idx'),
+        ]
+        constraints = [
+            # A cat works on one mission at a time; also serves lookups of a cat's active mission.
+            models.UniqueConstraint(
+                fields=['assigned_cat'],
+                condition=models.Q(is_completed=False, assigned_cat__isnull=False),
+                name='mission_one_active_per_cat',
+                violation_error_message="Spy cat already has an active mission.",
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -18,6 +49,16 @@ class Target(models.Model):
     country = models.CharField(max_length=255)
     notes = models.TextField(blank=True, null=True)
     is_completed = models.BooleanField(default=False)
+    version = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Open targets of a mission, checked when targets are modified or completed.
+            models.Index(fields=['mission'], condition=models.Q(is_completed=False), name='target_open_by_mission_idx'),
+            # Missions filtered by target country.
+            models.Index(fields=['country', 'mission'], name='target_country_mission_idx'),
+            GinIndex(search_vector('notes'), name='target_notes_search_idx'),
+        ]
 
     def __str__(self):
         return self.name
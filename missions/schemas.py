@@ -1,9 +1,14 @@
-from typing import List
+from typing import List, Literal
 
-from ninja import Schema
+from django.contrib.postgres.search import SearchQuery, SearchVectorExact
+from django.db.models import Exists, OuterRef, Q
+from ninja import Field, FilterSchema, Schema
 from pydantic import field_validator
+from typing_extensions import TypedDict
 
-from cats.schemas import SpyCatSchema
+from cats.schemas import SpyCatRow, SpyCatSchema
+from core.bulk import MAX_BATCH_SIZE
+from .models import SEARCH_CONFIG, Target, search_vector
 
 
 class TargetSchema(Schema):
@@ -20,9 +25,72 @@ class MissionSchema(Schema):
     description: str
     assigned_cat: SpyCatSchema | None
     is_completed: bool
+    remaining_targets: int
     targets: List[TargetSchema]
 
 
+class TargetRow(TypedDict):
+    """TargetSchema for ``.values()`` rows, see core.serialization."""
+    id: int
+    name: str
+    country: str
+    notes: str
+    is_completed: bool
+
+
+class MissionRow(TypedDict):
+    """MissionSchema for ``.values()`` rows, see core.serialization."""
+    id: int
+    name: str
+    description: str
+    assigned_cat: SpyCatRow | None
+    is_completed: bool
+    remaining_targets: int
+    targets: List[TargetRow]
+
+
+class CatMissionSchema(Schema):
+    """A mission as listed in its cat's dossier, which already shows the cat."""
+    id: int
+    name: str
+    description: str
+    is_completed: bool
+    remaining_targets: int
+    targets: List[TargetSchema]
+
+
+class SpyCatDossierSchema(SpyCatSchema):
+    current_mission: CatMissionSchema | None = Field(None, description="The mission the cat is working on.")
+    past_missions: List[CatMissionSchema] = Field(..., description="Completed missions, most recent first.")
+
+    @staticmethod
+    def resolve_current_mission(cat):
+        # At most one, see the mission_one_active_per_cat constraint.
+        return cat.active_missions[0] if cat.active_missions else None
+
+
+class MissionFilterSchema(FilterSchema):
+    is_completed: bool | None = None
+    assigned_cat: int | None = Field(None, q='assigned_cat_id')
+    country: str | None = Field(None, description="Missions with at least one target in this country.")
+    search: str | None = Field(None, description="Full-text search over the description and target notes.")
+
+    def filter_country(self, value: str | None) -> Q:
+        if not value:
+            return Q()
+        return Q(Exists(Target.objects.filter(mission=OuterRef('pk'), country=value)))
+
+    def filter_search(self, value: str | None) -> Q:
+        if not value:
+            return Q()
+        query = SearchQuery(value, config=SEARCH_CONFIG, search_type='websearch')
+        matching_targets = Target.objects.filter(SearchVectorExact(search_vector('notes'), query), mission=OuterRef('pk'))
+        return Q(SearchVectorExact(search_vector('description'), query)) | Q(Exists(matching_targets))
+
+
+MissionOrdering = Literal['id', '-id', 'name', '-name', 'remaining_targets', '-remaining_targets']
+
+
 class CreateTargetSchema(Schema):
     name: str
     country: str
@@ -64,3 +132,61 @@ class CreateMissionSchema(Schema):
         if not value.strip():
             raise ValueError('Description must not be empty')
         return value
+
+
+class PatchMissionSchema(Schema):
+    name: str = None
+    description: str = None
+
+    @field_validator('name')
+    def name_must_not_be_empty(cls, value):
+        if not value.strip():
+            raise ValueError('Name must not be empty')
+        return value
+
+    @field_validator('description')
+    def description_must_not_be_empty(cls, value):
+        if not value.strip():
+            raise ValueError('Description must not be empty')
+        return value
+
+
+class PatchTargetSchema(Schema):
+    name: str = None
+    country: str = None
+    notes: str = None
+
+    @field_validator('name')
+    def name_must_not_be_empty(cls, value):
+        if not value.strip():
+            raise ValueError('Name must not be empty')
+        return value
+
+    @field_validator('country')
+    def country_must_not_be_empty(cls, value):
+        if not value.strip():
+            raise ValueError('Country must not be empty')
+        return value
+
+    @field_validator('notes')
+    def notes_must_not_be_too_long(cls, value):
+        if len(value) > 200:
+            raise ValueError('Notes cannot exceed 200 characters')
+        return value
+
+
+class MissionIdsSchema(Schema):
+    mission_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TargetIdsSchema(Schema):
+    target_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class CatAssignmentSchema(Schema):
+    mission_id: int
+    cat_id: int
+
+
+class BatchAssignCatsSchema(Schema):
+    assignments: List[CatAssignmentSchema] = Field(..., min_length=1, max_length=MAX_BATCH_SIZE)
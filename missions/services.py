@@ -1,7 +1,109 @@
-from django.shortcuts import get_object_or_404
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Any, AsyncIterator, Iterable, Iterator
+
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Prefetch, Q, QuerySet, Value, When, prefetch_related_objects
+from django.db.models.functions import Greatest, Now
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, get_object_or_404
 from cats.models import SpyCat
+from cats.schemas import SpyCatFilterSchema
+from cats.services import SPY_CAT_EXPORT_FIELDS, list_spy_cats, spy_cat_cache_tag
+from core.bulk import DEFAULT_CHUNK_SIZE, batch_results, import_in_chunks, unique_ids
+from core.cache import invalidate
+from core.concurrency import PreconditionFailed, at_version, check_version, next_version
+from core.db import update_returning
+from core.exports import EXPORT_CHUNK_SIZE
+from core.serialization import RowSerializer
+from jobs.services import enqueue
+from stats.services import (
+    ASSIGNMENT_SECTIONS,
+    MISSION_SECTIONS,
+    TARGET_COMPLETION_SECTIONS,
+    TARGET_COUNTRY_SECTIONS,
+    mark_stale,
+)
 from .models import Mission, Target
-from .schemas import CreateMissionSchema
+from .schemas import CreateMissionSchema, MissionFilterSchema, MissionRow, PatchMissionSchema, PatchTargetSchema
+from .signals import mission_completed
+
+
+def missions_for_serialization() -> QuerySet:
+    """Missions with the assigned cat and targets loaded up front for MissionSchema."""
+    return Mission.objects.select_related('assigned_cat').prefetch_related(
+        Prefetch('targets', queryset=Target.objects.order_by('id'))
+    )
+
+
+def prefetch_for_serialization(mission: Mission) -> Mission:
+    """Loads whatever MissionSchema reads and is not loaded yet on a single mission."""
+    prefetch_related_objects([mission], 'assigned_cat', Prefetch('targets', queryset=Target.objects.order_by('id')))
+    return mission
+
+
+TARGET_ROW_FIELDS = ['id', 'name', 'country', 'notes', 'is_completed']
+MISSION_ROW_FIELDS = [
+    'id', 'name', 'description', 'is_completed', 'remaining_targets',
+    *(f'assigned_cat__{field}' for field in SPY_CAT_EXPORT_FIELDS),
+]
+
+
+def mission_rows(missions: list[dict]) -> list[dict]:
+    """Turns ``.values(*MISSION_ROW_FIELDS)`` rows into MissionRow, loading the targets of all of them in one query."""
+    targets = defaultdict(list)
+    if missions:
+        target_rows = Target.objects.filter(mission_id__in=[mission['id'] for mission in missions]).order_by('id')
+        for target in target_rows.values('mission_id', *TARGET_ROW_FIELDS):
+            targets[target.pop('mission_id')].append(target)
+
+    for mission in missions:
+        cat = {field: mission.pop(f'assigned_cat__{field}') for field in SPY_CAT_EXPORT_FIELDS}
+        mission['assigned_cat'] = cat if cat['id'] is not None else None
+        mission['targets'] = targets[mission['id']]
+    return missions
+
+
+mission_row_serializer = RowSerializer(MissionRow, complete=mission_rows)
+
+
+def mission_cache_tag(mission_id: int) -> str:
+    """Cache tag of responses that include the mission, see core.cache."""
+    return f"mission:{mission_id}"
+
+
+def mission_cache_dependencies(mission: Mission) -> list[str]:
+    """A cached mission embeds its assigned cat, so it is also dropped when the cat changes."""
+    return [spy_cat_cache_tag(mission.assigned_cat_id)] if mission.assigned_cat_id else []
+
+
+DEFAULT_PAST_MISSIONS = 10
+MAX_PAST_MISSIONS = 100
+
+
+def dossier_prefetches(past_missions: int = DEFAULT_PAST_MISSIONS) -> list[Prefetch]:
+    """What SpyCatDossierSchema reads of a cat: its active mission and the last
+    ``past_missions`` ones it completed, with their targets.
+
+    However many cats and missions are loaded, these take four queries: the active
+    missions, the completed missions, and the targets of each of the two.
+    """
+    targets = Prefetch('targets', queryset=Target.objects.order_by('id'))
+    completed = (
+        Mission.objects.filter(is_completed=True)
+        .order_by(F('completed_at').desc(nulls_last=True), '-id')
+        .prefetch_related(targets)
+    )
+    return [
+        Prefetch(
+            'missions',
+            queryset=Mission.objects.filter(is_completed=False).prefetch_related(targets),
+            to_attr='active_missions',
+        ),
+        # A sliced prefetch is limited per cat, with a window function.
+        Prefetch('missions', queryset=completed[:past_missions], to_attr='past_missions'),
+    ]
 
 
 def get_mission_or_404(mission_id: int) -> Mission:
@@ -14,12 +116,27 @@ def get_target_or_404(target_id: int) -> Target:
     return get_object_or_404(Target, id=target_id)
 
 
+def list_cat_dossiers(
+    filters: SpyCatFilterSchema | None = None, ordering: str = 'id', past_missions: int = DEFAULT_PAST_MISSIONS
+) -> QuerySet:
+    return list_spy_cats(filters, ordering).prefetch_related(*dossier_prefetches(past_missions))
+
+
+def get_cat_dossier(cat_id: int, past_missions: int = DEFAULT_PAST_MISSIONS) -> SpyCat:
+    return get_object_or_404(SpyCat.objects.prefetch_related(*dossier_prefetches(past_missions)), id=cat_id)
+
+
 def check_if_cat_not_assigned(mission: Mission) -> None:
     """Checks if there is an not assigned cat to the mission."""
-    if not mission.assigned_cat:
+    if not mission.assigned_cat_id:
         raise ValueError("Cannot modify mission without an assigned cat.")
 
 
+def is_active_mission_conflict(error: IntegrityError) -> bool:
+    """Whether ``error`` was raised by the one-active-mission-per-cat constraint."""
+    return 'mission_one_active_per_cat' in str(error)
+
+
 def check_if_completed(target: Target) -> None:
     """Checks if the target or mission is completed."""
     if target.is_completed or target.mission.is_completed:
@@ -30,113 +147,620 @@ def create_mission_with_targets(payload: CreateMissionSchema) -> Mission:
     try:
         assigned_cat = SpyCat.objects.get(id=payload.assigned_cat) if payload.assigned_cat else None
 
-        # Create mission
-        mission = Mission.objects.create(
-            name=payload.name,
-            description=payload.description,
-            assigned_cat=assigned_cat,
-            is_completed=False,
-        )
-
-        # Create associated targets
-        for target in payload.targets:
-            Target.objects.create(
-                mission=mission,
-                name=target.name,
-                country=target.country,
-                notes=target.notes,
-                is_completed=False
+        with transaction.atomic():
+            mission = Mission.objects.create(
+                name=payload.name,
+                description=payload.description,
+                assigned_cat=assigned_cat,
+                is_completed=False,
+                remaining_targets=len(payload.targets),
+            )
+            targets = Target.objects.bulk_create(
+                Target(
+                    mission=mission,
+                    name=target.name,
+                    country=target.country,
+                    notes=target.notes,
+                    is_completed=False,
+                )
+                for target in payload.targets
             )
 
+        mark_stale(*MISSION_SECTIONS)
+        # Serve mission.targets from the inserted rows instead of querying them back, the way
+        # prefetch_related stores its results: as a queryset that is already evaluated.
+        prefetched = mission.targets.all()
+        prefetched._result_cache, prefetched._prefetch_done = targets, True
+        mission._prefetched_objects_cache = {'targets': prefetched}
         return mission
     except SpyCat.DoesNotExist:
         raise ValueError(f"Spy cat with ID {payload.assigned_cat} not found.")
+    except IntegrityError as e:
+        if is_active_mission_conflict(e):
+            raise ValueError(f"Spy cat with ID {payload.assigned_cat} already has an active mission.")
+        raise Exception(f"Failed to create mission: {str(e)}")
     except Exception as e:
         raise Exception(f"Failed to create mission: {str(e)}")
 
 
-def list_missions() -> list:
+def _insert_missions(payloads: list[CreateMissionSchema]) -> list[int | str]:
+    cat_ids = {payload.assigned_cat for payload in payloads if payload.assigned_cat}
+    existing_cat_ids = set(SpyCat.objects.filter(id__in=cat_ids).values_list('id', flat=True))
+    # A cat can only have one active mission, so cats that are busy, or that an earlier item of the chunk
+    # takes, are reported instead of failing the chunk on mission_one_active_per_cat.
+    busy_cats = Mission.objects.filter(assigned_cat_id__in=cat_ids, is_completed=False)
+    busy_cat_ids = set(busy_cats.values_list('assigned_cat_id', flat=True))
+
+    errors = {}
+    for index, payload in enumerate(payloads):
+        if not payload.assigned_cat:
+            continue
+        if payload.assigned_cat not in existing_cat_ids:
+            errors[index] = f"Spy cat with ID {payload.assigned_cat} not found."
+        elif payload.assigned_cat in busy_cat_ids:
+            errors[index] = f"Spy cat with ID {payload.assigned_cat} already has an active mission."
+        else:
+            busy_cat_ids.add(payload.assigned_cat)
+    accepted = [payload for index, payload in enumerate(payloads) if index not in errors]
+
+    missions = Mission.objects.bulk_create(
+        Mission(
+            name=payload.name,
+            description=payload.description,
+            assigned_cat_id=payload.assigned_cat,
+            is_completed=False,
+            remaining_targets=len(payload.targets),
+        )
+        for payload in accepted
+    )
+    Target.objects.bulk_create(
+        Target(mission=mission, name=target.name, country=target.country, notes=target.notes, is_completed=False)
+        for mission, payload in zip(missions, accepted)
+        for target in payload.targets
+    )
+
+    mission_ids = iter(mission.id for mission in missions)
+    return [errors[index] if index in errors else next(mission_ids) for index in range(len(payloads))]
+
+
+def bulk_create_missions(items: Iterable[Any], chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
     try:
-        return list(Mission.objects.all())
+        result = import_in_chunks(items, CreateMissionSchema.model_validate, _insert_missions, chunk_size)
+        mark_stale(*MISSION_SECTIONS)
+        return result
     except Exception as e:
-        raise Exception(f"Failed to list missions: {str(e)}")
+        raise Exception(f"Failed to import missions: {str(e)}")
+
+
+def list_missions(filters: MissionFilterSchema | None = None, ordering: str = 'id') -> QuerySet:
+    """Missions matching ``filters``, lazily: the paginator runs the queries, for the requested page only."""
+    missions = filters.filter(missions_for_serialization()) if filters else missions_for_serialization()
+    # The ID breaks ties so that pages do not overlap.
+    return missions.order_by(ordering, 'id') if ordering.lstrip('-') != 'id' else missions.order_by(ordering)
+
+
+def list_mission_rows(filters: MissionFilterSchema | None = None, ordering: str = 'id') -> QuerySet:
+    """list_missions() as ``.values()`` rows for mission_row_serializer."""
+    return list_missions(filters, ordering).prefetch_related(None).values(*MISSION_ROW_FIELDS)
+
+
+MISSION_CSV_FIELDS = [
+    'mission_id', 'mission_name', 'description', 'assigned_cat_id', 'mission_is_completed',
+    'target_id', 'target_name', 'country', 'notes', 'target_is_completed',
+]
+
+
+def _exported_missions(is_completed: bool | None, assigned_cat: int | None) -> QuerySet:
+    missions = Mission.objects.order_by('id')
+    if is_completed is not None:
+        missions = missions.filter(is_completed=is_completed)
+    if assigned_cat is not None:
+        missions = missions.filter(assigned_cat_id=assigned_cat)
+    return missions.values(*MISSION_ROW_FIELDS)
+
+
+def export_missions(is_completed: bool | None = None, assigned_cat: int | None = None) -> Iterator[dict]:
+    """Streams missions with their targets through a server-side cursor."""
+    missions = _exported_missions(is_completed, assigned_cat).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    while chunk := list(islice(missions, EXPORT_CHUNK_SIZE)):
+        yield from mission_row_serializer.rows(chunk)
+
+
+def mission_csv_rows(mission: dict) -> list[dict]:
+    """Flattens an exported mission to one CSV row per target, or a single row without targets."""
+    row = {
+        'mission_id': mission['id'],
+        'mission_name': mission['name'],
+        'description': mission['description'],
+        'assigned_cat_id': mission['assigned_cat']['id'] if mission['assigned_cat'] else None,
+        'mission_is_completed': mission['is_completed'],
+    }
+    return [
+        {
+            **row,
+            'target_id': target['id'],
+            'target_name': target['name'],
+            'country': target['country'],
+            'notes': target['notes'],
+            'target_is_completed': target['is_completed'],
+        }
+        for target in mission['targets']
+    ] or [row]
+
 
+def get_mission(mission_id: int) -> Mission:
+    return get_object_or_404(missions_for_serialization(), id=mission_id)
 
-def get_mission(cat_id: int) -> Mission:
-    return get_mission_or_404(cat_id)
 
+def update_open_mission(mission_id: int, expected_version: int | None = None, **changes) -> Mission:
+    """Writes the given fields of a mission that is not completed, in one UPDATE.
 
-def assign_cat_to_mission(mission_id: int, cat_id: int) -> Mission:
+    Returns the fresh row, or raises 404 or ValueError if the mission is missing or completed,
+    and PreconditionFailed if it is no longer at ``expected_version``.
+    """
+    queryset = at_version(Mission.objects.filter(id=mission_id, is_completed=False), expected_version)
+    missions = update_returning(queryset, version=next_version(), **changes)
+    if not missions:
+        check_version(get_mission_or_404(mission_id), expected_version)
+        raise ValueError("Cannot modify a completed mission.")
+    invalidate(mission_cache_tag(mission_id))
+    return missions[0]
+
+
+def assign_cat_to_mission(mission_id: int, cat_id: int, expected_version: int | None = None) -> Mission:
     try:
-        mission = get_mission_or_404(mission_id)
         cat = SpyCat.objects.get(id=cat_id)
-
-        if mission.is_completed:
+        try:
+            # The savepoint keeps a constraint violation from breaking the caller's transaction.
+            with transaction.atomic():
+                mission = update_open_mission(mission_id, expected_version, assigned_cat=cat)
+        except ValueError:
             raise ValueError("Cannot assign a cat to a completed mission.")
-
+        except IntegrityError as e:
+            if is_active_mission_conflict(e):
+                raise ValueError(f"Spy cat with ID {cat_id} already has an active mission.")
+            raise
+        mark_stale(*ASSIGNMENT_SECTIONS)
         mission.assigned_cat = cat
-        mission.save()
         return mission
     except SpyCat.DoesNotExist:
         raise Exception(f"Spy cat with ID {cat_id} not found.")
+    except PreconditionFailed:
+        raise
     except Exception as e:
         raise Exception(f"Failed to assign cat to mission: {str(e)}")
 
 
-def remove_cat_from_mission(mission_id: int) -> Mission:
+def remove_cat_from_mission(mission_id: int, expected_version: int | None = None) -> Mission:
     try:
-        mission = get_mission_or_404(mission_id)
-
-        if mission.is_completed:
+        try:
+            mission = update_open_mission(mission_id, expected_version, assigned_cat=None)
+        except ValueError:
             raise ValueError("Cannot remove a cat from a completed mission.")
-
-        mission.assigned_cat = None
-        mission.save()
+        mark_stale(*ASSIGNMENT_SECTIONS)
         return mission
+    except PreconditionFailed:
+        raise
     except Exception as e:
         raise Exception(f"Failed to remove cat from mission: {str(e)}")
 
 
-def delete_mission(mission_id: int) -> None:
+def patch_mission(mission_id: int, payload: PatchMissionSchema, expected_version: int | None = None) -> Mission:
     try:
-        mission = get_mission_or_404(mission_id)
+        changes = payload.dict(exclude_unset=True)
+        if not changes:
+            return get_mission(mission_id)
+        return update_open_mission(mission_id, expected_version, **changes)
+    except PreconditionFailed:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to update mission: {str(e)}")
+
 
-        if mission.assigned_cat:
+def delete_mission(mission_id: int) -> None:
+    try:
+        with transaction.atomic():
+            # Locked, as in delete_missions, so that no cat can be assigned between the check and the delete.
+            deletable = list(
+                Mission.objects.select_for_update()
+                .filter(id=mission_id, assigned_cat__isnull=True)
+                .values_list('id', flat=True)
+            )
+            Mission.objects.filter(id__in=deletable).delete()
+        if not deletable:
+            get_mission_or_404(mission_id)
             raise ValueError("Cannot delete mission assigned to a cat.")
 
-        mission.delete()
+        invalidate(mission_cache_tag(mission_id))
+        mark_stale(*MISSION_SECTIONS)
     except Exception as e:
         raise Exception(f"Failed to delete mission: {str(e)}")
 
 
-def update_target_notes(target_id: int, new_notes: str):
-    try:
+def update_open_target(
+    target_id: int, mission_id: int | None = None, expected_version: int | None = None, **changes
+) -> Target:
+    """Writes the given fields of a modifiable target in one UPDATE and returns the fresh row.
+
+    A target can be modified while it and its mission are incomplete and the mission has a cat.
+    """
+    targets = Target.objects.filter(
+        id=target_id,
+        is_completed=False,
+        mission__is_completed=False,
+        mission__assigned_cat__isnull=False,
+    )
+    if mission_id is not None:
+        targets = targets.filter(mission_id=mission_id)
+
+    updated = update_returning(at_version(targets, expected_version), version=next_version(), **changes)
+    if not updated:
         target = get_target_or_404(target_id)
-
+        if mission_id is not None and target.mission_id != mission_id:
+            raise Http404("No Target matches the given query.")
+        check_version(target, expected_version)
         check_if_cat_not_assigned(target.mission)
         check_if_completed(target)
+        raise ValueError("Target was modified concurrently, please retry.")
+    invalidate(mission_cache_tag(updated[0].mission_id))
+    return updated[0]
 
-        target.notes = new_notes
-        target.save()
 
-        return target
+def update_target_notes(target_id: int, new_notes: str, expected_version: int | None = None):
+    try:
+        return update_open_target(target_id, expected_version=expected_version, notes=new_notes)
+    except PreconditionFailed:
+        raise
     except Exception as e:
         raise Exception(f"Failed to update target notes: {str(e)}")
 
 
-def mark_target_as_completed(target_id: int):
+def patch_target(
+    mission_id: int, target_id: int, payload: PatchTargetSchema, expected_version: int | None = None
+) -> Target:
     try:
-        target = get_target_or_404(target_id)
+        changes = payload.dict(exclude_unset=True)
+        if not changes:
+            return get_object_or_404(Target, id=target_id, mission_id=mission_id)
+        target = update_open_target(target_id, mission_id, expected_version, **changes)
+        if 'country' in changes:
+            mark_stale(*TARGET_COUNTRY_SECTIONS)
+        return target
+    except PreconditionFailed:
+        raise
+    except Exception as e:
+        raise Exception(f"Failed to update target: {str(e)}")
+
+
+def mark_target_as_completed(target_id: int, expected_version: int | None = None):
+    try:
+        target = get_object_or_404(Target.objects.select_related('mission'), id=target_id)
 
+        check_version(target, expected_version)
         check_if_cat_not_assigned(target.mission)
 
-        target.is_completed = True
-        target.save()
+        with transaction.atomic():
+            # Conditional updates make concurrent calls safe: only one of them can flip
+            # a given target, and only the one that takes the counter to zero completes the mission.
+            flipped = at_version(Target.objects.filter(id=target.id, is_completed=False), expected_version).update(
+                is_completed=True, version=next_version()
+            )
+            mission_completed_now = False
+            if flipped:
+                Mission.objects.filter(id=target.mission_id, remaining_targets__gt=0).update(
+                    remaining_targets=F('remaining_targets') - 1, version=next_version()
+                )
+                mission_completed_now = bool(
+                    Mission.objects.filter(id=target.mission_id, remaining_targets=0, is_completed=False)
+                    .update(is_completed=True, completed_at=Now(), version=next_version())
+                )
+                if mission_completed_now:
+                    # Queued with the completion itself, so it is neither lost nor sent for a rolled back one.
+                    enqueue('missions.notify_mission_completed', {'mission_id': target.mission_id})
+            elif not target.is_completed:
+                # Another request wrote the target since it was read above.
+                check_version(Target.objects.get(id=target.id), expected_version)
 
-        if all(t.is_completed for t in target.mission.targets.all()):
-            target.mission.is_completed = True
-            target.mission.save()
+        target.is_completed = True
+        if flipped:
+            target.version += 1
+            invalidate(mission_cache_tag(target.mission_id))
+            mark_stale(*TARGET_COMPLETION_SECTIONS)
+        if mission_completed_now:
+            mission_completed.send(sender=Mission, mission_id=target.mission_id)
 
         return target
+    except PreconditionFailed:
+        raise
     except Exception as e:
         raise Exception(f"Failed to mark target as completed: {str(e)}")
+
+
+# Batch variants of the writes above, for the /batch endpoints. Each applies the
+# same rules to a list of IDs with a fixed number of set-based statements in one
+# transaction, and reports the outcome of every ID instead of failing the batch.
+
+def _mission_errors(mission_ids: Iterable[int], reason: str) -> dict[int, str]:
+    """Errors of the missions a batch left unchanged: ``reason`` if they exist, not found otherwise."""
+    mission_ids = list(mission_ids)
+    existing = set(Mission.objects.filter(id__in=mission_ids).values_list('id', flat=True)) if mission_ids else set()
+    return {
+        mission_id: reason if mission_id in existing else f"Mission with ID {mission_id} not found."
+        for mission_id in mission_ids
+    }
+
+
+# A conflict with an assignment the checks could not lock costs one more attempt.
+ASSIGN_ATTEMPTS = 3
+
+
+def _assign_cats(cat_of: dict[int, int]) -> tuple[set[int], dict[int, str]]:
+    """One attempt of assign_cats_to_missions: the missions it assigned and the errors of the others."""
+    mission_ids = list(cat_of)
+    cat_ids = set(cat_of.values())
+    with transaction.atomic():
+        # Locks the missions of the batch and the active missions of its cats, so that what is
+        # checked below holds until the assignments are written.
+        missions = {
+            mission.id: mission
+            for mission in Mission.objects.select_for_update()
+            .filter(Q(id__in=mission_ids) | Q(assigned_cat_id__in=cat_ids, is_completed=False))
+            .only('id', 'assigned_cat_id', 'is_completed')
+            .order_by('id')
+        }
+        existing_cats = set(SpyCat.objects.filter(id__in=cat_ids).values_list('id', flat=True))
+
+        errors = {}
+        for mission_id, cat_id in cat_of.items():
+            if mission_id not in missions:
+                errors[mission_id] = f"Mission with ID {mission_id} not found."
+            elif cat_id not in existing_cats:
+                errors[mission_id] = f"Spy cat with ID {cat_id} not found."
+            elif missions[mission_id].is_completed:
+                errors[mission_id] = "Cannot assign a cat to a completed mission."
+
+        # A cat works on one mission at a time. The missions of the batch give up their cat, so cats can
+        # move between them; a free cat goes to the first mission asking for it. A mission that is refused
+        # keeps its cat, which may refuse others in turn.
+        while True:
+            assigned = {mission_id: cat_id for mission_id, cat_id in cat_of.items() if mission_id not in errors}
+            mission_of = {
+                mission.assigned_cat_id: mission.id
+                for mission in missions.values()
+                if mission.assigned_cat_id and not mission.is_completed and mission.id not in assigned
+            }
+            conflicts = {
+                mission_id: f"Spy cat with ID {cat_id} already has an active mission."
+                for mission_id, cat_id in assigned.items()
+                if mission_of.setdefault(cat_id, mission_id) != mission_id
+            }
+            if not conflicts:
+                break
+            errors.update(conflicts)
+
+        if assigned:
+            # One active mission per cat is checked row by row, so cats moving to another mission
+            # of the batch are released first.
+            taken = set(assigned.values())
+            moving = [
+                mission_id for mission_id in assigned
+                if missions[mission_id].assigned_cat_id in taken - {assigned[mission_id]}
+            ]
+            if moving:
+                Mission.objects.filter(id__in=moving).update(assigned_cat=None)
+            Mission.objects.filter(id__in=assigned).update(
+                assigned_cat_id=Case(*(When(id=mission_id, then=Value(cat_id))
+                                       for mission_id, cat_id in assigned.items())),
+                version=next_version(),
+            )
+    return set(assigned), errors
+
+
+def assign_cats_to_missions(assignments: Iterable[tuple[int, int]]) -> dict:
+    """Assigns cats to missions given as (mission ID, cat ID) pairs; the last pair of a mission wins."""
+    try:
+        cat_of = dict(assignments)
+        for attempt in range(ASSIGN_ATTEMPTS):
+            try:
+                updated, errors = _assign_cats(cat_of)
+                break
+            except IntegrityError as e:
+                # A cat of the batch was given a mission the checks did not lock, e.g. a new one;
+                # the next attempt sees it and reports it for the missions that asked for the cat.
+                if not is_active_mission_conflict(e) or attempt == ASSIGN_ATTEMPTS - 1:
+                    raise
+
+        if updated:
+            invalidate(*(mission_cache_tag(mission_id) for mission_id in updated))
+            mark_stale(*ASSIGNMENT_SECTIONS)
+        return batch_results(list(cat_of), errors)
+    except Exception as e:
+        raise Exception(f"Failed to assign cats to missions: {str(e)}")
+
+
+def remove_cats_from_missions(mission_ids: Iterable[int]) -> dict:
+    try:
+        mission_ids = unique_ids(mission_ids)
+        updated = {mission.id for mission in update_returning(
+            Mission.objects.filter(id__in=mission_ids, is_completed=False),
+            assigned_cat=None,
+            version=next_version(),
+        )}
+        errors = _mission_errors(
+            (mission_id for mission_id in mission_ids if mission_id not in updated),
+            "Cannot remove a cat from a completed mission.",
+        )
+
+        if updated:
+            invalidate(*(mission_cache_tag(mission_id) for mission_id in updated))
+            mark_stale(*ASSIGNMENT_SECTIONS)
+        return batch_results(mission_ids, errors)
+    except Exception as e:
+        raise Exception(f"Failed to remove cats from missions: {str(e)}")
+
+
+def delete_missions(mission_ids: Iterable[int]) -> dict:
+    try:
+        mission_ids = unique_ids(mission_ids)
+        with transaction.atomic():
+            # Locked so that no cat can be assigned between the check and the delete.
+            deletable = list(
+                Mission.objects.select_for_update()
+                .filter(id__in=mission_ids, assigned_cat__isnull=True)
+                .values_list('id', flat=True)
+            )
+            Mission.objects.filter(id__in=deletable).delete()
+        deleted = set(deletable)
+        errors = _mission_errors(
+            (mission_id for mission_id in mission_ids if mission_id not in deleted),
+            "Cannot delete mission assigned to a cat.",
+        )
+
+        if deleted:
+            invalidate(*(mission_cache_tag(mission_id) for mission_id in deleted))
+            mark_stale(*MISSION_SECTIONS)
+        return batch_results(mission_ids, errors)
+    except Exception as e:
+        raise Exception(f"Failed to delete missions: {str(e)}")
+
+
+def complete_targets(target_ids: Iterable[int]) -> dict:
+    """Marks targets as completed, completing the missions left without open targets.
+
+    As with mark_target_as_completed, completing a target twice succeeds without changing anything.
+    """
+    try:
+        target_ids = unique_ids(target_ids)
+        with transaction.atomic():
+            flipped = update_returning(
+                Target.objects.filter(id__in=target_ids, is_completed=False, mission__assigned_cat__isnull=False),
+                is_completed=True,
+                version=next_version(),
+            )
+            flipped_per_mission = Counter(target.mission_id for target in flipped)
+            completed_missions = []
+            if flipped_per_mission:
+                flipped_count = Case(*(When(id=mission_id, then=Value(count))
+                                       for mission_id, count in flipped_per_mission.items()))
+                Mission.objects.filter(id__in=flipped_per_mission).update(
+                    remaining_targets=Greatest(F('remaining_targets') - flipped_count, Value(0)),
+                    version=next_version(),
+                )
+                completed_missions = [mission.id for mission in update_returning(
+                    Mission.objects.filter(id__in=flipped_per_mission, remaining_targets=0, is_completed=False),
+                    is_completed=True,
+                    completed_at=Now(),
+                    version=next_version(),
+                )]
+                for mission_id in completed_missions:
+                    enqueue('missions.notify_mission_completed', {'mission_id': mission_id})
+
+        flipped_ids = {target.id for target in flipped}
+        unchanged = [target_id for target_id in target_ids if target_id not in flipped_ids]
+        # Maps the targets that exist to the cat of their mission.
+        found = {}
+        if unchanged:
+            found = dict(Target.objects.filter(id__in=unchanged).values_list('id', 'mission__assigned_cat_id'))
+        errors = {}
+        for target_id in unchanged:
+            if target_id not in found:
+                errors[target_id] = f"Target with ID {target_id} not found."
+            elif found[target_id] is None:
+                errors[target_id] = "Cannot modify mission without an assigned cat."
+
+        if flipped_per_mission:
+            invalidate(*(mission_cache_tag(mission_id) for mission_id in flipped_per_mission))
+            mark_stale(*TARGET_COMPLETION_SECTIONS)
+        for mission_id in completed_missions:
+            mission_completed.send(sender=Mission, mission_id=mission_id)
+        return batch_results(target_ids, errors)
+    except Exception as e:
+        raise Exception(f"Failed to complete targets: {str(e)}")
+
+
+# Async variants, used by missions.async_api. Multi-statement and transactional
+# flows run in a worker thread, as Django's async ORM has no async transactions;
+# missions are fully loaded there so serializing them needs no further queries.
+
+async def acreate_mission_with_targets(payload: CreateMissionSchema) -> Mission:
+    return await sync_to_async(create_mission_with_targets)(payload)
+
+
+async def abulk_create_missions(items: Iterable[Any], chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    return await sync_to_async(bulk_create_missions)(items, chunk_size)
+
+
+async def aexport_missions(is_completed: bool | None = None, assigned_cat: int | None = None) -> AsyncIterator[dict]:
+    chunk = []
+    async for mission in _exported_missions(is_completed, assigned_cat).aiterator(chunk_size=EXPORT_CHUNK_SIZE):
+        chunk.append(mission)
+        if len(chunk) == EXPORT_CHUNK_SIZE:
+            for row in await sync_to_async(mission_row_serializer.rows)(chunk):
+                yield row
+            chunk = []
+    for row in await sync_to_async(mission_row_serializer.rows)(chunk):
+        yield row
+
+
+async def aget_mission(mission_id: int) -> Mission:
+    return await aget_object_or_404(missions_for_serialization(), id=mission_id)
+
+
+async def aget_cat_dossier(cat_id: int, past_missions: int = DEFAULT_PAST_MISSIONS) -> SpyCat:
+    return await aget_object_or_404(SpyCat.objects.prefetch_related(*dossier_prefetches(past_missions)), id=cat_id)
+
+
+async def aget_target_or_404(target_id: int) -> Target:
+    return await aget_object_or_404(Target, id=target_id)
+
+
+async def apatch_mission(mission_id: int, payload: PatchMissionSchema, expected_version: int | None = None) -> Mission:
+    return await sync_to_async(
+        lambda: prefetch_for_serialization(patch_mission(mission_id, payload, expected_version))
+    )()
+
+
+async def aassign_cat_to_mission(mission_id: int, cat_id: int, expected_version: int | None = None) -> Mission:
+    return await sync_to_async(
+        lambda: prefetch_for_serialization(assign_cat_to_mission(mission_id, cat_id, expected_version))
+    )()
+
+
+async def aremove_cat_from_mission(mission_id: int, expected_version: int | None = None) -> Mission:
+    return await sync_to_async(
+        lambda: prefetch_for_serialization(remove_cat_from_mission(mission_id, expected_version))
+    )()
+
+
+async def adelete_mission(mission_id: int) -> None:
+    await sync_to_async(delete_mission)(mission_id)
+
+
+async def aupdate_target_notes(target_id: int, new_notes: str, expected_version: int | None = None) -> Target:
+    return await sync_to_async(update_target_notes)(target_id, new_notes, expected_version)
+
+
+async def apatch_target(
+    mission_id: int, target_id: int, payload: PatchTargetSchema, expected_version: int | None = None
+) -> Target:
+    return await sync_to_async(patch_target)(mission_id, target_id, payload, expected_version)
+
+
+async def amark_target_as_completed(target_id: int, expected_version: int | None = None) -> Target:
+    return await sync_to_async(mark_target_as_completed)(target_id, expected_version)
+
+
+async def aassign_cats_to_missions(assignments: Iterable[tuple[int, int]]) -> dict:
+    return await sync_to_async(assign_cats_to_missions)(assignments)
+
+
+async def aremove_cats_from_missions(mission_ids: Iterable[int]) -> dict:
+    return await sync_to_async(remove_cats_from_missions)(mission_ids)
+
+
+async def adelete_missions(mission_ids: Iterable[int]) -> dict:
+    return await sync_to_async(delete_missions)(mission_ids)
+
+
+async def acomplete_targets(target_ids: Iterable[int]) -> dict:
+    return await sync_to_async(complete_targets)(target_ids)
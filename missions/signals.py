@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent exactly once per mission, by the call that completes its last target.
+# Arguments: mission_id.
+mission_completed = Signal()
@@ -1,7 +1,32 @@
 import json
-from django.test import TestCase, Client
+import threading
+from unittest.mock import patch
+
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, Client, override_settings, skipUnlessDBFeature
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from ninja import NinjaAPI
+
+from .async_api import router as async_router
 from .models import Mission, Target
+from .schemas import CreateMissionSchema, MissionSchema
+from .services import create_mission_with_targets, mark_target_as_completed, missions_for_serialization
+from .signals import mission_completed
 from cats.models import SpyCat
+from core.concurrency import next_version
+from jobs.models import Job
+
+LIST_MISSIONS_QUERY_BUDGET = 3
+KEYSET_MISSIONS_QUERY_BUDGET = 2
+# Target lookup, savepoint, three conditional updates, the completion job, release.
+COMPLETE_TARGET_QUERY_BUDGET = 7
+GET_MISSION_QUERY_BUDGET = 2
+
+# Serves missions.async_api whatever API_MODE is, for AsyncMissionAPITest, from a router of its own.
+async_api = NinjaAPI(urls_namespace='missions-async-test')
+async_api.add_router("/missions/", async_router.build())
+urlpatterns = [path("api/", async_api.urls)]
 
 
 class MissionAPITest(TestCase):
@@ -13,7 +38,8 @@ class MissionAPITest(TestCase):
             name='Mission 1',
             description='Test Mission 1',
             assigned_cat=self.spy_cat1,
-            is_completed=False
+            is_completed=False,
+            remaining_targets=1,
         )
         self.target1 = Target.objects.create(
             mission=self.mission1,
@@ -39,6 +65,90 @@ class MissionAPITest(TestCase):
         self.assertIn('Mission 1', [mission['name'] for mission in missions])
         self.assertEqual(len(missions), 1)
 
+    def test_list_missions_match_mission_schema(self):
+        self.create_missions(2)
+        Mission.objects.create(name='Unassigned', description='No cat yet')
+        response = self.client.get("/api/missions/")
+        missions = missions_for_serialization().order_by('id')
+        expected = [MissionSchema.from_orm(mission).model_dump() for mission in missions]
+        self.assertEqual(response.json(), {'items': expected, 'count': 4, 'next': None})
+
+    def create_missions(self, count, targets_per_mission=3):
+        for i in range(count):
+            cat = SpyCat.objects.create(name=f'Agent {i}', years_of_experience=1, breed='Siamese', salary=500)
+            mission = Mission.objects.create(
+                name=f'Bulk {i}', description='Bulk', assigned_cat=cat, remaining_targets=targets_per_mission
+            )
+            for j in range(targets_per_mission):
+                Target.objects.create(mission=mission, name=f'Target {i}.{j}', country='Ukraine', notes='')
+
+    def test_list_missions_filters(self):
+        mission2 = Mission.objects.create(name='Mission 2', description='Watch the harbor', is_completed=True)
+        Target.objects.create(mission=mission2, name='Target 2', country='Poland', notes='Meets a courier at the embassy')
+
+        response = self.client.get("/api/missions/", {'country': 'Poland'})
+        self.assertEqual([mission['name'] for mission in response.json()['items']], ['Mission 2'])
+
+        response = self.client.get("/api/missions/", {'is_completed': False, 'assigned_cat': self.spy_cat1.id})
+        self.assertEqual([mission['name'] for mission in response.json()['items']], ['Mission 1'])
+
+    def test_list_missions_search(self):
+        mission2 = Mission.objects.create(name='Mission 2', description='Watch the harbor')
+        Target.objects.create(mission=mission2, name='Target 2', country='Poland', notes='Meets couriers at the embassy')
+        Mission.objects.create(name='Mission 3', description='Guard the harbors')
+
+        response = self.client.get("/api/missions/", {'search': 'courier'})
+        self.assertEqual([mission['name'] for mission in response.json()['items']], ['Mission 2'])
+
+        response = self.client.get("/api/missions/", {'search': 'harbor', 'ordering': '-name'})
+        self.assertEqual([mission['name'] for mission in response.json()['items']], ['Mission 3', 'Mission 2'])
+        self.assertEqual(response.json()['count'], 2)
+
+    def test_list_missions_query_budget(self):
+        self.create_missions(4)
+        # Count, missions joined with their cats, and one query for all targets on the page.
+        with self.assertNumQueries(LIST_MISSIONS_QUERY_BUDGET):
+            response = self.client.get("/api/missions/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['items'][1]['targets']), 3)
+
+    def test_list_missions_keyset(self):
+        self.create_missions(4)
+        with self.assertNumQueries(KEYSET_MISSIONS_QUERY_BUDGET):
+            response = self.client.get("/api/missions/", {'after': self.mission1.id, 'limit': 3})
+        self.assertEqual(response.status_code, 200)
+        names = [mission['name'] for mission in response.json()['items']]
+        self.assertEqual(names, ['Bulk 0', 'Bulk 1', 'Bulk 2'])
+        self.assertIsNone(response.json()['count'])
+
+        response = self.client.get("/api/missions/", {'after': response.json()['next'], 'limit': 3})
+        self.assertEqual([mission['name'] for mission in response.json()['items']], ['Bulk 3'])
+        self.assertIsNone(response.json()['next'])
+
+    def test_get_mission_query_budget(self):
+        Target.objects.create(mission=self.mission1, name='Target 2', country='Poland', notes='')
+        with self.assertNumQueries(GET_MISSION_QUERY_BUDGET):
+            response = self.client.get(f"/api/missions/{self.mission1.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['assigned_cat']['id'], self.spy_cat1.id)
+        self.assertEqual([t['name'] for t in response.json()['targets']], ['Target 1', 'Target 2'])
+
+    def test_cat_salary_change_invalidates_cached_mission(self):
+        url = f"/api/missions/{self.mission1.id}/"
+        self.client.get(url)
+        self.client.patch(
+            f"/api/spy_cats/{self.spy_cat1.id}/salary", data=json.dumps({'salary': 1500}), content_type='application/json'
+        )
+        self.assertEqual(self.client.get(url).json()['assigned_cat']['salary'], 1500)
+
+    def test_completing_target_invalidates_cached_mission(self):
+        url = f"/api/missions/{self.mission1.id}/"
+        self.client.get(url)
+        self.patch_request(f"{url}target/{self.target1.id}/complete/", {})
+        response = self.client.get(url)
+        self.assertTrue(response.json()['is_completed'])
+        self.assertTrue(response.json()['targets'][0]['is_completed'])
+
     def test_create_mission(self):
         payload = {
             'name': 'Mission 2',
@@ -53,12 +163,116 @@ class MissionAPITest(TestCase):
         self.assertEqual(response.json()['name'], 'Mission 2')
         self.assertEqual(response.json()['assigned_cat']['id'], self.spy_cat2.id)
 
+    def test_create_mission_query_count_is_independent_of_targets(self):
+        def create(target_count):
+            cat = SpyCat.objects.create(name=f'Agent {target_count}', years_of_experience=1, breed='Siamese', salary=500)
+            payload = {
+                'name': f'Mission with {target_count} targets',
+                'description': 'Bulk targets',
+                'assigned_cat': cat.id,
+                'targets': [{'name': f'Target {i}', 'country': 'Ukraine'} for i in range(target_count)],
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post_request("/api/missions/", payload)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.json()['targets']), target_count)
+            return len(queries)
+
+        self.assertEqual(create(1), create(25))
+        self.assertEqual(Target.objects.filter(mission__name='Mission with 25 targets').count(), 25)
+
+    def test_created_mission_targets_behave_as_a_queryset(self):
+        targets = [{'name': 'A', 'country': 'Ukraine'}, {'name': 'B', 'country': 'Spain'}]
+        payload = CreateMissionSchema(name='Mission', description='Prefetched', assigned_cat=None, targets=targets)
+        mission = create_mission_with_targets(payload)
+        with self.assertNumQueries(0):
+            self.assertEqual([target.name for target in mission.targets.all()], ['A', 'B'])
+            self.assertEqual(mission.targets.count(), 2)
+        self.assertEqual([target.name for target in mission.targets.filter(country='Spain')], ['B'])
+
+    def test_create_mission_is_atomic(self):
+        payload = {
+            'name': 'Half-written mission',
+            'description': 'Target insert fails',
+            'assigned_cat': self.spy_cat2.id,
+            'targets': [{'name': 'Target', 'country': 'X' * 300}],
+        }
+        response = self.post_request("/api/missions/", payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Mission.objects.filter(name='Half-written mission').exists())
+
+    def test_bulk_create_missions(self):
+        payload = [
+            {'name': 'Bulk 1', 'description': 'First', 'assigned_cat': self.spy_cat2.id,
+             'targets': [{'name': 'T1', 'country': 'USA'}, {'name': 'T2', 'country': 'Spain'}]},
+            {'name': 'Bulk 2', 'description': 'Missing cat', 'assigned_cat': 9999, 'targets': []},
+            {'name': '', 'description': 'Invalid', 'assigned_cat': None, 'targets': []},
+            {'name': 'Bulk 3', 'description': 'Unassigned', 'assigned_cat': None,
+             'targets': [{'name': 'T3', 'country': 'Italy'}]},
+        ]
+        response = self.post_request("/api/missions/bulk", payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+        results = response.json()['results']
+        self.assertEqual(results[1]['errors'], ['Spy cat with ID 9999 not found.'])
+        self.assertEqual(results[2]['errors'], ['name: Value error, Name must not be empty'])
+        mission = Mission.objects.get(id=results[0]['id'])
+        self.assertEqual(mission.assigned_cat, self.spy_cat2)
+        self.assertEqual(mission.targets.count(), 2)
+        self.assertEqual(Mission.objects.get(id=results[3]['id']).targets.get().name, 'T3')
+
+    def test_bulk_create_missions_for_busy_cats(self):
+        payload = [
+            {'name': 'Busy', 'description': 'Cat on Mission 1', 'assigned_cat': self.spy_cat1.id, 'targets': []},
+            {'name': 'First', 'description': 'Free cat', 'assigned_cat': self.spy_cat2.id, 'targets': []},
+            {'name': 'Second', 'description': 'Same cat', 'assigned_cat': self.spy_cat2.id, 'targets': []},
+        ]
+        response = self.post_request("/api/missions/bulk", payload)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 1)
+        results = response.json()['results']
+        self.assertEqual(results[0]['errors'], [f'Spy cat with ID {self.spy_cat1.id} already has an active mission.'])
+        self.assertEqual(Mission.objects.get(id=results[1]['id']).assigned_cat, self.spy_cat2)
+        self.assertEqual(results[2]['errors'], [f'Spy cat with ID {self.spy_cat2.id} already has an active mission.'])
+
+    def test_export_missions_ndjson(self):
+        Mission.objects.create(name='Done', description='Completed mission', is_completed=True)
+        response = self.client.get("/api/missions/export", {'is_completed': False, 'assigned_cat': self.spy_cat1.id})
+        self.assertEqual(response.status_code, 200)
+        missions = [json.loads(line) for line in b''.join(response).splitlines()]
+        self.assertEqual([mission['name'] for mission in missions], ['Mission 1'])
+        self.assertEqual(missions[0]['targets'][0]['name'], 'Target 1')
+
+    def test_export_missions_csv(self):
+        Mission.objects.create(name='Empty', description='No targets')
+        response = self.client.get("/api/missions/export", {'format': 'csv'})
+        self.assertEqual(response.status_code, 200)
+        lines = b''.join(response).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].endswith(f',{self.target1.id},Target 1,Ukraine,Test Target 1,False'))
+        self.assertTrue(lines[2].endswith('Empty,No targets,,False,,,,,'))
+
     def test_assign_cat_to_mission(self):
         payload = {}
         response = self.patch_request(f"/api/missions/{self.mission1.id}/assign-cat/{self.spy_cat2.id}/", payload)
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json()['assigned_cat']['id'], self.spy_cat2.id)
 
+    def test_cat_has_one_active_mission(self):
+        mission2 = Mission.objects.create(name='Mission 2', description='Second mission')
+        response = self.patch_request(f"/api/missions/{mission2.id}/assign-cat/{self.spy_cat1.id}/", {})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f'Spy cat with ID {self.spy_cat1.id} already has an active mission.', response.json()['detail'])
+
+        payload = {'name': 'Mission 3', 'description': 'Third mission', 'assigned_cat': self.spy_cat1.id, 'targets': []}
+        response = self.post_request("/api/missions/", payload)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(f'Spy cat with ID {self.spy_cat1.id} already has an active mission.', response.json()['detail'])
+
+        Mission.objects.filter(id=self.mission1.id).update(is_completed=True)
+        response = self.patch_request(f"/api/missions/{mission2.id}/assign-cat/{self.spy_cat1.id}/", {})
+        self.assertEqual(response.status_code, 200)
+
     def test_remove_cat_from_mission(self):
         payload = {}
         response = self.patch_request(f"/api/missions/{self.mission1.id}/remove-cat/", payload)
@@ -71,6 +285,86 @@ class MissionAPITest(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertTrue(response.json()['is_completed'])
 
+    def test_completing_last_target_completes_mission(self):
+        completions = []
+        receiver = lambda sender, mission_id, **kwargs: completions.append(mission_id)
+        mission_completed.connect(receiver)
+        self.addCleanup(mission_completed.disconnect, receiver)
+
+        target2 = Target.objects.create(mission=self.mission1, name='Target 2', country='Poland', notes='')
+        Mission.objects.filter(id=self.mission1.id).update(remaining_targets=2)
+
+        self.patch_request(f"/api/missions/{self.mission1.id}/target/{self.target1.id}/complete/", {})
+        self.mission1.refresh_from_db()
+        self.assertEqual(self.mission1.remaining_targets, 1)
+        self.assertFalse(self.mission1.is_completed)
+
+        # Completing a target twice must not decrement the counter again.
+        self.patch_request(f"/api/missions/{self.mission1.id}/target/{self.target1.id}/complete/", {})
+        self.mission1.refresh_from_db()
+        self.assertEqual(self.mission1.remaining_targets, 1)
+
+        with self.assertNumQueries(COMPLETE_TARGET_QUERY_BUDGET):
+            response = self.patch_request(f"/api/missions/{self.mission1.id}/target/{target2.id}/complete/", {})
+        self.assertTrue(response.json()['is_completed'])
+        self.mission1.refresh_from_db()
+        self.assertEqual(self.mission1.remaining_targets, 0)
+        self.assertTrue(self.mission1.is_completed)
+        self.assertEqual(completions, [self.mission1.id])
+        self.assertEqual(
+            list(Job.objects.values_list('name', 'payload')),
+            [('missions.notify_mission_completed', {'mission_id': self.mission1.id})],
+        )
+
+    def test_create_mission_counts_remaining_targets(self):
+        payload = {
+            'name': 'Mission 2',
+            'description': 'Test Mission 2',
+            'assigned_cat': self.spy_cat2.id,
+            'targets': [{'name': 'A', 'country': 'USA'}, {'name': 'B', 'country': 'USA'}],
+        }
+        response = self.post_request("/api/missions/", payload)
+        self.assertEqual(response.json()['remaining_targets'], 2)
+
+    def test_patch_mission(self):
+        response = self.patch_request(f"/api/missions/{self.mission1.id}/", {'description': 'Updated'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['description'], 'Updated')
+        self.assertEqual(response.json()['name'], 'Mission 1')
+
+    def test_patch_completed_mission(self):
+        Mission.objects.filter(id=self.mission1.id).update(is_completed=True)
+        response = self.patch_request(f"/api/missions/{self.mission1.id}/", {'name': 'Renamed'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Cannot modify a completed mission.', response.json()['detail'])
+
+    def test_assign_cat_to_completed_mission(self):
+        Mission.objects.filter(id=self.mission1.id).update(is_completed=True)
+        response = self.patch_request(f"/api/missions/{self.mission1.id}/assign-cat/{self.spy_cat2.id}/", {})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Cannot assign a cat to a completed mission.', response.json()['detail'])
+
+    def test_patch_target(self):
+        with self.assertNumQueries(1):
+            response = self.patch_request(
+                f"/api/missions/{self.mission1.id}/target/{self.target1.id}/", {'country': 'Poland', 'notes': 'Moved'}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['country'], 'Poland')
+        self.assertEqual(response.json()['name'], 'Target 1')
+
+    def test_patch_target_without_assigned_cat(self):
+        Mission.objects.filter(id=self.mission1.id).update(assigned_cat=None)
+        response = self.patch_request(f"/api/missions/{self.mission1.id}/target/{self.target1.id}/", {'notes': 'x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Cannot modify mission without an assigned cat.', response.json()['detail'])
+
+    def test_update_completed_target_notes(self):
+        Target.objects.filter(id=self.target1.id).update(is_completed=True)
+        response = self.client.patch(f"/api/missions/{self.mission1.id}/target/{self.target1.id}/notes/?new_notes=x")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('Cannot modify completed target or mission.', response.json()['detail'])
+
     def test_delete_mission(self):
         self.mission1.assigned_cat = None
         self.mission1.save()
@@ -96,7 +390,7 @@ class MissionAPITest(TestCase):
         payload = {
             'name': 'Mission Without Targets',
             'description': 'Mission without any targets',
-            'assigned_cat': self.spy_cat1.id,
+            'assigned_cat': self.spy_cat2.id,
             'targets': []
         }
         response = self.post_request("/api/missions/", payload)
@@ -111,3 +405,290 @@ class MissionAPITest(TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn('Cannot delete mission assigned to a cat.', response.json()['detail'])
 
+    def test_assign_cat_with_stale_etag_fails(self):
+        url = f"/api/missions/{self.mission1.id}/"
+        etag = self.client.get(url)['ETag']
+        self.patch_request(f"{url}remove-cat/", {})
+        response = self.client.patch(f"{url}assign-cat/{self.spy_cat2.id}/", headers={'If-Match': etag})
+        self.assertEqual(response.status_code, 412)
+        self.mission1.refresh_from_db()
+        self.assertIsNone(self.mission1.assigned_cat)
+
+    def test_patch_target_with_etag_of_previous_write(self):
+        url = f"/api/missions/{self.mission1.id}/target/{self.target1.id}/"
+        first = self.patch_request(url, {'notes': 'Seen at the harbor'})
+        response = self.client.patch(
+            url, data=json.dumps({'country': 'Poland'}), content_type='application/json',
+            headers={'If-Match': first['ETag']},
+        )
+        self.assertEqual(response.status_code, 200)
+        stale = self.client.patch(
+            url, data=json.dumps({'notes': 'Lost track'}), content_type='application/json',
+            headers={'If-Match': first['ETag']},
+        )
+        self.assertEqual(stale.status_code, 412)
+        self.target1.refresh_from_db()
+        self.assertEqual(self.target1.country, 'Poland')
+        self.assertEqual(self.target1.notes, 'Seen at the harbor')
+        self.assertEqual(self.target1.version, 3)
+
+    def test_complete_target_with_stale_etag_fails(self):
+        url = f"/api/missions/{self.mission1.id}/target/{self.target1.id}/"
+        etag = self.patch_request(url, {'notes': 'First'})['ETag']
+        self.patch_request(url, {'notes': 'Second'})
+        response = self.client.patch(f"{url}complete/", headers={'If-Match': etag})
+        self.assertEqual(response.status_code, 412)
+        self.assertFalse(Target.objects.get(id=self.target1.id).is_completed)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncMissionAPITest(TestCase):
+    def setUp(self):
+        self.spy_cat1 = SpyCat.objects.create(name='Whiskers', years_of_experience=5, breed='Siamese', salary=1000)
+        self.mission1 = Mission.objects.create(
+            name='Mission 1', description='Test Mission 1', assigned_cat=self.spy_cat1, remaining_targets=1
+        )
+        self.target1 = Target.objects.create(mission=self.mission1, name='Target 1', country='Ukraine', notes='')
+
+    async def test_create_mission(self):
+        cat = await SpyCat.objects.acreate(name='Felix', years_of_experience=2, breed='Maine Coon', salary=800)
+        payload = {
+            'name': 'Mission 2',
+            'description': 'Async mission',
+            'assigned_cat': cat.id,
+            'targets': [{'name': 'T1', 'country': 'Poland', 'notes': ''}],
+        }
+        response = await self.async_client.post("/api/missions/", payload, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['remaining_targets'], 1)
+        self.assertEqual(response.json()['targets'][0]['name'], 'T1')
+
+    async def test_list_missions(self):
+        response = await self.async_client.get("/api/missions/", {'limit': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['items'][0]['targets'][0]['name'], 'Target 1')
+
+    async def test_get_mission(self):
+        response = await self.async_client.get(f"/api/missions/{self.mission1.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['assigned_cat']['id'], self.spy_cat1.id)
+
+    async def test_completing_last_target_completes_mission(self):
+        response = await self.async_client.patch(
+            f"/api/missions/{self.mission1.id}/target/{self.target1.id}/complete/", {}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue((await Mission.objects.aget(id=self.mission1.id)).is_completed)
+
+    async def test_batch_remove_cat(self):
+        response = await self.async_client.post(
+            "/api/missions/batch/remove-cat", {'mission_ids': [self.mission1.id]}, content_type='application/json'
+        )
+        self.assertEqual(response.json(), {'succeeded': 1, 'failed': 0, 'results': [{'id': self.mission1.id, 'errors': []}]})
+
+    async def test_remove_cat_from_mission(self):
+        response = await self.async_client.patch(
+            f"/api/missions/{self.mission1.id}/remove-cat/", {}, content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.json()['assigned_cat'])
+
+    async def test_patch_mission_with_stale_etag_fails(self):
+        url = f"/api/missions/{self.mission1.id}/"
+        etag = (await self.async_client.get(url))['ETag']
+        await self.async_client.patch(url, {'name': 'Renamed'}, content_type='application/json')
+        response = await self.async_client.patch(
+            url, {'name': 'Overwritten'}, content_type='application/json', headers={'If-Match': etag}
+        )
+        self.assertEqual(response.status_code, 412)
+        self.assertEqual((await Mission.objects.aget(id=self.mission1.id)).name, 'Renamed')
+
+        etag = (await self.async_client.get(url))['ETag']
+        response = await self.async_client.patch(
+            url, {'name': 'Overwritten'}, content_type='application/json', headers={'If-Match': etag}
+        )
+        self.assertEqual(response.status_code, 200)
+
+    async def test_delete_mission_with_assigned_cat(self):
+        response = await self.async_client.delete(f"/api/missions/{self.mission1.id}/")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['detail'], 'Error: Failed to delete mission: Cannot delete mission assigned to a cat.')
+
+
+class MissionBatchTest(TestCase):
+    def setUp(self):
+        self.cats = [
+            SpyCat.objects.create(name=f'Cat {i}', years_of_experience=i, breed='Siamese', salary=1000) for i in range(3)
+        ]
+        self.missions = [Mission.objects.create(name=f'Mission {i}', description='Batch') for i in range(3)]
+        self.completed = Mission.objects.create(name='Done', description='Done', is_completed=True)
+
+    def post_request(self, url, payload):
+        return self.client.post(url, data=json.dumps(payload), content_type='application/json')
+
+    def outcomes(self, response):
+        self.assertEqual(response.status_code, 200)
+        return {result['id']: result['errors'] for result in response.json()['results']}
+
+    def test_assign_cats_to_missions(self):
+        busy = Mission.objects.create(name='Busy', description='Busy', assigned_cat=self.cats[2])
+        response = self.post_request("/api/missions/batch/assign-cat", {'assignments': [
+            {'mission_id': self.missions[0].id, 'cat_id': self.cats[0].id},
+            {'mission_id': self.missions[1].id, 'cat_id': self.cats[0].id},
+            {'mission_id': self.missions[2].id, 'cat_id': self.cats[2].id},
+            {'mission_id': self.completed.id, 'cat_id': self.cats[1].id},
+            {'mission_id': 9999, 'cat_id': self.cats[1].id},
+            {'mission_id': busy.id, 'cat_id': 9999},
+        ]})
+        self.assertEqual(self.outcomes(response), {
+            self.missions[0].id: [],
+            self.missions[1].id: [f'Spy cat with ID {self.cats[0].id} already has an active mission.'],
+            self.missions[2].id: [f'Spy cat with ID {self.cats[2].id} already has an active mission.'],
+            self.completed.id: ['Cannot assign a cat to a completed mission.'],
+            9999: ['Mission with ID 9999 not found.'],
+            busy.id: ['Spy cat with ID 9999 not found.'],
+        })
+        self.assertEqual(response.json()['succeeded'], 1)
+        self.assertEqual(Mission.objects.get(id=self.missions[0].id).assigned_cat_id, self.cats[0].id)
+        self.assertIsNone(Mission.objects.get(id=self.missions[1].id).assigned_cat_id)
+
+    def test_assign_cats_swapped_between_missions(self):
+        Mission.objects.filter(id=self.missions[0].id).update(assigned_cat=self.cats[0])
+        Mission.objects.filter(id=self.missions[1].id).update(assigned_cat=self.cats[1])
+        response = self.post_request("/api/missions/batch/assign-cat", {'assignments': [
+            {'mission_id': self.missions[0].id, 'cat_id': self.cats[1].id},
+            {'mission_id': self.missions[1].id, 'cat_id': self.cats[0].id},
+            # Refused, so mission 2 keeps cat 2 and mission 0 cannot take it.
+            {'mission_id': self.missions[2].id, 'cat_id': 9999},
+        ]})
+        self.assertEqual(self.outcomes(response), {
+            self.missions[0].id: [],
+            self.missions[1].id: [],
+            self.missions[2].id: ['Spy cat with ID 9999 not found.'],
+        })
+        self.assertEqual(Mission.objects.get(id=self.missions[0].id).assigned_cat_id, self.cats[1].id)
+        self.assertEqual(Mission.objects.get(id=self.missions[1].id).assigned_cat_id, self.cats[0].id)
+
+    def test_assign_cats_retries_a_concurrent_conflict(self):
+        conflict = IntegrityError('duplicate key value violates unique constraint "mission_one_active_per_cat"')
+        assignments = {'assignments': [{'mission_id': self.missions[0].id, 'cat_id': self.cats[0].id}]}
+        with patch('missions.services.next_version', side_effect=[conflict, next_version()]):
+            response = self.post_request("/api/missions/batch/assign-cat", assignments)
+        self.assertEqual(self.outcomes(response), {self.missions[0].id: []})
+
+        with patch('missions.services.next_version', side_effect=conflict):
+            response = self.post_request("/api/missions/batch/assign-cat", assignments)
+        self.assertEqual(response.status_code, 400)
+
+    def test_remove_cats_from_missions(self):
+        Mission.objects.filter(id=self.missions[0].id).update(assigned_cat=self.cats[0])
+        Mission.objects.filter(id=self.completed.id).update(assigned_cat=self.cats[1])
+        response = self.post_request(
+            "/api/missions/batch/remove-cat", {'mission_ids': [self.missions[0].id, self.completed.id]}
+        )
+        self.assertEqual(self.outcomes(response), {
+            self.missions[0].id: [],
+            self.completed.id: ['Cannot remove a cat from a completed mission.'],
+        })
+        self.assertFalse(Mission.objects.filter(assigned_cat__isnull=False, is_completed=False).exists())
+
+    def test_delete_missions(self):
+        Mission.objects.filter(id=self.missions[1].id).update(assigned_cat=self.cats[0])
+        Target.objects.create(mission=self.missions[0], name='Target', country='Ukraine')
+        ids = [self.missions[0].id, self.missions[1].id, self.missions[0].id, 9999]
+        response = self.post_request("/api/missions/batch/delete", {'mission_ids': ids})
+        self.assertEqual(self.outcomes(response), {
+            self.missions[0].id: [],
+            self.missions[1].id: ['Cannot delete mission assigned to a cat.'],
+            9999: ['Mission with ID 9999 not found.'],
+        })
+        self.assertFalse(Mission.objects.filter(id=self.missions[0].id).exists())
+        self.assertFalse(Target.objects.exists())
+
+    def test_complete_targets(self):
+        completions = []
+        receiver = lambda sender, mission_id, **kwargs: completions.append(mission_id)
+        mission_completed.connect(receiver)
+        self.addCleanup(mission_completed.disconnect, receiver)
+
+        full, partial, unassigned = self.missions
+        Mission.objects.filter(id__in=[full.id, partial.id]).update(remaining_targets=2)
+        Mission.objects.filter(id=full.id).update(assigned_cat=self.cats[0])
+        Mission.objects.filter(id=partial.id).update(assigned_cat=self.cats[1])
+        full_targets = [Target.objects.create(mission=full, name=f'Full {i}', country='Ukraine') for i in range(2)]
+        partial_targets = [Target.objects.create(mission=partial, name=f'Partial {i}', country='Poland') for i in range(2)]
+        Target.objects.filter(id=partial_targets[1].id).update(is_completed=True)
+        orphan = Target.objects.create(mission=unassigned, name='Orphan', country='Spain')
+
+        ids = [full_targets[0].id, full_targets[1].id, partial_targets[1].id, orphan.id, 9999]
+        response = self.post_request("/api/missions/batch/complete-targets", {'target_ids': ids})
+        self.assertEqual(self.outcomes(response), {
+            full_targets[0].id: [],
+            full_targets[1].id: [],
+            partial_targets[1].id: [],
+            orphan.id: ['Cannot modify mission without an assigned cat.'],
+            9999: ['Target with ID 9999 not found.'],
+        })
+        full.refresh_from_db()
+        partial.refresh_from_db()
+        self.assertEqual((full.remaining_targets, full.is_completed), (0, True))
+        self.assertEqual((partial.remaining_targets, partial.is_completed), (2, False))
+        self.assertEqual(completions, [full.id])
+        self.assertEqual(list(Job.objects.values_list('payload', flat=True)), [{'mission_id': full.id}])
+
+    def test_queries_do_not_grow_with_batch_size(self):
+        def complete_batch(size):
+            mission = Mission.objects.create(name='Big', description='Big', remaining_targets=size + 1)
+            Mission.objects.filter(id=mission.id).update(assigned_cat=self.cats[0])
+            targets = Target.objects.bulk_create(
+                Target(mission=mission, name=f'Target {i}', country='Ukraine') for i in range(size)
+            )
+            with CaptureQueriesContext(connection) as queries:
+                self.post_request("/api/missions/batch/complete-targets", {'target_ids': [t.id for t in targets]})
+            Mission.objects.filter(id=mission.id).update(is_completed=True)
+            return len(queries)
+
+        self.assertEqual(complete_batch(5), complete_batch(100))
+
+    def test_batch_size_is_limited(self):
+        response = self.post_request("/api/missions/batch/delete", {'mission_ids': []})
+        self.assertEqual(response.status_code, 422)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class ConcurrentTargetCompletionTest(TransactionTestCase):
+    def test_mission_is_completed_exactly_once(self):
+        cat = SpyCat.objects.create(name='Whiskers', years_of_experience=5, breed='Siamese', salary=1000)
+        mission = Mission.objects.create(name='Race', description='Race', assigned_cat=cat, remaining_targets=8)
+        targets = Target.objects.bulk_create(
+            Target(mission=mission, name=f'Target {i}', country='Ukraine') for i in range(8)
+        )
+
+        completions = []
+        receiver = lambda sender, mission_id, **kwargs: completions.append(mission_id)
+        mission_completed.connect(receiver)
+        self.addCleanup(mission_completed.disconnect, receiver)
+
+        barrier = threading.Barrier(len(targets))
+        errors = []
+
+        def complete(target_id):
+            try:
+                barrier.wait()
+                mark_target_as_completed(target_id)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=complete, args=(target.id,)) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        mission.refresh_from_db()
+        self.assertTrue(mission.is_completed)
+        self.assertEqual(mission.remaining_targets, 0)
+        self.assertEqual(completions, [mission.id])
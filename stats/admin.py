@@ -0,0 +1,5 @@
+from django.contrib import admin
+
+from stats.models import StatsSnapshot
+
+admin.site.register(StatsSnapshot)
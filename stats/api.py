@@ -0,0 +1,16 @@
+from ninja import Router
+from ninja.errors import HttpError
+
+from .schemas import AgencyStatsSchema
+from .services import get_stats
+
+router = Router(tags=["Stats"])
+
+
+@router.get("/", response=AgencyStatsSchema)
+def get_stats_view(request):
+    """Payroll by breed, experience, missions per cat, completion by country and open targets."""
+    try:
+        return get_stats()
+    except Exception as e:
+        raise HttpError(400, f"Error: {str(e)}")
@@ -0,0 +1,8 @@
+from jobs.services import job
+from .services import refresh_snapshot
+
+
+@job('stats.refresh_snapshot')
+def refresh_stale_sections(sections: list[str]):
+    """Recomputes the snapshot sections that writes affected; queued by stats.services.mark_stale."""
+    refresh_snapshot(*sections)
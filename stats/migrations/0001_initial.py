@@ -0,0 +1,24 @@
+# Generated by Django 5.1.15 on 2026-10-18 12:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatsSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('section', models.CharField(max_length=50, unique=True)),
+                ('data', models.JSONField(default=dict)),
+                ('version', models.CharField(max_length=32)),
+                ('refreshed_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statssnapshot',
+            name='data_version',
+            field=models.IntegerField(default=-1),
+        ),
+        migrations.AlterField(
+            model_name='statssnapshot',
+            name='refreshed_at',
+            field=models.DateTimeField(null=True),
+        ),
+        # The old versions were cache tag tokens, which cannot be cast; existing rows become stale and are recomputed.
+        migrations.RemoveField(
+            model_name='statssnapshot',
+            name='version',
+        ),
+        migrations.AddField(
+            model_name='statssnapshot',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
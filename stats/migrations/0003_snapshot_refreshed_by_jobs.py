@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-18 13:26
+
+from django.db import migrations
+
+
+def clear_snapshot(apps, schema_editor):
+    # Stale rows could no longer be told apart; the next read computes every section again.
+    apps.get_model('stats', 'StatsSnapshot').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stats', '0002_snapshot_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_snapshot, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='statssnapshot',
+            name='data_version',
+        ),
+        migrations.RemoveField(
+            model_name='statssnapshot',
+            name='version',
+        ),
+    ]
@@ -0,0 +1,11 @@
+from django.db import models
+
+
+class StatsSnapshot(models.Model):
+    """Last computed value of one section of the agency statistics, refreshed by stats.services."""
+    section = models.CharField(max_length=50, unique=True)
+    data = models.JSONField(default=dict)
+    refreshed_at = models.DateTimeField(null=True)
+
+    def __str__(self):
+        return self.section
@@ -0,0 +1,44 @@
+from typing import List
+
+from ninja import Schema
+
+
+class BreedPayrollSchema(Schema):
+    breed: str
+    cats: int
+    payroll: float
+    avg_experience: float
+
+
+class CatStatsSchema(Schema):
+    cats: int
+    payroll: float
+    avg_experience: float | None
+
+
+class MissionStatsSchema(Schema):
+    missions: int
+    completed: int
+    assigned: int
+    avg_missions_per_cat: float | None
+    max_missions_per_cat: int | None
+
+
+class CountryCompletionSchema(Schema):
+    country: str
+    targets: int
+    completed: int
+    completion_rate: float
+
+
+class TargetStatsSchema(Schema):
+    targets: int
+    open_targets: int
+
+
+class AgencyStatsSchema(Schema):
+    payroll_by_breed: List[BreedPayrollSchema]
+    cats: CatStatsSchema
+    missions: MissionStatsSchema
+    countries: List[CountryCompletionSchema]
+    targets: TargetStatsSchema
@@ -0,0 +1,145 @@
+"""Agency statistics, aggregated in the database.
+
+Statistics are split in sections, each computed by one or two aggregate
+queries. With ``STATS_SNAPSHOT`` enabled the sections are kept in
+``StatsSnapshot`` and a read returns the stored rows, in a single query. Write
+services mark the sections they affect as stale; once the write commits, a
+``stats.refresh_snapshot`` job is queued to recompute them in the background,
+``STATS_REFRESH_DELAY`` seconds later. A section with a refresh already queued
+is not queued again: that refresh runs after the write and sees it. Writes thus
+never touch the snapshot rows, and a burst of them costs one refresh.
+"""
+from functools import partial
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Avg, Count, Max, Q, Sum
+from django.utils import timezone
+
+from cats.models import SpyCat
+from core.replicas import use_primary
+from jobs.services import enqueue
+from missions.models import Mission, Target
+from .models import StatsSnapshot
+
+PAYROLL_BY_BREED = 'payroll_by_breed'
+CATS = 'cats'
+MISSIONS = 'missions'
+COUNTRIES = 'countries'
+TARGETS = 'targets'
+
+# Sections affected by each kind of write.
+CAT_SECTIONS = (PAYROLL_BY_BREED, CATS)
+# Missions per cat averages over every cat, and a deleted cat leaves its missions unassigned.
+CAT_ROSTER_SECTIONS = (PAYROLL_BY_BREED, CATS, MISSIONS)
+MISSION_SECTIONS = (MISSIONS, COUNTRIES, TARGETS)
+ASSIGNMENT_SECTIONS = (MISSIONS,)
+TARGET_COUNTRY_SECTIONS = (COUNTRIES,)
+TARGET_COMPLETION_SECTIONS = (MISSIONS, COUNTRIES, TARGETS)
+
+
+def _number(value) -> float:
+    return float(value) if value is not None else 0.0
+
+
+def payroll_by_breed() -> list[dict]:
+    rows = (
+        SpyCat.objects.values('breed')
+        .annotate(cats=Count('id'), payroll=Sum('salary'), avg_experience=Avg('years_of_experience'))
+        .order_by('breed')
+    )
+    return [
+        {**row, 'payroll': _number(row['payroll']), 'avg_experience': _number(row['avg_experience'])}
+        for row in rows
+    ]
+
+
+def cat_stats() -> dict:
+    totals = SpyCat.objects.aggregate(cats=Count('id'), payroll=Sum('salary'), avg_experience=Avg('years_of_experience'))
+    avg_experience = totals['avg_experience']
+    return {
+        **totals,
+        'payroll': _number(totals['payroll']),
+        'avg_experience': float(avg_experience) if avg_experience is not None else None,
+    }
+
+
+def mission_stats() -> dict:
+    totals = Mission.objects.aggregate(
+        missions=Count('id'),
+        completed=Count('id', filter=Q(is_completed=True)),
+        assigned=Count('id', filter=Q(assigned_cat__isnull=False)),
+    )
+    per_cat = SpyCat.objects.annotate(mission_count=Count('missions')).aggregate(
+        avg_missions_per_cat=Avg('mission_count'), max_missions_per_cat=Max('mission_count')
+    )
+    avg = per_cat['avg_missions_per_cat']
+    return {**totals, **per_cat, 'avg_missions_per_cat': float(avg) if avg is not None else None}
+
+
+def country_completion() -> list[dict]:
+    rows = (
+        Target.objects.values('country')
+        .annotate(targets=Count('id'), completed=Count('id', filter=Q(is_completed=True)))
+        .order_by('country')
+    )
+    return [{**row, 'completion_rate': row['completed'] / row['targets']} for row in rows]
+
+
+def target_stats() -> dict:
+    return Target.objects.aggregate(targets=Count('id'), open_targets=Count('id', filter=Q(is_completed=False)))
+
+
+SECTIONS: dict[str, Callable[[], dict | list]] = {
+    PAYROLL_BY_BREED: payroll_by_breed,
+    CATS: cat_stats,
+    MISSIONS: mission_stats,
+    COUNTRIES: country_completion,
+    TARGETS: target_stats,
+}
+
+
+KEY_PREFIX = "stats-refresh"
+
+
+def _queue_refresh(sections: tuple[str, ...]) -> None:
+    delay = settings.STATS_REFRESH_DELAY
+    # The key expires before the queued job is due, so the writes it skips commit before the job runs.
+    queued = [section for section in sections if cache.add(f"{KEY_PREFIX}:{section}", True, delay)]
+    if queued:
+        enqueue('stats.refresh_snapshot', {'sections': queued}, delay=delay)
+
+
+def mark_stale(*sections: str) -> None:
+    """Queues the recomputation of snapshot sections once the current transaction commits."""
+    if settings.STATS_SNAPSHOT:
+        transaction.on_commit(partial(_queue_refresh, sections))
+
+
+def refresh_snapshot(*sections: str) -> dict[str, dict | list]:
+    """Recomputes and stores snapshot sections; returns their data."""
+    refreshed = {}
+    for section in sections:
+        refreshed[section] = SECTIONS[section]()
+        StatsSnapshot.objects.update_or_create(
+            section=section, defaults={'data': refreshed[section], 'refreshed_at': timezone.now()}
+        )
+    return refreshed
+
+
+def get_stats() -> dict:
+    try:
+        if not settings.STATS_SNAPSHOT:
+            return {section: compute() for section, compute in SECTIONS.items()}
+
+        stats = dict(StatsSnapshot.objects.values_list('section', 'data'))
+        missing = [section for section in SECTIONS if section not in stats]
+        if missing:
+            # Sections are computed on the first read; the snapshot stores what is read, so from the primary.
+            with use_primary():
+                stats.update(refresh_snapshot(*missing))
+        return {section: stats[section] for section in SECTIONS}
+    except Exception as e:
+        raise Exception(f"Failed to compute stats: {str(e)}")
@@ -0,0 +1,101 @@
+import json
+
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
+
+from cats.models import SpyCat
+from jobs.models import Job
+from jobs.services import claim, run
+from missions.models import Mission, Target
+from .models import StatsSnapshot
+from .services import CATS, MISSIONS, PAYROLL_BY_BREED
+
+
+class StatsAPITest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.spy_cat1 = SpyCat.objects.create(name='Whiskers', years_of_experience=5, breed='Siamese', salary=1000)
+        self.spy_cat2 = SpyCat.objects.create(name='Felix', years_of_experience=3, breed='Siamese', salary=800)
+        self.spy_cat3 = SpyCat.objects.create(name='Tom', years_of_experience=10, breed='Persian', salary=2000)
+        self.mission1 = Mission.objects.create(
+            name='Mission 1', description='Test Mission 1', assigned_cat=self.spy_cat1, remaining_targets=1
+        )
+        self.target1 = Target.objects.create(mission=self.mission1, name='Target 1', country='Ukraine', notes='')
+        Target.objects.create(mission=self.mission1, name='Target 2', country='Poland', notes='', is_completed=True)
+
+    def test_stats(self):
+        response = self.client.get("/api/stats/")
+        self.assertEqual(response.status_code, 200)
+        stats = response.json()
+        self.assertEqual(stats['payroll_by_breed'], [
+            {'breed': 'Persian', 'cats': 1, 'payroll': 2000, 'avg_experience': 10},
+            {'breed': 'Siamese', 'cats': 2, 'payroll': 1800, 'avg_experience': 4},
+        ])
+        self.assertEqual(stats['cats'], {'cats': 3, 'payroll': 3800, 'avg_experience': 6})
+        self.assertEqual(stats['missions']['assigned'], 1)
+        self.assertAlmostEqual(stats['missions']['avg_missions_per_cat'], 1 / 3)
+        self.assertEqual(stats['countries'][0], {'country': 'Poland', 'targets': 1, 'completed': 1, 'completion_rate': 1})
+        self.assertEqual(stats['targets'], {'targets': 2, 'open_targets': 1})
+
+    def test_snapshot_is_read_in_one_query(self):
+        self.client.get("/api/stats/")
+        with self.assertNumQueries(1):
+            self.client.get("/api/stats/")
+
+    def write(self, method, url, payload):
+        """Makes a request and runs what it does once it commits."""
+        with self.captureOnCommitCallbacks(execute=True):
+            getattr(self.client, method)(url, data=json.dumps(payload), content_type='application/json')
+
+    def run_jobs(self):
+        for queued in claim('test', 10):
+            run(queued)
+
+    @override_settings(STATS_REFRESH_DELAY=0)
+    def test_writes_refresh_only_affected_sections(self):
+        self.client.get("/api/stats/")
+        refreshed_at = dict(StatsSnapshot.objects.values_list('section', 'refreshed_at'))
+
+        self.write('patch', f"/api/missions/{self.mission1.id}/target/{self.target1.id}/complete/", {})
+        # Reads serve the snapshot until the refresh job runs.
+        self.assertEqual(self.client.get("/api/stats/").json()['targets']['open_targets'], 1)
+        self.run_jobs()
+        stats = self.client.get("/api/stats/").json()
+        self.assertEqual(stats['targets']['open_targets'], 0)
+        self.assertEqual(stats['missions']['completed'], 1)
+
+        refreshed = [
+            section for section, at in StatsSnapshot.objects.values_list('section', 'refreshed_at')
+            if at != refreshed_at[section]
+        ]
+        self.assertEqual(sorted(refreshed), ['countries', 'missions', 'targets'])
+
+    @override_settings(STATS_REFRESH_DELAY=0)
+    def test_salary_change_refreshes_payroll(self):
+        self.client.get("/api/stats/")
+        self.write('patch', f"/api/spy_cats/{self.spy_cat3.id}/salary", {'salary': 2500})
+        self.assertEqual(list(Job.objects.values_list('payload', flat=True)), [{'sections': [PAYROLL_BY_BREED, CATS]}])
+        self.run_jobs()
+        stats = self.client.get("/api/stats/").json()
+        self.assertEqual(stats['cats']['payroll'], 4300)
+        self.assertEqual(stats['payroll_by_breed'][0]['payroll'], 2500)
+
+    def test_writes_share_a_queued_refresh(self):
+        self.client.get("/api/stats/")
+        self.write('patch', f"/api/spy_cats/{self.spy_cat3.id}/salary", {'salary': 2500})
+        # Only the update: the refresh is already queued.
+        with self.assertNumQueries(1):
+            self.write('patch', f"/api/spy_cats/{self.spy_cat2.id}/salary", {'salary': 900})
+        # Deleting a cat also changes the missions section.
+        self.write('delete', f"/api/spy_cats/{self.spy_cat2.id}/", {})
+        self.assertEqual(
+            list(Job.objects.values_list('payload', flat=True)),
+            [{'sections': [PAYROLL_BY_BREED, CATS]}, {'sections': [MISSIONS]}],
+        )
+        self.assertFalse(claim('test', 10))
+
+    @override_settings(STATS_SNAPSHOT=False)
+    def test_stats_without_snapshot(self):
+        self.assertEqual(self.client.get("/api/stats/").json()['targets']['open_targets'], 1)
+        self.assertFalse(StatsSnapshot.objects.exists())